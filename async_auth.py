@@ -0,0 +1,132 @@
+# Asyncio front end for buggy_login_app's authentication.
+#
+# The login functions are synchronous and block on SQLite. AsyncAuthService
+# runs the blocking get_user_db lookups on a bounded thread pool, caps how
+# many may be queued at once, and coalesces concurrent lookups of the same
+# username into one query: a service account hammering the endpoint costs
+# one SQLite round trip per batch of overlapping requests, not one each.
+#
+# serve() exposes it over a minimal line protocol: the client sends
+# "<username> <password>\n" and receives "OK <token>\n" or "FAIL\n".
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import buggy_login_app
+import password_hashing
+import rate_limit
+
+DEFAULT_MAX_PENDING = 1_000
+
+
+class AsyncAuthService:
+    """Non-blocking authenticate/login on top of buggy_login_app."""
+
+    def __init__(self, max_workers=None, max_pending=DEFAULT_MAX_PENDING):
+        self.max_workers = max_workers or buggy_login_app.POOL_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="async-auth")
+        self._pending = asyncio.Semaphore(max_pending)
+        self._inflight = {}
+        self.lookups = 0
+        self.coalesced = 0
+
+    async def _lookup(self, username):
+        future = self._inflight.get(username)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+        async with self._pending:
+            future = self._inflight.get(username)
+            if future is not None:
+                self.coalesced += 1
+                return await asyncio.shield(future)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, buggy_login_app.get_user_db, username)
+            self._inflight[username] = future
+            self.lookups += 1
+            try:
+                # shield: one cancelled caller must not cancel the shared query.
+                return await asyncio.shield(future)
+            finally:
+                if self._inflight.get(username) is future:
+                    del self._inflight[username]
+
+    async def authenticate(self, username, password):
+        if buggy_login_app.is_hardcoded_login(username, password):
+            return True
+        user = await self._lookup(username)
+        hasher = buggy_login_app.PASSWORD_HASHER
+        if hasher is None or not user:
+            return buggy_login_app.password_matches(user, password)
+        # The KDF runs in the hasher's process pool, off the event loop.
+        ok, upgraded = await password_hashing.check_and_migrate_async(user[2], password, hasher)
+        if upgraded is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, buggy_login_app.update_password_db, user[0], upgraded)
+        return ok
+
+    async def login(self, username, password):
+        """Return a new session token, or None if refused or wrong."""
+        guard = buggy_login_app.LOGIN_GUARD
+        if not guard.check(username):
+            return None
+        if await self.authenticate(username, password):
+            guard.succeeded(username)
+            return buggy_login_app.create_session(username)
+        guard.failed(username)
+        return None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+_service = None
+
+
+def get_service():
+    global _service
+    if _service is None:
+        _service = AsyncAuthService()
+    return _service
+
+
+async def authenticate(username, password):
+    return await get_service().authenticate(username, password)
+
+
+async def login(username, password):
+    return await get_service().login(username, password)
+
+
+# ---- line-protocol server ---------------------------------------------------
+async def _handle(reader, writer, service):
+    peer = writer.get_extra_info("peername")
+    if peer:
+        rate_limit.SOURCE.set(peer[0])  # per connection task
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            username, _, password = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            token = await service.login(username, password)
+            writer.write(f"OK {token}\n".encode() if token else b"FAIL\n")
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, service=None):
+    service = service or get_service()
+    return await asyncio.start_server(lambda r, w: _handle(r, w, service), host, port)
+
+
+if __name__ == "__main__":
+    async def _main():
+        buggy_login_app.init_db()
+        server = await serve()
+        print(f"Auth service listening on {server.sockets[0].getsockname()}")
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(_main())
@@ -0,0 +1,222 @@
+# Buffered, asynchronous audit logging.
+#
+# The per-module log helpers used to open the log file, format time.ctime()
+# and close the file again for every event, all on the login hot path.
+# AsyncLogger instead queues (timestamp, message) pairs in memory; a
+# background thread drains the queue and appends whole batches to a file it
+# keeps open. Batches are written once ``batch_size`` records are waiting or
+# ``flush_interval`` seconds after the first one arrived, whichever is first.
+#
+# The queue is bounded. When it is full the ``policy`` decides what happens:
+#   "block" - the caller waits for room (default, nothing is lost)
+#   "drop"  - the record is discarded and counted in ``dropped``
+#   "sync"  - the caller writes the record itself, bypassing the queue
+#
+# A failed write (missing directory, permissions, full disk) is counted in
+# ``errors`` and the records are lost; the writer thread keeps going, so a
+# broken log file never stalls the callers. Every logger is flushed and
+# closed at interpreter exit.
+import atexit
+import os
+import queue
+import threading
+import time
+
+DEFAULT_MAX_QUEUE = 10_000
+DEFAULT_BATCH_SIZE = 1_024
+DEFAULT_FLUSH_INTERVAL = 0.2
+POLICIES = ("block", "drop", "sync")
+
+_FLUSH = object()
+_STOP = object()
+
+
+class AsyncLogger:
+    """Append-only log file written by a background thread."""
+
+    def __init__(self, path, max_queue=DEFAULT_MAX_QUEUE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, policy="block"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self.last_error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._stamp_second = None
+        self._stamp = ""
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"audit-log:{path}", daemon=True)
+        self._thread.start()
+
+    # ---- producers ------------------------------------------------------
+    def write(self, message):
+        self._put((time.time(), message))
+
+    def write_many(self, messages):
+        """Queue several messages as one record sharing one timestamp."""
+        messages = list(messages)
+        if messages:
+            self._put((time.time(), messages))
+
+    def _put(self, record):
+        if self._closed or not self._thread.is_alive():
+            self._write_safely([record])
+            if self._closed:
+                self._close_file()
+            return
+        if self.policy == "block":
+            self._queue.put(record)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if self.policy == "drop":
+                self.dropped += 1
+            else:
+                self._write_safely([record])
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        if self._closed:
+            return
+        if not self._thread.is_alive():
+            self._drain()
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        # Records that raced with close() are still written, synchronously.
+        self._drain()
+        self._close_file()
+
+    def _drain(self):
+        # Write whatever is queued from the calling thread
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if item is not _FLUSH and item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._write_safely(leftovers)
+
+    def _close_file(self):
+        with self._write_lock:
+            self._discard_file()
+
+    def _discard_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass  # e.g. ENOSPC on the final flush
+            self._file = None
+
+    # ---- writer thread --------------------------------------------------
+    def _format(self, timestamp):
+        second = int(timestamp)
+        if second != self._stamp_second:
+            self._stamp_second = second
+            self._stamp = time.ctime(second)
+        return self._stamp
+
+    def _write_batch(self, batch):
+        with self._write_lock:
+            lines = []
+            for timestamp, message in batch:
+                stamp = self._format(timestamp)
+                if isinstance(message, list):
+                    lines.extend(f"{stamp} - {m}\n" for m in message)
+                else:
+                    lines.append(f"{stamp} - {message}\n")
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a")
+                self._file.write("".join(lines))
+                self._file.flush()
+            except BaseException:
+                self._discard_file()  # reopen on the next batch
+                raise
+            self.written += len(lines)
+
+    def _write_safely(self, batch):
+        try:
+            self._write_batch(batch)
+        except Exception as exc:
+            self.errors += 1
+            self.last_error = exc
+
+    def _run(self):
+        get = self._queue.get
+        while True:
+            item = get()
+            batch = []
+            pending = 1
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending += 1
+            if batch:
+                self._write_safely(batch)
+            for _ in range(pending):
+                self._queue.task_done()
+            if item is _STOP:
+                return
+
+
+_loggers = {}
+_registry_lock = threading.Lock()
+
+
+def get_logger(path, **options):
+    """Return the shared logger for ``path``, creating it on first use."""
+    key = os.path.abspath(path)
+    logger = _loggers.get(key)
+    if logger is None or logger._closed:
+        with _registry_lock:
+            logger = _loggers.get(key)
+            if logger is None or logger._closed:
+                logger = AsyncLogger(key, **options)
+                _loggers[key] = logger
+    return logger
+
+
+def flush_all():
+    for logger in list(_loggers.values()):
+        logger.flush()
+
+
+def close_all():
+    with _registry_lock:
+        loggers = list(_loggers.values())
+        _loggers.clear()
+    for logger in loggers:
+        logger.close()
+
+
+atexit.register(close_all)
@@ -0,0 +1,80 @@
+# Auth logic shared by login_app, user_auth_app and buggy_login_app.
+#
+# The three apps used to carry their own copies of user lookup, session
+# creation, password storage and reset/delete logging. AuthCore holds that
+# logic once, over four pluggable parts:
+#
+#   users     a UserStore-like backend (add, find, set_password, delete,
+#             delete_users)
+#   sessions  a mapping of token -> session dict (SessionStore or a dict)
+#   log       a callable taking one message string
+#   hasher    a password_hashing.PasswordHasher, or None for plaintext
+#
+# The apps keep their globals and public functions. Each builds a core from
+# its current globals on every call (see their ``_core()`` helpers), so
+# rebinding or patching a global still takes effect, and a faster backend is
+# swapped in by assigning it to the global. Log wording stays per app via
+# ``messages``: event name -> str.format template.
+import random
+import time
+
+import password_hashing
+
+# Session token range used when an app does not pass its own
+DEFAULT_TOKEN_RANGE = (1000, 9999)
+
+
+class AuthCore:
+    def __init__(self, users, sessions, log, hasher=None,
+                 token_range=DEFAULT_TOKEN_RANGE, messages=None):
+        self.users = users
+        self.sessions = sessions
+        self.log = log
+        self.hasher = hasher
+        self.token_range = token_range
+        self.messages = messages or {}
+
+    def _event(self, event, **fields):
+        template = self.messages.get(event)
+        if template is not None:
+            self.log(template.format(**fields))
+
+    # ---- users ----------------------------------------------------------
+    def add_user(self, username, password):
+        record = self.users.add(username, password_hashing.store_password(password, self.hasher))
+        self._event("add", username=username, password=password)
+        return record
+
+    def verify(self, username, password):
+        # With a hasher, plaintext or outdated hashes are upgraded on match.
+        return self.users.find(username, password, self.hasher) is not None
+
+    def reset_password(self, username, new_password):
+        stored = password_hashing.store_password(new_password, self.hasher)
+        if not self.users.set_password(username, stored):
+            return False
+        self._event("reset", username=username, password=new_password)
+        return True
+
+    def delete_user(self, username):
+        removed = self.users.delete(username)
+        self._event("delete", username=username)
+        return removed
+
+    def delete_users(self, usernames):
+        usernames = list(usernames)
+        removed = self.users.delete_users(usernames)
+        self._event("delete_many", count=removed, usernames=", ".join(usernames))
+        return removed
+
+    # ---- sessions -------------------------------------------------------
+    def create_session(self, username):
+        token = str(random.randint(*self.token_range))
+        self.sessions[token] = {"username": username, "time": time.time()}
+        return token
+
+    def login(self, username, password):
+        """Return a new session token, or None if the credentials are wrong."""
+        if not self.verify(username, password):
+            return None
+        return self.create_session(username)
@@ -0,0 +1,80 @@
+# Load generator for the asyncio auth service.
+#
+#     python -m benchmarks.bench_async_auth [requests] [concurrency]
+#
+# Requests mix a few hot service accounts with a long tail of users and
+# some unknown usernames, and report throughput and latency percentiles.
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+import audit_log
+import buggy_login_app
+from async_auth import AsyncAuthService
+from benchmarks.common import print_table
+
+USERS = 10_000
+HOT_ACCOUNTS = 5
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+async def run_load(service, requests, concurrency):
+    rng = random.Random(0)
+    plan = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < 0.5:
+            i = rng.randrange(HOT_ACCOUNTS)
+        elif roll < 0.9:
+            i = rng.randrange(USERS)
+        else:
+            i = USERS + rng.randrange(USERS)  # unknown user
+        plan.append((f"user{i}", f"pw{i}"))
+    latencies = []
+    queue = iter(plan)
+
+    async def client():
+        for username, password in queue:
+            start = time.perf_counter()
+            await service.login(username, password)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    requests = int(argv[0]) if argv else 20_000
+    concurrency = int(argv[1]) if len(argv) > 1 else 1_000
+    with tempfile.TemporaryDirectory() as tmp:
+        buggy_login_app.DB_FILE = os.path.join(tmp, "users.db")
+        buggy_login_app.LOG_FILE = os.path.join(tmp, "app.log")
+        buggy_login_app.init_db()
+        buggy_login_app.bulk_add_users((f"user{i}", f"pw{i}") for i in range(USERS))
+
+        service = AsyncAuthService()
+        elapsed, latencies = asyncio.run(run_load(service, requests, concurrency))
+        service.close()
+        buggy_login_app.get_pool().close()
+        audit_log.close_all()  # before the temp dir goes
+
+    ms = lambda seconds: f"{seconds * 1000:.2f}"
+    print(f"{requests:,} logins, {concurrency:,} concurrent clients, "
+          f"{service.lookups:,} SQLite lookups ({service.coalesced:,} coalesced)")
+    print_table(("req/s", "p50 ms", "p95 ms", "p99 ms", "max ms"), [(
+        f"{requests / elapsed:,.0f}", ms(percentile(latencies, 50)), ms(percentile(latencies, 95)),
+        ms(percentile(latencies, 99)), ms(latencies[-1]),
+    )])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Credential stuffing: authenticate calls for unknown usernames, with the
+# users.db Bloom filter on and off.
+import os
+import tempfile
+import time
+
+import audit_log
+import buggy_login_app
+from benchmarks.common import format_rate, print_table
+
+USERS = 100_000
+ATTEMPTS = 50_000
+# Share of attempts that name a real account
+KNOWN_SHARE = 0.05
+
+
+def main():
+    known_every = round(1 / KNOWN_SHARE)
+    attempts = [
+        (f"user{i % USERS}" if i % known_every == 0 else f"stuffed{i}", "guess")
+        for i in range(ATTEMPTS)
+    ]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        buggy_login_app.DB_FILE = os.path.join(tmp, "users.db")
+        buggy_login_app.LOG_FILE = os.path.join(tmp, "app.log")
+        buggy_login_app.init_db()
+        buggy_login_app.bulk_add_users((f"user{i}", f"pw{i}") for i in range(USERS))
+        bloom = buggy_login_app._username_filter
+        for enabled in (False, True):
+            buggy_login_app.USERNAME_FILTER = enabled
+            buggy_login_app.get_user_cache().clear()
+            loads_before = buggy_login_app.user_cache_stats()["loads"]
+            start = time.perf_counter()
+            for username, password in attempts:
+                buggy_login_app.authenticate(username, password)
+            elapsed = time.perf_counter() - start
+            loads = buggy_login_app.user_cache_stats()["loads"] - loads_before
+            rows.append(("on" if enabled else "off", format_rate(ATTEMPTS, elapsed), f"{loads:,}"))
+        buggy_login_app.get_pool().close()
+        audit_log.close_all()  # before the temp dir goes
+    print_table(("filter", "attempts", "SQLite lookups"), rows)
+    print(f"filter: {bloom.size:,} counters, {bloom.hashes} hashes, {bloom.count:,} names")
+
+
+if __name__ == "__main__":
+    main()
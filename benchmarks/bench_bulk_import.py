@@ -0,0 +1,34 @@
+# Bulk import throughput versus one add_user_db call per row.
+import os
+import tempfile
+
+import audit_log
+import buggy_login_app
+from benchmarks.common import best_of, format_rate, print_table
+
+BULK_ROWS = 1_000_000
+SINGLE_ROWS = 2_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        buggy_login_app.DB_FILE = os.path.join(tmp, "users.db")
+        buggy_login_app.LOG_FILE = os.path.join(tmp, "app.log")
+        buggy_login_app.init_db()
+
+        single = best_of(
+            lambda: [buggy_login_app.add_user_db(f"s{i}", "pw") for i in range(SINGLE_ROWS)],
+            repeat=1,
+        )
+        stats = buggy_login_app.bulk_add_users((f"user{i}", f"pw{i}") for i in range(BULK_ROWS))
+        buggy_login_app.get_pool().close()
+        audit_log.close_all()  # before the temp dir goes
+
+    print_table(("path", "rows", "seconds", "rate"), [
+        ("add_user_db", f"{SINGLE_ROWS:,}", f"{single:.2f}", format_rate(SINGLE_ROWS, single)),
+        ("bulk_add_users", f"{stats.rows:,}", f"{stats.seconds:.2f}", format_rate(stats.rows, stats.seconds)),
+    ])
+
+
+if __name__ == "__main__":
+    main()
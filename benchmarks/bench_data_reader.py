@@ -0,0 +1,59 @@
+# Peak Python memory and throughput of the read_data modes.
+#
+#     python -m benchmarks.bench_data_reader [size_mb]
+#
+# Peak memory is measured with tracemalloc, so it covers Python objects
+# only; pages of the mmap mode are mapped by the OS and do not show up there
+# (they are shared page cache and can be dropped under pressure).
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import rabbit_test
+from benchmarks.common import print_table
+
+DEFAULT_SIZE_MB = 256
+
+
+def consume(mode, path):
+    if mode == "text":
+        return len(rabbit_test.read_data(path))
+    if mode == "mmap":
+        view = rabbit_test.read_data(path, mode="mmap")
+        total = view.nbytes
+        # Touch every page, as a real consumer would.
+        view[::4096].tobytes()
+        view.release()
+        return total
+    return sum(len(piece) for piece in rabbit_test.read_data(path, mode=mode))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    size_mb = int(argv[0]) if argv else DEFAULT_SIZE_MB
+    line = ("x" * 99) + "\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.txt")
+        with open(path, "w") as f:
+            block = line * 10_000
+            for _ in range(size_mb * (1 << 20) // len(block)):
+                f.write(block)
+        size = os.path.getsize(path)
+
+        rows = []
+        for mode in ("text", "chunks", "lines", "mmap"):
+            tracemalloc.start()
+            start = time.perf_counter()
+            consume(mode, path)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rows.append((mode, f"{peak / (1 << 20):,.1f}", f"{size / (1 << 20) / elapsed:,.0f}"))
+    print(f"file size: {size / (1 << 20):,.0f} MiB")
+    print_table(("mode", "peak MiB", "MiB/s"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Batch invoice totals: calculate_total per order vs the columnar paths.
+import random
+
+import buggy_login_app
+import invoicing
+from benchmarks.common import best_of, format_rate, print_table
+
+ORDERS = 200_000
+MAX_ITEMS = 10
+
+
+def main():
+    rng = random.Random(0)
+    orders = [
+        [{"price": rng.uniform(0.01, 500), "quantity": rng.randint(1, 20)}
+         for _ in range(rng.randint(1, MAX_ITEMS))]
+        for _ in range(ORDERS)
+    ]
+    discounts = [rng.choice([0, 5, 10, 15]) for _ in range(ORDERS)]
+    prices, quantities, offsets = invoicing.columns_from_orders(orders)
+    items = len(prices)
+
+    def per_order():
+        totals = [buggy_login_app.calculate_total(o) for o in orders]
+        return [buggy_login_app.apply_discount(t, d) for t, d in zip(totals, discounts)]
+
+    def columnar(use_numpy):
+        totals = invoicing.order_totals(prices, quantities, offsets, use_numpy=use_numpy)
+        return invoicing.apply_discounts(totals, discounts, use_numpy=use_numpy)
+
+    expected = per_order()
+    rows = [("calculate_total loop", best_of(per_order, repeat=3))]
+    assert list(columnar(False)) == expected
+    rows.append(("columnar, pure Python", best_of(lambda: columnar(False), repeat=3)))
+    if invoicing.np is not None:
+        # Columns already in NumPy form, as a batch job would hold them.
+        np = invoicing.np
+        prices, quantities = np.asarray(prices), np.asarray(quantities)
+        offsets, discounts = np.asarray(offsets), np.asarray(discounts, dtype=float)
+        assert list(columnar(True)) == expected
+        rows.append(("columnar, NumPy", best_of(lambda: columnar(True), repeat=3)))
+    else:
+        print("NumPy not installed; skipping the vectorized path")
+
+    print(f"{ORDERS:,} orders, {items:,} line items")
+    print_table(("path", "seconds", "items/sec"),
+                [(name, f"{secs:.3f}", format_rate(items, secs)) for name, secs in rows])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# Overhead of metrics.timed on a trivial function: plain call versus
+# instrumented with recording disabled and enabled.
+import metrics
+from benchmarks.common import best_of, print_table
+
+CALLS = 1_000_000
+
+
+def plain(x):
+    return x
+
+
+instrumented = metrics.timed("bench")(plain)
+
+
+def main():
+    rows = []
+    for label, func, enabled in [
+        ("plain", plain, False),
+        ("timed, disabled", instrumented, False),
+        ("timed, enabled", instrumented, True),
+    ]:
+        (metrics.enable if enabled else metrics.disable)()
+
+        def run():
+            for i in range(CALLS):
+                func(i)
+
+        rows.append((label, f"{best_of(run, repeat=3) / CALLS * 1e9:,.0f}"))
+    metrics.disable()
+    print_table(("call", "ns/call"), rows)
+
+
+if __name__ == "__main__":
+    main()
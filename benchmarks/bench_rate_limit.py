@@ -0,0 +1,48 @@
+# Rate limiter cost per login attempt, and its memory, as an attacker
+# cycles through a million distinct usernames.
+import time
+import tracemalloc
+
+from benchmarks.common import format_rate, print_table
+from rate_limit import LoginGuard
+
+KEYS = 1_000_000
+SOURCE = "203.0.113.7"
+
+
+def _fill(guard, keys):
+    for key in keys:
+        guard.failed(key, SOURCE)
+
+
+def main():
+    keys = [f"user{i}" for i in range(KEYS)]
+    guard = LoginGuard()
+    start = time.perf_counter()
+    for key in keys:
+        guard.check(key, SOURCE)
+    checked = time.perf_counter() - start
+    start = time.perf_counter()
+    _fill(guard, keys)
+    added = time.perf_counter() - start
+    print_table(
+        ("operation", "rate", "ns/op"),
+        [
+            ("check", format_rate(KEYS, checked), f"{checked / KEYS * 1e9:,.0f}"),
+            ("failed", format_rate(KEYS, added), f"{added / KEYS * 1e9:,.0f}"),
+        ],
+    )
+    stats = guard.stats()["users"]
+    print(f"exact keys: {stats['exact_keys']:,} of {KEYS:,}, sketch: {stats['sketch']}")
+
+    # Memory is measured on a second run, as tracemalloc skews the timings
+    del guard
+    tracemalloc.start()
+    guard = LoginGuard()
+    _fill(guard, keys)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory: {current / 2**20:.1f} MiB held, {peak / 2**20:.1f} MiB peak")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Session churn: N logins against a capped store with short TTLs.
+#
+#     python -m benchmarks.bench_session_store [N]
+import sys
+import time
+
+from benchmarks.common import format_rate, print_table
+from session_store import SessionStore
+
+DEFAULT_OPS = 10_000_000
+MAX_SIZE = 100_000
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    ops = int(argv[0]) if argv else DEFAULT_OPS
+
+    # A simulated clock advancing 10us per login. Odd sessions live 0.2s
+    # and expire; even ones live 5s and pile up until the cap evicts them.
+    fake_now = [0.0]
+    store = SessionStore(ttl=0.2, max_size=MAX_SIZE, clock=lambda: fake_now[0])
+    peak = 0
+    start = time.perf_counter()
+    for i in range(ops):
+        fake_now[0] += 0.00001
+        store.set(i, {"username": "user", "time": 0.0}, ttl=None if i & 1 else 5.0)
+        if i & 7 == 0:
+            store.get(i - 5)
+        if i % 100_000 == 0:
+            peak = max(peak, len(store))
+    elapsed = time.perf_counter() - start
+
+    stats = store.stats()
+    print_table(("ops", "seconds", "rate", "peak size", "final size", "evictions", "expirations", "hit rate"), [(
+        f"{ops:,}", f"{elapsed:.1f}", format_rate(ops, elapsed), f"{peak:,}", f"{stats['size']:,}",
+        f"{stats['evictions']:,}", f"{stats['expirations']:,}", f"{stats['hit_rate']:.2f}",
+    )])
+
+
+if __name__ == "__main__":
+    main()
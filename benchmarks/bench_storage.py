@@ -0,0 +1,48 @@
+# get/put/delete throughput of the storage backends in storage.py.
+#
+# Each backend gets the same workload: put N users, get them all in random
+# order, overwrite them all, then delete them all.
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import format_rate, print_table
+import storage
+
+USERS = 20_000
+
+
+def run(store, usernames):
+    rates = []
+    for label, op in [
+        ("put", lambda u: store.put(u, "pw")),
+        ("get", store.get),
+        ("update", lambda u: store.put(u, "new")),
+        ("delete", store.delete),
+    ]:
+        order = usernames if label == "put" else random.sample(usernames, len(usernames))
+        start = time.perf_counter()
+        for username in order:
+            op(username)
+        rates.append(format_rate(len(order), time.perf_counter() - start))
+    return rates
+
+
+def main():
+    usernames = [f"user{i}" for i in range(USERS)]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        configs = [
+            {"backend": "memory"},
+            {"backend": "sqlite", "path": os.path.join(tmp, "users.db")},
+            {"backend": "log", "path": os.path.join(tmp, "users.log")},
+        ]
+        for config in configs:
+            with storage.from_config(config) as store:
+                rows.append((config["backend"], *run(store, usernames)))
+    print_table(("backend", "put", "get", "update", "delete"), rows)
+
+
+if __name__ == "__main__":
+    main()
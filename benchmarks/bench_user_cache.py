@@ -0,0 +1,52 @@
+# authenticate throughput with and without the get_user_db cache.
+#
+# Logins are skewed like production traffic: a few service accounts make
+# most of them, the rest are spread over the whole table.
+import os
+import random
+import tempfile
+import time
+
+import audit_log
+import buggy_login_app
+from benchmarks.common import format_rate, print_table
+
+USERS = 100_000
+LOGINS = 50_000
+HOT_ACCOUNTS = 20
+HOT_SHARE = 0.9
+CACHE_SIZES = [0, 100, 10_000]
+
+
+def workload():
+    rng = random.Random(0)
+    picks = []
+    for _ in range(LOGINS):
+        i = rng.randrange(HOT_ACCOUNTS) if rng.random() < HOT_SHARE else rng.randrange(USERS)
+        picks.append((f"user{i}", f"pw{i}"))
+    return picks
+
+
+def main():
+    picks = workload()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        buggy_login_app.DB_FILE = os.path.join(tmp, "users.db")
+        buggy_login_app.LOG_FILE = os.path.join(tmp, "app.log")
+        buggy_login_app.init_db()
+        buggy_login_app.bulk_add_users((f"user{i}", f"pw{i}") for i in range(USERS))
+        for size in CACHE_SIZES:
+            buggy_login_app.USER_CACHE_SIZE = size
+            start = time.perf_counter()
+            for username, password in picks:
+                buggy_login_app.authenticate(username, password)
+            elapsed = time.perf_counter() - start
+            hit_rate = f"{buggy_login_app.user_cache_stats()['hit_rate']:.1%}" if size else "-"
+            rows.append((f"{size:,}", format_rate(LOGINS, elapsed), hit_rate))
+        buggy_login_app.get_pool().close()
+        audit_log.close_all()  # before the temp dir goes
+    print_table(("cache size", "logins", "hit rate"), rows)
+
+
+if __name__ == "__main__":
+    main()
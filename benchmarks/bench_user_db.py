@@ -0,0 +1,62 @@
+# get_user_db latency as users.db grows, before and after the migrations.
+#
+#     python -m benchmarks.bench_user_db
+#
+# "v1" is the original schema (no username index, so every lookup scans
+# the table); "latest" has the unique username index.
+import os
+import random
+import tempfile
+
+import buggy_login_app
+import migrations
+from benchmarks.common import best_of, print_table
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 2_000
+# Full scans are only timed on a few probes
+SCAN_LOOKUPS = 20
+
+
+def fill(size):
+    with buggy_login_app.get_pool().transaction() as conn:
+        conn.executemany(
+            "INSERT INTO users (username, password) VALUES (?, ?)",
+            ((f"user{i}", f"pw{i}") for i in range(size)),
+        )
+
+
+def time_lookups(size, count):
+    probes = [f"user{random.randrange(size)}" for _ in range(count)]
+
+    def run():
+        for username in probes:
+            buggy_login_app.get_user_db(username)
+
+    return best_of(run, repeat=3) / count * 1e6
+
+
+def main():
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            buggy_login_app.DB_FILE = os.path.join(tmp, f"users-{size}.db")
+            migrations.migrate(buggy_login_app.get_pool(), target=1)
+            fill(size)
+            # The v1 column layout has no password_hash; read it directly.
+            pool = buggy_login_app.get_pool()
+            probes = [f"user{random.randrange(size)}" for _ in range(SCAN_LOOKUPS)]
+
+            def scan():
+                for username in probes:
+                    pool.fetchone("SELECT * FROM users WHERE username=?", (username,))
+
+            scan_us = best_of(scan, repeat=3) / SCAN_LOOKUPS * 1e6
+            migrations.migrate(pool)
+            rows.append((f"{size:,}", f"{scan_us:,.1f}", f"{time_lookups(size, LOOKUPS):,.1f}"))
+        buggy_login_app.get_pool().close()
+    print_table(("rows", "v1 us/lookup", "latest us/lookup"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Bulk deprovisioning: delete 100k users from a 1M-user store.
+#
+# Compares UserStore tombstone deletes (one by one and through delete_users)
+# with the old rebuild-the-list comprehension, which is timed on a few
+# deletes and extrapolated because the full run is quadratic.
+import random
+import time
+
+from benchmarks.common import format_rate, print_table
+from user_store import UserStore
+
+USERS = 1_000_000
+DELETES = 100_000
+REBUILD_SAMPLE = 5
+
+
+def make_records():
+    return [{"username": f"user{i}", "password": f"pw{i}"} for i in range(USERS)]
+
+
+def main():
+    victims = [f"user{i}" for i in random.sample(range(USERS), DELETES)]
+    rows = []
+
+    store = UserStore(make_records())
+    start = time.perf_counter()
+    for username in victims:
+        store.delete(username)
+    elapsed = time.perf_counter() - start
+    assert len(store) == USERS - DELETES
+    rows.append(("delete() each", f"{elapsed:.3f}", format_rate(DELETES, elapsed)))
+
+    store = UserStore(make_records())
+    start = time.perf_counter()
+    store.delete_users(victims)
+    elapsed = time.perf_counter() - start
+    assert len(store) == USERS - DELETES
+    rows.append(("delete_users()", f"{elapsed:.3f}", format_rate(DELETES, elapsed)))
+
+    users = make_records()
+    start = time.perf_counter()
+    for username in victims[:REBUILD_SAMPLE]:
+        users = [user for user in users if user["username"] != username]
+    per_delete = (time.perf_counter() - start) / REBUILD_SAMPLE
+    rows.append(("list rebuild (est.)", f"{per_delete * DELETES:.0f}", format_rate(1, per_delete)))
+
+    print_table(("method", f"seconds for {DELETES:,}", "deletes"), rows)
+
+
+if __name__ == "__main__":
+    main()
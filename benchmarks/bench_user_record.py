@@ -0,0 +1,41 @@
+# Memory per user for each in-memory record layout, measured with
+# tracemalloc, plus the cost of a find() in each.
+import random
+import tracemalloc
+
+from benchmarks.common import best_of, print_table
+from user_record import store_for
+
+USERS = 1_000_000
+LOOKUPS = 10_000
+LAYOUTS = ("dict", "slots", "columnar")
+
+
+def _records():
+    # A PBKDF2-sized hash, as stored once PASSWORD_HASHER is set
+    for i in range(USERS):
+        yield {"username": f"user{i}", "password": f"pbkdf2_sha256$600000${i:032x}${i:064x}"}
+
+
+def main():
+    picks = [random.randrange(USERS) for _ in range(LOOKUPS)]
+    rows = []
+    for layout in LAYOUTS:
+        tracemalloc.start()
+        store = store_for(layout, _records())
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        probes = [(store[i]["username"], store[i]["password"]) for i in picks]
+
+        def lookups():
+            for username, password in probes:
+                store.find(username, password)
+
+        find_ns = best_of(lookups) / LOOKUPS * 1e9
+        rows.append((layout, f"{held / USERS:,.0f}", f"{held / 2**20:,.0f}", f"{find_ns:,.0f}"))
+        del store
+    print_table(("layout", "bytes/user", "MiB total", "ns/find"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Lookup cost of UserStore versus the old linear scan, from 10 to 1M users.
+import random
+
+from benchmarks.common import best_of, print_table
+from user_store import UserStore
+
+SIZES = [10, 1_000, 100_000, 1_000_000]
+LOOKUPS = 10_000
+# The linear scan is only timed while it finishes in reasonable time.
+SCAN_LIMIT = 100_000
+
+
+def linear_find(users, username, password):
+    for user in users:
+        if user["username"] == username and user["password"] == password:
+            return user
+    return None
+
+
+def main():
+    rows = []
+    for size in SIZES:
+        records = [{"username": f"user{i}", "password": f"pw{i}"} for i in range(size)]
+        store = UserStore(records)
+        picks = [random.randrange(size) for _ in range(LOOKUPS)]
+        probes = [(f"user{i}", f"pw{i}") for i in picks]
+
+        def indexed():
+            for username, password in probes:
+                store.find(username, password)
+
+        indexed_ns = best_of(indexed) / LOOKUPS * 1e9
+        if size <= SCAN_LIMIT:
+            scan_probes = probes[:100]
+
+            def scanned():
+                for username, password in scan_probes:
+                    linear_find(records, username, password)
+
+            scan_ns = f"{best_of(scanned, repeat=1) / len(scan_probes) * 1e9:,.0f}"
+        else:
+            scan_ns = "-"
+        rows.append((f"{size:,}", f"{indexed_ns:,.0f}", scan_ns))
+    print_table(("users", "indexed ns/lookup", "scan ns/lookup"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Small timing helpers shared by the benchmark scripts.
+#
+# Run any benchmark from the repository root, e.g.
+#     python -m benchmarks.bench_user_store
+import time
+
+
+def best_of(func, repeat=5, number=1):
+    """Return the fastest wall-clock time, in seconds, of ``number`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_rate(count, seconds):
+    if seconds <= 0:
+        return "inf/s"
+    return f"{count / seconds:,.0f}/s"
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    line = "  ".join(f"{{:>{width}}}" for width in widths)
+    print(line.format(*headers))
+    for row in rows:
+        print(line.format(*row))
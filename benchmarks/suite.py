@@ -0,0 +1,302 @@
+# Benchmark suite for the authentication hot paths.
+#
+#     python -m benchmarks.suite [--quick] [--json results.json]
+#                                [--baseline baseline.json] [--threshold 0.25]
+#                                [--save-baseline baseline.json] [--only login]
+#
+# Every case is timed at each of its data sizes. Results are printed as a
+# table and, with --json, written as machine-readable JSON. With
+# --baseline, each case/size is compared to the stored result and any that
+# got slower by more than --threshold (a fraction) is flagged; the exit
+# status is then 1. Cases run inside a temporary directory so log, config
+# and database files never touch the working tree, and app globals are
+# restored afterwards.
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import audit_log
+import buggy_login_app
+import config_cache
+import login_app
+import rabbit_test
+import user_auth_app
+from benchmarks.common import print_table
+from session_store import SessionStore
+from user_store import UserStore
+
+REPEAT = 5
+OPS = 2_000
+QUICK_SIZES = 1
+DEFAULT_THRESHOLD = 0.25
+
+CASES = []
+
+
+def case(name, sizes, ops=OPS):
+    """Register ``setup(size, ops)``; it returns the function to time."""
+    def register(setup):
+        CASES.append({"name": name, "sizes": sizes, "ops": ops, "setup": setup})
+        return setup
+    return register
+
+
+@contextlib.contextmanager
+def patched(module, **values):
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def make_users(size):
+    return UserStore({"username": f"user{i}", "password": f"pw{i}"} for i in range(size))
+
+
+def picks(size, ops):
+    rng = random.Random(size)
+    return [rng.randrange(size) for _ in range(ops)]
+
+
+# ---- login / authenticate ------------------------------------------------
+@case("login_app.login", [100, 10_000, 100_000])
+def _(size, ops):
+    login_app.USERS, login_app.SESSIONS = make_users(size), SessionStore()
+    probes = picks(size, ops)
+    return lambda: [login_app.login(f"user{i}", f"pw{i}") for i in probes]
+
+
+@case("user_auth_app.login", [100, 10_000, 100_000])
+def _(size, ops):
+    user_auth_app.users_db, user_auth_app.sessions = make_users(size), SessionStore()
+    probes = picks(size, ops)
+    return lambda: [user_auth_app.login(f"user{i}", f"pw{i}") for i in probes]
+
+
+@case("rabbit_test.login", [1])
+def _(size, ops):
+    rabbit_test.sessions = SessionStore()
+    return lambda: [rabbit_test.login("admin", "1234") for _ in range(ops)]
+
+
+def fill_db(size):
+    buggy_login_app.DB_FILE = f"users-{size}.db"
+    buggy_login_app.init_db()
+    if buggy_login_app.get_pool().fetchone("SELECT COUNT(*) FROM users")[0] < size:
+        with buggy_login_app.get_pool().transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (username, password) VALUES (?, ?)",
+                ((f"user{i}", f"pw{i}") for i in range(size)),
+            )
+        buggy_login_app.rebuild_username_filter()
+
+
+@case("buggy_login_app.authenticate", [100, 10_000, 100_000])
+def _(size, ops):
+    fill_db(size)
+    probes = picks(size, ops)
+    return lambda: [buggy_login_app.authenticate(f"user{i}", f"pw{i}") for i in probes]
+
+
+@case("buggy_login_app.get_user_db", [100, 10_000, 100_000])
+def _(size, ops):
+    fill_db(size)
+    probes = picks(size, ops)
+    return lambda: [buggy_login_app.get_user_db(f"user{i}") for i in probes]
+
+
+_new_users = itertools.count()
+
+
+@case("buggy_login_app.add_user_db", [0, 100_000], ops=500)
+def _(size, ops):
+    fill_db(size)
+    names = [f"new{next(_new_users)}" for _ in range(ops)]  # usernames are unique
+    return lambda: [buggy_login_app.add_user_db(name, "pw") for name in names]
+
+
+# ---- user maintenance ----------------------------------------------------
+@case("login_app.reset_password", [100, 10_000, 100_000])
+def _(size, ops):
+    login_app.USERS = make_users(size)
+    probes = picks(size, ops)
+    return lambda: [login_app.reset_password(f"user{i}", "new") for i in probes]
+
+
+@case("user_auth_app.delete_user", [10_000, 100_000])
+def _(size, ops):
+    user_auth_app.users_db = make_users(size)
+    victims = random.Random(size).sample(range(size), min(ops, size))
+    return lambda: [user_auth_app.delete_user(f"user{i}") for i in victims]
+
+
+# ---- logging and config --------------------------------------------------
+def timed_logging(write, ops):
+    def run():
+        for i in range(ops):
+            write(f"event {i} for user{i}")
+        audit_log.flush_all()
+    return run
+
+
+@case("login_app.log", [1], ops=10_000)
+def _(size, ops):
+    return timed_logging(login_app.log, ops)
+
+
+@case("user_auth_app.log_event", [1], ops=10_000)
+def _(size, ops):
+    return timed_logging(user_auth_app.log_event, ops)
+
+
+@case("login_app.read_config", [10, 10_000])
+def _(size, ops):
+    name = f"config-{size}.json"
+    with open(name, "w") as f:
+        json.dump({f"key{i}": i for i in range(size)}, f)
+    config_cache.invalidate(name)
+    return lambda: [login_app.read_config(name) for _ in range(ops)]
+
+
+# ---- business logic and file reads ---------------------------------------
+@case("buggy_login_app.calculate_total", [10, 1_000, 100_000], ops=20)
+def _(size, ops):
+    items = [{"price": i % 97 + 0.5, "quantity": i % 5 + 1} for i in range(size)]
+    return lambda: [buggy_login_app.calculate_total(items) for _ in range(ops)]
+
+
+def data_file(size):
+    name = f"data-{size}.txt"
+    if not os.path.exists(name):
+        with open(name, "w") as f:
+            f.write(("x" * 79 + "\n") * (size // 80))
+    return name
+
+
+@case("rabbit_test.read_data[text]", [10_000, 10_000_000], ops=10)
+def _(size, ops):
+    name = data_file(size)
+    return lambda: [rabbit_test.read_data(name) for _ in range(ops)]
+
+
+@case("rabbit_test.read_data[lines]", [10_000, 10_000_000], ops=10)
+def _(size, ops):
+    name = data_file(size)
+    return lambda: [sum(1 for _ in rabbit_test.read_data(name, mode="lines")) for _ in range(ops)]
+
+
+# ---- runner --------------------------------------------------------------
+def run_case(entry, size):
+    best = float("inf")
+    for _ in range(REPEAT):
+        func = entry["setup"](size, entry["ops"])
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return {
+        "name": entry["name"],
+        "size": size,
+        "ops": entry["ops"],
+        "seconds": best,
+        "ns_per_op": best / entry["ops"] * 1e9,
+    }
+
+
+def run_suite(only=None, quick=False):
+    results = []
+    saved = [
+        (login_app, ("USERS", "SESSIONS")),
+        (user_auth_app, ("users_db", "sessions")),
+        (rabbit_test, ("sessions",)),
+        (buggy_login_app, ("DB_FILE", "_pool")),
+    ]
+    cwd = os.getcwd()
+    with contextlib.ExitStack() as stack:
+        for module, names in saved:
+            stack.enter_context(patched(module, **{n: getattr(module, n) for n in names}))
+        tmp = stack.enter_context(tempfile.TemporaryDirectory())
+        os.chdir(tmp)
+        stack.callback(os.chdir, cwd)
+        stack.callback(audit_log.close_all)
+        stack.callback(lambda: buggy_login_app._pool and buggy_login_app._pool.close())
+        stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        for entry in CASES:
+            if only and only not in entry["name"]:
+                continue
+            sizes = entry["sizes"][:QUICK_SIZES] if quick else entry["sizes"]
+            for size in sizes:
+                results.append(run_case(entry, size))
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Annotate results with their ratio to the baseline; return regressions."""
+    previous = {(r["name"], r["size"]): r["ns_per_op"] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        result["baseline_ns_per_op"] = before
+        result["ratio"] = result["ns_per_op"] / before
+        if result["ratio"] > 1 + threshold:
+            regressions.append(result)
+    return regressions
+
+
+def report(results):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    parser.add_argument("--quick", action="store_true", help="smallest size of each case only")
+    parser.add_argument("--only", help="run cases whose name contains this text")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = run_suite(args.only, args.quick)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    rows = []
+    for r in results:
+        ratio = f"{r['ratio']:.2f}x" if "ratio" in r else "-"
+        flag = "REGRESSION" if r in regressions else ""
+        rows.append((r["name"], f"{r['size']:,}", f"{r['ns_per_op']:,.0f}", ratio, flag))
+    print_table(("case", "size", "ns/op", "vs baseline", ""), rows)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report(results), f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
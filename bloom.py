@@ -0,0 +1,86 @@
+# Counting Bloom filter for "is this username known at all?".
+#
+# Credential-stuffing traffic is mostly logins for usernames that do not
+# exist. A Bloom filter over the known usernames answers "definitely not"
+# for almost all of them from memory, so the lookup never reaches SQLite.
+# It never says "no" for a name that was added (no false negatives); it
+# may say "maybe" for an unknown name at roughly ``error_rate``.
+#
+# Each slot is a one-byte counter rather than a bit, so names can be
+# removed again when users are deleted. A counter that reaches 255 sticks
+# there, which can only cost extra "maybe" answers, never a false "no".
+import hashlib
+import math
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.01
+_SATURATED = 255
+
+
+class CountingBloomFilter:
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._counters = bytearray(self.size)
+        self.count = 0
+
+    @classmethod
+    def from_items(cls, items, capacity=None, error_rate=DEFAULT_ERROR_RATE):
+        """Build a filter holding ``items``, sized for at least twice as many."""
+        items = list(items)
+        capacity = capacity or max(DEFAULT_CAPACITY, 2 * len(items))
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, item):
+        counters = self._counters
+        for position in self._positions(item):
+            if counters[position] < _SATURATED:
+                counters[position] += 1
+        self.count += 1
+
+    def remove(self, item):
+        """Forget one earlier add() of ``item``; a no-op if it is absent."""
+        positions = self._positions(item)
+        counters = self._counters
+        if not all(counters[p] for p in positions):
+            return False
+        for position in positions:
+            if counters[position] < _SATURATED:
+                counters[position] -= 1
+        self.count -= 1
+        return True
+
+    def __contains__(self, item):
+        counters = self._counters
+        return all(counters[p] for p in self._positions(item))
+
+    @property
+    def full(self):
+        """True once more items were added than the filter was sized for."""
+        return self.count > self.capacity
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "capacity": self.capacity,
+            "size": self.size,
+            "hashes": self.hashes,
+            "fill": 1 - self._counters.count(0) / self.size,
+        }
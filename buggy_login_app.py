@@ -1,53 +1,285 @@
 import os
-import json
-import random
+import sys
+import threading
 import time
 import hashlib
-import sqlite3
+
+import audit_log
+import bulk_import
+import cli
+import compute
+import config_writer
+import metrics
+import migrations
+import rate_limit
+import password_hashing
+import invoicing
+from auth_core import AuthCore
+from bloom import CountingBloomFilter
+from db_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from read_cache import ReadThroughCache
+from session_store import SessionStore
+from user_store import UserStore
 
 # ===========================
 # GLOBAL STATE (Bad Practice)
 # ===========================
-USERS = [
+USERS = UserStore([
     {"username": "admin", "password": "admin123"},
     {"username": "guest", "password": "guest"}
-]
+])
 
-SESSIONS = {}
+SESSIONS = SessionStore()
 
 LOG_FILE = "app.log"
 
+# Default page size for list_users_page / list_users_db_page
+PAGE_SIZE = 50
+
+DB_FILE = "users.db"
+POOL_SIZE = DEFAULT_POOL_SIZE
+_pool = None
+
+# Read-through cache for get_user_db (see read_cache.py). A size of 0
+# turns it off; a TTL of None keeps rows until evicted or invalidated.
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 30.0
+_user_cache = None
+_user_cache_key = None
+
+# Bloom filter of the usernames in users.db (see bloom.py), built by
+# init_db(), so lookups for unknown names skip SQLite. It is rebuilt once
+# it is USERNAME_FILTER_TTL seconds old (None: only by init_db() or
+# rebuild_username_filter()), so users added by another process, such as
+# the bulk_import CLI, are rejected for at most that long. Deleted names
+# are only removed if add_user_db() put them in since the last rebuild;
+# others stay as harmless false positives until USERNAME_FILTER_STALE of
+# them (or a tenth of the filter) force a rebuild.
+USERNAME_FILTER = True
+USERNAME_FILTER_TTL = USER_CACHE_TTL
+USERNAME_FILTER_STALE = 1000
+_username_filter = None
+_username_filter_pool = None
+_username_filter_built = 0.0
+_username_filter_added = set()
+_username_filter_stale = 0
+_username_filter_lock = threading.RLock()
+
+# Set to a password_hashing.PasswordHasher to store salted KDF hashes;
+# existing plaintext rows are then rehashed on their next login.
+PASSWORD_HASHER = None
+
+# Failed-login throttling per username and source (see rate_limit.py)
+LOGIN_GUARD = rate_limit.LoginGuard()
+
+# How write_config writes: "atomic" (temp file + rename), "coalesce" (one
+# write per burst of saves) or "journal" (changed keys appended to a
+# journal); see config_writer.py
+CONFIG_WRITE_MODE = "atomic"
+
 # ===========================
 # LOGGER (Bad: Logs passwords)
 # ===========================
+@metrics.timed()
 def log(message):
-    with open(LOG_FILE, "a") as f:
-        f.write(f"{time.ctime()} - {message}\n")
+    audit_log.get_logger(LOG_FILE).write(message)
 
 # ===========================
 # DATABASE FUNCTIONS
 # ===========================
+# Shared connection pool, rebuilt if DB_FILE or POOL_SIZE change
+def get_pool():
+    global _pool
+    if _pool is None or _pool.database != DB_FILE or _pool.size != POOL_SIZE:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(DB_FILE, size=POOL_SIZE)
+    return _pool
+
+# Cache of users.db rows by username, rebuilt with the pool or its settings
+def get_user_cache():
+    global _user_cache, _user_cache_key
+    key = (get_pool(), USER_CACHE_SIZE, USER_CACHE_TTL)
+    if _user_cache is None or _user_cache_key[0] is not key[0] or _user_cache_key[1:] != key[1:]:
+        _user_cache = ReadThroughCache(_fetch_user_db, USER_CACHE_SIZE, USER_CACHE_TTL)
+        _user_cache_key = key
+    return _user_cache
+
+def user_cache_stats():
+    return get_user_cache().stats()
+
+def _invalidate_user(username):
+    if _user_cache is not None:
+        _user_cache.invalidate(username)
+
+def _clear_user_cache():
+    if _user_cache is not None:
+        _user_cache.clear()
+
+def rebuild_username_filter():
+    global _username_filter, _username_filter_pool, _username_filter_built, _username_filter_stale
+    pool = get_pool()
+    with _username_filter_lock:
+        with pool.connection() as conn:
+            usernames = (row[0] for row in conn.execute("SELECT username FROM users"))
+            _username_filter = CountingBloomFilter.from_items(usernames)
+        _username_filter_pool = pool
+        _username_filter_built = time.monotonic()
+        _username_filter_added.clear()
+        _username_filter_stale = 0
+        return _username_filter
+
+def _username_filter_expired():
+    return (USERNAME_FILTER_TTL is not None
+            and time.monotonic() - _username_filter_built >= USERNAME_FILTER_TTL)
+
+# The filter only counts for the pool it was built from. An expired one is
+# rebuilt by whichever thread gets there first; the others skip the filter
+# meanwhile rather than wait.
+def _active_username_filter():
+    if not USERNAME_FILTER or _username_filter_pool is not get_pool():
+        return None
+    if _username_filter_expired():
+        if not _username_filter_lock.acquire(blocking=False):
+            return None
+        try:
+            if _username_filter_expired():
+                rebuild_username_filter()
+        finally:
+            _username_filter_lock.release()
+    return _username_filter
+
+def _filter_add(username):
+    with _username_filter_lock:  # not lost to a rebuild that scanned before the insert
+        bloom = _active_username_filter()
+        if bloom is not None:
+            bloom.add(username)
+            _username_filter_added.add(username)
+            if bloom.full:
+                rebuild_username_filter()  # resize before false positives climb
+
+# Removing a name the filter never counted would take it below zero for
+# some other name, so only names from _filter_add are removed.
+def _filter_remove(username):
+    global _username_filter_stale
+    with _username_filter_lock:
+        bloom = _active_username_filter()
+        if bloom is None:
+            return
+        if username in _username_filter_added:
+            _username_filter_added.discard(username)
+            bloom.remove(username)
+            return
+        _username_filter_stale += 1
+        if _username_filter_stale >= max(USERNAME_FILTER_STALE, bloom.count // 10):
+            rebuild_username_filter()
+
+def _noting_usernames(records, bloom):
+    for record in records:
+        bloom.add(record["username"] if isinstance(record, dict) else record[0])
+        yield record
+
+# Create or upgrade the schema (see migrations.py)
 def init_db():
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT, password TEXT)")
-    conn.commit()
-    conn.close()
+    migrations.migrate(get_pool())
+    _clear_user_cache()  # migrations may remove rows
+    if USERNAME_FILTER:
+        rebuild_username_filter()
+
+# KDF hashes go in password_hash, legacy plaintext in password
+def _password_columns(stored_password):
+    if password_hashing.is_encoded(stored_password):
+        return None, stored_password
+    return stored_password, None
 
+# Raises sqlite3.IntegrityError if the username is taken
 def add_user_db(username, password):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-    conn.commit()
-    conn.close()
+    stored = password_hashing.store_password(password, PASSWORD_HASHER)
+    try:
+        get_pool().execute("INSERT INTO users (username, password, password_hash) VALUES (?, ?, ?)",
+                           (username, *_password_columns(stored)))
+    finally:
+        _invalidate_user(username)  # drop a cached "no such user"
+    _filter_add(username)
+
+def update_password_db(user_id, stored_password):
+    row = get_pool().fetchone("SELECT username FROM users WHERE id=?", (user_id,))
+    get_pool().execute("UPDATE users SET password=?, password_hash=? WHERE id=?",
+                       (*_password_columns(stored_password), user_id))
+    if row is not None:
+        _invalidate_user(row[0])
 
+def reset_password_db(username, new_password):
+    stored = password_hashing.store_password(new_password, PASSWORD_HASHER)
+    changed = get_pool().execute("UPDATE users SET password=?, password_hash=? WHERE username=?",
+                                 (*_password_columns(stored), username))
+    _invalidate_user(username)
+    return changed > 0
+
+def delete_user_db(username):
+    removed = get_pool().execute("DELETE FROM users WHERE username=?", (username,))
+    _invalidate_user(username)
+    if removed:
+        _filter_remove(username)
+    return removed > 0
+
+def _fetch_user_db(username):
+    return get_pool().fetchone(
+        "SELECT id, username, COALESCE(password_hash, password) FROM users WHERE username=?", (username,)
+    )
+
+# Returns (id, username, stored password); unknown names are rejected by the
+# Bloom filter and hot accounts come from the cache
+@metrics.timed()
 def get_user_db(username):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username=?", (username,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    bloom = _active_username_filter()
+    if bloom is not None and username not in bloom:
+        return None
+    if not USER_CACHE_SIZE:
+        return _fetch_user_db(username)
+    return get_user_cache().get(username)
+
+def bulk_add_users(records, batch_size=bulk_import.DEFAULT_BATCH_SIZE):
+    bloom = _active_username_filter()
+    if bloom is not None:
+        records = _noting_usernames(records, bloom)  # extra names on rollback are harmless
+    try:
+        return bulk_import.bulk_add_users(records, get_pool(), batch_size, log_file=LOG_FILE,
+                                          hasher=PASSWORD_HASHER)
+    finally:
+        _clear_user_cache()
+        # a rebuild while importing may have scanned before some batches committed
+        if bloom is not None and (bloom.full or bloom is not _username_filter):
+            rebuild_username_filter()
+
+# Keyset pagination over users.db: the cursor is the (username, id) of the
+# last row returned, so each page is a range scan rather than an OFFSET.
+def list_users_db_page(cursor=None, limit=PAGE_SIZE, prefix=""):
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    sql = "SELECT id, username FROM users WHERE username >= ?"
+    params = [prefix]
+    if prefix:
+        sql += " AND username < ?"
+        params.append(prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    if cursor is not None:
+        sql += " AND (username, id) > (?, ?)"
+        params.extend(cursor)
+    sql += " ORDER BY username, id LIMIT ?"
+    params.append(limit + 1)
+    rows = get_pool().fetchall(sql, params)
+    if len(rows) <= limit:
+        return [row[1] for row in rows], None
+    rows = rows[:limit]
+    return [row[1] for row in rows], (rows[-1][1], rows[-1][0])
+
+def iter_users_db(prefix="", page_size=1000):
+    cursor = None
+    while True:
+        usernames, cursor = list_users_db_page(cursor, page_size, prefix)
+        yield from usernames
+        if cursor is None:
+            return
 
 # ===========================
 # SECURITY (Weak & Bad)
@@ -55,57 +287,87 @@ def get_user_db(username):
 def hash_password(password):
     return hashlib.md5(password.encode()).hexdigest()  # Weak
 
-def authenticate(username, password):
-    # Hardcoded credentials
-    if username == "superuser" and password == "superpass":
-        return True
-    user = get_user_db(username)
+# Hardcoded credentials
+def is_hardcoded_login(username, password):
+    return username == "superuser" and password == "superpass"
+
+# Check a users.db row against a password
+def password_matches(user, password):
     if user and user[2] == password:  # plain text check (bad)
         return True
     return False
 
+@metrics.timed()
+def authenticate(username, password):
+    if is_hardcoded_login(username, password):
+        return True
+    user = get_user_db(username)
+    if PASSWORD_HASHER is None or not user:
+        return password_matches(user, password)
+    ok, upgraded = password_hashing.check_and_migrate(user[2], password, PASSWORD_HASHER)
+    if upgraded is not None:
+        update_password_db(user[0], upgraded)  # lazy rehash of legacy rows
+    return ok
+
 # ===========================
 # SESSION MANAGEMENT
 # ===========================
+@metrics.timed()
 def create_session(username):
-    token = str(random.randint(1000, 9999))
-    SESSIONS[token] = {"username": username, "time": time.time()}
-    return token
+    return _core().create_session(username)
 
 # ===========================
 # FILE HANDLING (Unsafe)
 # ===========================
+@metrics.timed()
 def read_config(file_name):
-    f = open(file_name, "r")  # file not closed
-    data = json.load(f)
-    return data
+    return config_writer.load_config(file_name, CONFIG_WRITE_MODE)  # cached, read-only view
 
 def write_config(file_name, data):
-    f = open(file_name, "w")  # no exception handling
-    json.dump(data, f)
-    f.close()
+    config_writer.save_config(file_name, data, CONFIG_WRITE_MODE)  # temp file + rename by default
 
 # ===========================
 # LOGIN FUNCTIONS
 # ===========================
 def login(username, password):
-    if authenticate(username, password):
+    if not LOGIN_GUARD.check(username):
+        print("Too many failed attempts, try again later")
+    elif authenticate(username, password):
+        LOGIN_GUARD.succeeded(username)
         token = create_session(username)
         print(f"Login successful! Session: {token}")
     else:
+        LOGIN_GUARD.failed(username)
         print("Login failed!")
 
+# USERS may be rebound to a plain list; adopt it into an indexed store.
+# The list is copied: once adopted, append to USERS, not to the old list.
+def _users():
+    global USERS
+    if not isinstance(USERS, UserStore):
+        USERS = UserStore(USERS)
+    return USERS
+
+# Log wording for the shared auth core (see auth_core.py)
+_MESSAGES = {
+    "add": "Added user: {username} with password: {password}",
+    "reset": "Reset password for {username} to {password}",
+    "delete": "Deleted user: {username}",
+    "delete_many": "Deleted {count} users: {usernames}",
+}
+
+# Auth core over the current globals (rebuilt per call so patches apply).
+# Logins are checked against users.db by authenticate(); USERS backs the
+# in-memory admin operations.
+def _core():
+    return AuthCore(_users(), SESSIONS, log, PASSWORD_HASHER,
+                    token_range=(1000, 9999), messages=_MESSAGES)
+
 def add_user(username, password):
-    USERS.append({"username": username, "password": password})
-    log(f"Added user: {username} with password: {password}")
+    _core().add_user(username, password)
 
 def reset_password(username, new_password):
-    for user in USERS:
-        if user["username"] == username:
-            user["password"] = new_password
-            log(f"Reset password for {username} to {new_password}")
-            return True
-    return False
+    return _core().reset_password(username, new_password)
 
 # ===========================
 # BUSINESS LOGIC
@@ -119,6 +381,13 @@ def calculate_total(items):
 def apply_discount(total, discount):
     return total - total * discount / 100
 
+# Columnar variants for batch invoicing (see invoicing.py)
+def calculate_totals(prices, quantities, offsets=None):
+    return invoicing.order_totals(prices, quantities, offsets)
+
+def apply_discounts(totals, discounts):
+    return invoicing.apply_discounts(totals, discounts)
+
 def generate_invoice(order_id, items):
     total = calculate_total(items)
     invoice = {
@@ -133,68 +402,63 @@ def generate_invoice(order_id, items):
 # ADMIN OPERATIONS
 # ===========================
 def delete_user(username):
-    global USERS
-    USERS = [user for user in USERS if user["username"] != username]
-    log(f"Deleted user: {username}")
+    _core().delete_user(username)  # tombstone, no list rebuild
+
+def delete_users(usernames):
+    return _core().delete_users(usernames)
 
 def list_users():
-    return USERS
+    return _users()
+
+# One page of users in username order; pass the returned cursor back for the next
+def list_users_page(cursor=None, limit=PAGE_SIZE, prefix=""):
+    return _users().page(prefix, cursor, limit)
+
+# Stream users without building a copy of the whole list
+def iter_users(prefix=""):
+    return _users().iter_records(prefix)
+
+def search_users(prefix, limit=PAGE_SIZE):
+    return list_users_page(None, limit, prefix)[0]
 
 # ===========================
 # HEAVY COMPUTATION (Performance)
 # ===========================
 def heavy_computation():
-    result = 0
-    for i in range(10000000):
-        result += i
-    return result
+    return compute.sum_range(0, 10000000)  # closed form, O(1)
 
 # ===========================
-# CLI (Recursive, Unsafe)
+# CLI (iterative, see cli.py)
 # ===========================
-def main_menu():
-    print("\n--- Menu ---")
-    print("1. Register User")
-    print("2. Login")
-    print("3. Reset Password")
-    print("4. List Users")
-    print("5. Delete User")
-    print("6. Run Heavy Computation")
-    print("7. Exit")
-
-    choice = input("Enter choice: ")
-
-    if choice == "1":
-        u = input("Username: ")
-        p = input("Password: ")
-        add_user(u, p)
-    elif choice == "2":
-        u = input("Username: ")
-        p = input("Password: ")
-        login(u, p)
-    elif choice == "3":
-        u = input("Username: ")
-        p = input("New Password: ")
-        reset_password(u, p)
-    elif choice == "4":
-        print(list_users())
-    elif choice == "5":
-        u = input("Username to delete: ")
-        delete_user(u)
-    elif choice == "6":
-        print("Running heavy computation...")
-        print(heavy_computation())
-    elif choice == "7":
-        print("Goodbye!")
-        exit()
-    else:
-        print("Invalid option")
+def print_users():
+    for user in iter_users():
+        print(user)
+
+def run_heavy_computation():
+    print("Running heavy computation...")
+    print(heavy_computation())
 
-    main_menu()  # recursive (stack risk)
+def quit_app():
+    print("Goodbye!")
+    exit()
+
+def _dispatcher():
+    return cli.CommandDispatcher([
+        cli.Command("1", "Register User", add_user, ("Username: ", "Password: ")),
+        cli.Command("2", "Login", login, ("Username: ", "Password: ")),
+        cli.Command("3", "Reset Password", reset_password, ("Username: ", "New Password: ")),
+        cli.Command("4", "List Users", print_users),
+        cli.Command("5", "Delete User", delete_user, ("Username to delete: ",)),
+        cli.Command("6", "Run Heavy Computation", run_heavy_computation),
+        cli.Command("7", "Exit", quit_app),
+    ], title="\n--- Menu ---", prompt="Enter choice: ")
+
+def main_menu():
+    _dispatcher().run()
 
 # ===========================
 # ENTRY POINT
 # ===========================
 if __name__ == "__main__":
     init_db()
-    main_menu()
+    cli.run_from_args(_dispatcher(), sys.argv[1:])
@@ -0,0 +1,182 @@
+# Bulk user import.
+#
+# Loading a tenant one add_user_db / add_user call at a time pays a commit
+# and a log-file open per account. bulk_add_users streams records, inserts
+# them with executemany in fixed-size batches inside a single transaction,
+# and appends one log write per batch.
+#
+#     python bulk_import.py users.csv --db users.db --batch-size 50000
+import csv
+import json
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from itertools import islice
+
+import audit_log
+from db_pool import ConnectionPool
+
+DEFAULT_BATCH_SIZE = 10_000
+
+INSERT_USER = "INSERT INTO users (username, password) VALUES (?, ?)"
+INSERT_HASHED_USER = "INSERT INTO users (username, password_hash) VALUES (?, ?)"
+
+
+class ImportStats:
+    """Outcome of a bulk import."""
+
+    __slots__ = ("rows", "batches", "seconds")
+
+    def __init__(self, rows=0, batches=0, seconds=0.0):
+        self.rows = rows
+        self.batches = batches
+        self.seconds = seconds
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __repr__(self):
+        return (f"ImportStats(rows={self.rows}, batches={self.batches}, "
+                f"seconds={self.seconds:.3f}, rows_per_sec={self.rows_per_sec:,.0f})")
+
+
+# ---- record sources ---------------------------------------------------------
+def _open(source):
+    if isinstance(source, str):
+        return open(source, "r", newline="", encoding="utf-8")
+    return source
+
+
+def read_csv(source):
+    """Yield (username, password) from a CSV file with a header row."""
+    f = _open(source)
+    try:
+        for row in csv.DictReader(f):
+            yield row["username"], row["password"]
+    finally:
+        if f is not source:
+            f.close()
+
+
+def read_jsonl(source):
+    """Yield (username, password) from a file of JSON objects, one per line."""
+    f = _open(source)
+    try:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["username"], record["password"]
+    finally:
+        if f is not source:
+            f.close()
+
+
+def read_records(path):
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return read_jsonl(path)
+    return read_csv(path)
+
+
+def _as_pair(record):
+    if isinstance(record, dict):
+        return record["username"], record["password"]
+    username, password = record
+    return username, password
+
+
+def _batches(records, batch_size, hasher=None):
+    pairs = map(_as_pair, records)
+    while True:
+        batch = list(islice(pairs, batch_size))
+        if not batch:
+            return
+        if hasher is not None:
+            hashes = hasher.hash_many(password for _, password in batch)
+            batch = [(username, stored) for (username, _), stored in zip(batch, hashes)]
+        yield batch
+
+
+def _write_log(log_file, usernames):
+    audit_log.get_logger(log_file).write_many(f"Added user: {username}" for username in usernames)
+
+
+def _write_spooled_log(log_file, spool, batch_size):
+    spool.seek(0)
+    usernames = map(json.loads, spool)
+    while True:
+        batch = list(islice(usernames, batch_size))
+        if not batch:
+            return
+        _write_log(log_file, batch)
+
+
+# ---- import -----------------------------------------------------------------
+def bulk_add_users(records, target, batch_size=DEFAULT_BATCH_SIZE, log_file=None, hasher=None):
+    """Add many users at once and return an ImportStats.
+
+    ``records`` is any iterable of (username, password) pairs or
+    ``{"username": ..., "password": ...}`` dicts, consumed lazily.
+    ``target`` is either a ConnectionPool, in which case every batch is
+    inserted inside one transaction, or an in-memory user list/UserStore.
+    With a ``hasher`` (a password_hashing.PasswordHasher) passwords are
+    stored hashed, a batch at a time; in users.db they go to the
+    password_hash column, so the table must be migrated.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    stats = ImportStats()
+    start = time.perf_counter()
+    if isinstance(target, ConnectionPool):
+        # Logged only once the transaction commits; a failed batch rolls
+        # back every earlier one too. Until then the usernames wait in a
+        # temp file rather than memory.
+        insert = INSERT_USER if hasher is None else INSERT_HASHED_USER
+        spool = tempfile.TemporaryFile("w+", encoding="utf-8") if log_file else nullcontext()
+        with spool as added:
+            with target.transaction() as conn:
+                for batch in _batches(records, batch_size, hasher):
+                    conn.executemany(insert, batch)
+                    stats.rows += len(batch)
+                    stats.batches += 1
+                    if added is not None:
+                        added.writelines(json.dumps(username) + "\n" for username, _ in batch)
+            if added is not None:
+                _write_spooled_log(log_file, added, batch_size)
+    else:
+        for batch in _batches(records, batch_size, hasher):
+            target.extend({"username": u, "password": p} for u, p in batch)
+            stats.rows += len(batch)
+            stats.batches += 1
+            if log_file:
+                _write_log(log_file, [username for username, _ in batch])
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL")
+    parser.add_argument("source", help="CSV (username,password header) or .jsonl file")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--log-file", default=None)
+    args = parser.parse_args(argv)
+
+    import buggy_login_app
+
+    buggy_login_app.DB_FILE = args.db
+    buggy_login_app.init_db()
+    pool = buggy_login_app.get_pool()
+    try:
+        stats = bulk_add_users(read_records(args.source), pool, args.batch_size, args.log_file)
+    finally:
+        pool.close()
+    print(f"Imported {stats.rows:,} users in {stats.seconds:.2f}s ({stats.rows_per_sec:,.0f} rows/sec)")
+    return stats
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,148 @@
+# Iterative menu dispatcher shared by the command-line front ends.
+#
+# The menus used to call themselves after every command, so each command
+# added a stack frame until a long session hit RecursionError. Here a menu
+# is a table of Commands run by a plain loop, in constant stack depth.
+#
+# Input comes from input() interactively, or from any iterable of lines in
+# batch mode: every line is exactly what would have been typed at the
+# prompt (a menu choice or an answer to a field prompt), and the run ends
+# cleanly at end of input. Per-command call counts and handler time are
+# kept in ``timings``.
+#
+#     python user_auth_app.py --batch commands.txt --timings
+#     generate_commands | python login_app.py --batch -
+import sys
+import time
+
+
+class Command:
+    """One menu entry: the choice key, its label, field prompts and handler."""
+
+    __slots__ = ("key", "label", "handler", "prompts")
+
+    def __init__(self, key, label, handler, prompts=()):
+        self.key = key
+        self.label = label
+        self.handler = handler
+        self.prompts = tuple(prompts)
+
+
+class CommandTiming:
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.calls += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+def _read_input(prompt):
+    return input(prompt)
+
+
+class LineReader:
+    """input()-like callable over an iterable of lines; EOFError at the end."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+
+    def __call__(self, prompt=""):
+        try:
+            line = next(self._lines)
+        except StopIteration:
+            raise EOFError from None
+        return line.rstrip("\r\n")
+
+
+class CommandDispatcher:
+    """Runs a command table in a loop.
+
+    With ``prompt=None`` there is no menu: the single command in the table
+    runs on every iteration.
+    """
+
+    def __init__(self, commands, title=None, prompt="Choose an option: ",
+                 invalid_message="Invalid option"):
+        self.commands = list(commands)
+        self.table = {command.key: command for command in self.commands}
+        self.title = title
+        self.prompt = prompt
+        self.invalid_message = invalid_message
+        self.timings = {}
+
+    def show_menu(self):
+        if self.title is not None:
+            print(self.title)
+        for command in self.commands:
+            print(f"{command.key}. {command.label}")
+
+    def dispatch(self, command, read):
+        args = [read(prompt) for prompt in command.prompts]
+        start = time.perf_counter()
+        try:
+            command.handler(*args)
+        finally:
+            timing = self.timings.get(command.key)
+            if timing is None:
+                timing = self.timings[command.key] = CommandTiming()
+            timing.add(time.perf_counter() - start)
+
+    def step(self, read, show_menu=True):
+        if self.prompt is None:
+            self.dispatch(self.commands[0], read)
+            return
+        if show_menu:
+            self.show_menu()
+        command = self.table.get(read(self.prompt))
+        if command is None:
+            print(self.invalid_message)
+        else:
+            self.dispatch(command, read)
+
+    def run(self, read=None, show_menu=True):
+        """Loop until end of input (EOFError) or a command exits."""
+        read = read or _read_input
+        try:
+            while True:
+                self.step(read, show_menu)
+        except EOFError:
+            pass
+
+    def run_batch(self, lines):
+        self.run(LineReader(lines), show_menu=False)
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        labels = {command.key: command.label for command in self.commands}
+        print(f"{'command':<24}{'calls':>10}{'total ms':>12}{'mean us':>12}{'max us':>12}", file=file)
+        for key, timing in self.timings.items():
+            print(f"{labels.get(key, key):<24}{timing.calls:>10}{timing.total * 1e3:>12.1f}"
+                  f"{timing.total / timing.calls * 1e6:>12.1f}{timing.max * 1e6:>12.1f}", file=file)
+
+
+def run_from_args(dispatcher, argv):
+    """Entry point: interactive by default, ``--batch FILE|-`` for batch mode."""
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", metavar="FILE", help="read input lines from FILE, or - for stdin")
+    parser.add_argument("--timings", action="store_true", help="print per-command timings at the end")
+    args = parser.parse_args(argv)
+    try:
+        if args.batch is None:
+            dispatcher.run()
+        elif args.batch == "-":
+            dispatcher.run_batch(sys.stdin)
+        else:
+            with open(args.batch, "r") as f:
+                dispatcher.run_batch(f)
+    finally:
+        if args.timings:
+            dispatcher.report()
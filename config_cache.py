@@ -0,0 +1,161 @@
+# Cached JSON config loading.
+#
+# The read_config/load_config helpers re-parsed their file on every call
+# (and leaked the handle). ConfigCache parses a file once and serves it
+# again for as long as its (mtime, size, inode) signature is unchanged.
+#
+# Timestamps only have filesystem-tick resolution, so a file rewritten
+# within the same tick with the same size would look unchanged. A file
+# whose mtime is less than RACY_WINDOW seconds older than when it was read
+# is therefore treated as "racy": its bytes are re-read and compared by
+# digest before the cached value is reused.
+#
+# Loaded configs are handed out as read-only views (MappingProxyType for
+# objects, an immutable list subclass for arrays) so every caller can share
+# one parsed copy. Use thaw() to get a mutable deep copy.
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+RACY_WINDOW = 2.0
+
+
+class FrozenList(list):
+    """A list that refuses modification (still compares equal to lists)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("config values are read-only; use config_cache.thaw() for a copy")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+class _Entry:
+    __slots__ = ("signature", "digest", "racy", "value")
+
+    def __init__(self, signature, digest, racy, value):
+        self.signature = signature
+        self.digest = digest
+        self.racy = racy
+        self.value = value
+
+
+def _signature(st):
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ConfigCache:
+    """Parsed JSON files keyed on path, invalidated when the file changes."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._watchers = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        signature = _signature(st)
+        entry = self._entries.get(key)
+        if entry is not None and entry.signature == signature and not entry.racy:
+            self.hits += 1
+            return entry.value
+        with open(key, "rb") as f:
+            raw = f.read()
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+        racy = time.time() - st.st_mtime < RACY_WINDOW
+        if entry is not None and entry.digest == digest:
+            # Touched or racy, but the content is what we already parsed.
+            entry.signature = signature
+            entry.racy = racy
+            self.hits += 1
+            return entry.value
+        value = freeze(json.loads(raw))
+        with self._lock:
+            self._entries[key] = _Entry(signature, digest, racy, value)
+        self.misses += 1
+        return value
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    # ---- background watching --------------------------------------------
+    def watch(self, path, interval=1.0):
+        """Poll ``path`` in the background, reloading it as soon as it changes.
+
+        Readers then find the new version already parsed. Returns a
+        threading.Event; set it (or call unwatch) to stop polling.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            stop = self._watchers.get(key)
+            if stop is not None:
+                return stop
+            stop = threading.Event()
+            self._watchers[key] = stop
+
+        def poll():
+            while not stop.wait(interval):
+                try:
+                    self.load(key)
+                except (OSError, ValueError):
+                    pass  # missing or half-written; retry on the next tick
+
+        threading.Thread(target=poll, name=f"config-watch:{key}", daemon=True).start()
+        return stop
+
+    def unwatch(self, path):
+        with self._lock:
+            stop = self._watchers.pop(os.path.abspath(path), None)
+        if stop is not None:
+            stop.set()
+
+
+_default = ConfigCache()
+
+
+def load_config(path):
+    """Load ``path`` through the shared cache."""
+    return _default.load(path)
+
+
+def invalidate(path=None):
+    _default.invalidate(path)
+
+
+def stats():
+    return _default.stats()
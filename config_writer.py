@@ -0,0 +1,257 @@
+# Crash-safe config writing.
+#
+# save_config/write_config used to truncate the file and then dump into it,
+# so a crash mid-write left an empty or partial config. Writes now go to a
+# temporary file in the same directory that is fsynced and renamed over the
+# target, so readers see either the old or the new file, never a mix.
+#
+# Two helpers build on that:
+#   ConfigWriter      - coalesces a burst of saves into one write after a
+#                       short delay (the last data wins); saves still
+#                       pending at interpreter exit are written then.
+#   JournaledConfig   - key updates are appended to "<path>.journal" instead
+#                       of rewriting the whole file; the journal is folded
+#                       back into the file every ``compact_every`` updates.
+#
+# save_config()/load_config() let an app pick one of these per setting
+# ("atomic", "coalesce" or "journal"), sharing one writer or journal per
+# file. Coalesced saves reach readers after the delay; journaled configs
+# must be read back through load_config(), as the file alone lags behind.
+import atexit
+import json
+import os
+import tempfile
+import threading
+import weakref
+from types import MappingProxyType
+
+import config_cache
+
+# Read the process umask once so new files get the usual permissions
+# (tempfile.mkstemp always creates them 0600).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _json_default(value):
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def atomic_write_json(path, data):
+    """Write ``data`` as JSON to ``path`` atomically (temp file + rename)."""
+    atomic_write(path, lambda f: json.dump(data, f, default=_json_default))
+    config_cache.invalidate(path)
+
+
+def atomic_write(path, write):
+    """Replace ``path`` with what ``write(f)`` writes to a text file.
+
+    The data goes to an fsynced temp file in the same directory that is
+    renamed over ``path``; an existing file keeps its permissions, a new
+    one gets the usual umask-based mode.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory):
+    # Make the rename itself durable; not every platform allows this.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class ConfigWriter:
+    """Coalesces rapid saves of one config file into a single write."""
+
+    def __init__(self, path, delay=0.05):
+        self.path = path
+        self.delay = delay
+        self.writes = 0
+        self._pending = None
+        self._has_pending = False
+        self._timer = None
+        self._lock = threading.Lock()
+        _writers.add(self)
+
+    def save(self, data):
+        with self._lock:
+            self._pending = data
+            self._has_pending = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._has_pending:
+                return
+            data, self._pending, self._has_pending = self._pending, None, False
+            atomic_write_json(self.path, data)
+            self.writes += 1
+
+    close = flush
+
+
+_writers = weakref.WeakSet()
+
+
+def flush_all():
+    """Write every ConfigWriter's pending save now."""
+    for writer in list(_writers):
+        writer.flush()
+
+
+atexit.register(flush_all)
+
+
+class JournaledConfig:
+    """A JSON object config updated through an append-only patch journal."""
+
+    def __init__(self, path, compact_every=1000):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        self._journal_entries = 0
+        try:
+            with open(self.journal_path, "r+b") as f:
+                size = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from a crash; truncated below
+                    self._apply(data, entry)
+                    self._journal_entries += 1
+                    size += len(line)
+                # Later appends must not land after the torn bytes, or the
+                # next replay would stop there and lose them.
+                f.truncate(size)
+        except FileNotFoundError:
+            pass
+        return data
+
+    @staticmethod
+    def _apply(data, entry):
+        if entry["op"] == "set":
+            data[entry["key"]] = entry["value"]
+        elif entry["op"] == "delete":
+            data.pop(entry["key"], None)
+
+    def _append(self, entry):
+        with self._lock:
+            self._apply(self.data, entry)
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(entry, default=_json_default) + "\n")
+            self._journal_entries += 1
+            if self._journal_entries >= self.compact_every:
+                self._compact()
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self._append({"op": "set", "key": key, "value": value})
+
+    def delete(self, key):
+        self._append({"op": "delete", "key": key})
+
+    def replace(self, data):
+        """Make the config equal ``data``, journaling only the keys that changed."""
+        for key in [key for key in self.data if key not in data]:
+            self.delete(key)
+        for key, value in data.items():
+            if key not in self.data or self.data[key] != value:
+                self.set(key, value)
+
+    def _compact(self):
+        # The file is replaced before the journal is dropped; replaying a
+        # journal over an already-compacted file is harmless.
+        atomic_write_json(self.path, self.data)
+        with open(self.journal_path, "w"):
+            pass
+        self._journal_entries = 0
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+
+WRITE_MODES = ("atomic", "coalesce", "journal")
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_for(kind, path):
+    key = (kind, os.path.abspath(path))
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = kind(path)
+        return _shared[key]
+
+
+def save_config(path, data, mode="atomic"):
+    """Save ``data`` to ``path`` using one of WRITE_MODES."""
+    if mode == "atomic":
+        atomic_write_json(path, data)
+    elif mode == "coalesce":
+        _shared_for(ConfigWriter, path).save(data)
+    elif mode == "journal":
+        if not isinstance(data, dict):
+            raise TypeError("journaled configs must be JSON objects")
+        _shared_for(JournaledConfig, path).replace(data)
+    else:
+        raise ValueError(f"unknown config write mode: {mode!r}")
+
+
+def load_config(path, mode="atomic"):
+    """Load ``path`` as a read-only view, as saved with ``mode``."""
+    if mode == "journal":
+        journal = _shared_for(JournaledConfig, path)
+        with journal._lock:
+            return config_cache.freeze(journal.data)
+    if mode not in WRITE_MODES:
+        raise ValueError(f"unknown config write mode: {mode!r}")
+    return config_cache.load_config(path)
@@ -0,0 +1,28 @@
+import pytest
+import buggy_login_app
+
+
+class FakeClock:
+    """A clock that only moves when a test sets ``now``."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point buggy_login_app at a fresh database and log file in tmp_path."""
+    monkeypatch.setattr(buggy_login_app, "DB_FILE", str(tmp_path / "users.db"))
+    monkeypatch.setattr(buggy_login_app, "LOG_FILE", str(tmp_path / "app.log"))
+    buggy_login_app.init_db()
+    yield tmp_path
+    buggy_login_app.get_pool().close()
+    monkeypatch.setattr(buggy_login_app, "_pool", None)
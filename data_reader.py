@@ -0,0 +1,44 @@
+# Streaming and memory-mapped file readers.
+#
+# read_text() is the old read-everything behaviour and is fine for small
+# files. For large ones:
+#   iter_chunks() - yields fixed-size pieces (str, or bytes with binary=True)
+#   iter_lines()  - yields one line at a time
+#   map_file()    - returns a read-only memoryview over an mmap of the file;
+#                   nothing is copied and pages are loaded on demand. The
+#                   mapping is released once the memoryview (and any slices
+#                   of it) are released or garbage collected.
+import mmap
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+def read_text(file_name):
+    with open(file_name, "r") as f:
+        return f.read()
+
+
+def iter_chunks(file_name, chunk_size=DEFAULT_CHUNK_SIZE, binary=False):
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    with open(file_name, "rb" if binary else "r") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def iter_lines(file_name):
+    with open(file_name, "r") as f:
+        yield from f
+
+
+def map_file(file_name):
+    with open(file_name, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return memoryview(b"")
+    return memoryview(mapped)
@@ -0,0 +1,132 @@
+# Pooled SQLite connections.
+#
+# Opening a connection per query costs a file open, schema parse and, for
+# writes, an fsync per commit. The pool keeps a bounded set of connections
+# in WAL mode and reuses them across threads; each connection keeps its
+# compiled statements cached, so repeating the same SQL text skips parsing.
+# Every connection to ":memory:" opens its own empty database, so a pool of
+# one needs size=1.
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = 5
+STATEMENT_CACHE_SIZE = 128
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class ConnectionPool:
+    """A thread-safe, bounded pool of SQLite connections."""
+
+    def __init__(self, database, size=DEFAULT_POOL_SIZE, timeout=5.0,
+                 synchronous="NORMAL"):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        if database == ":memory:" and size != 1:
+            raise ValueError("a :memory: pool must have size=1; each connection gets its own database")
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self._path = database if database == ":memory:" else os.path.abspath(database)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all = []
+        self._closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        self._enable_wal(conn)
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    def _enable_wal(self, conn):
+        # Converting a new file to WAL takes an exclusive lock that SQLite
+        # does not wait for, so connections opened at once by several
+        # processes retry here until the pool timeout.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as exc:
+                if "locked" not in str(exc) or time.monotonic() >= deadline:
+                    conn.close()
+                    raise
+            time.sleep(0.01)
+
+    def acquire(self):
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"no free connection to {self.database} after {self.timeout}s") from None
+
+    def release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a connection; commit on success, roll back on error."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def execute(self, sql, params=()):
+        with self.transaction() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def fetchone(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        for conn in connections:
+            conn.close()
@@ -0,0 +1,128 @@
+# Streaming batch invoicing.
+#
+# Reads orders from JSON lines, builds invoices with generate_invoice and
+# apply_discount, and writes them out as JSON lines without ever holding
+# more than a few chunks in memory. Each input line is an object such as
+#
+#     {"order_id": 17, "items": [{"price": 9.5, "quantity": 2}], "discount": 10}
+#
+# ("discount", a percentage, is optional). With ``workers`` > 1 chunks of raw
+# lines are parsed, invoiced and serialized in a process pool; results are
+# still written in input order, and only a bounded window of chunks is in
+# flight at a time.
+#
+#     python invoice_pipeline.py orders.jsonl invoices.jsonl --workers 8
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import buggy_login_app
+
+DEFAULT_CHUNK_SIZE = 1_000
+
+
+def read_orders(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def build_invoice(order):
+    invoice = buggy_login_app.generate_invoice(order["order_id"], order["items"])
+    discount = order.get("discount")
+    if discount:
+        invoice["discount"] = discount
+        invoice["amount_due"] = buggy_login_app.apply_discount(invoice["total"], discount)
+    else:
+        invoice["amount_due"] = invoice["total"]
+    return invoice
+
+
+def build_invoices(orders):
+    for order in orders:
+        yield build_invoice(order)
+
+
+def write_invoices(invoices, out):
+    count = 0
+    for invoice in invoices:
+        out.write(json.dumps(invoice))
+        out.write("\n")
+        count += 1
+    return count
+
+
+# ---- parallel path ----------------------------------------------------------
+def _invoice_lines(lines):
+    # Runs in a worker: raw order lines in, serialized invoice lines out.
+    serialized = [json.dumps(invoice) + "\n" for invoice in build_invoices(read_orders(lines))]
+    return "".join(serialized), len(serialized)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parallel(lines, out, workers, chunk_size):
+    count = 0
+    window = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in _chunks(lines, chunk_size):
+            window.append(pool.submit(_invoice_lines, chunk))
+            if len(window) >= workers * 2:
+                text, written = window.popleft().result()
+                out.write(text)
+                count += written
+        while window:
+            text, written = window.popleft().result()
+            out.write(text)
+            count += written
+    return count
+
+
+def run_pipeline(source, out, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Invoice every order line in ``source`` into ``out``; return the count.
+
+    ``source`` and ``out`` are text streams (any iterable of lines works as
+    ``source``).
+    """
+    if workers and workers > 1:
+        return _parallel(source, out, workers, chunk_size)
+    return write_invoices(build_invoices(read_orders(source)), out)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate invoices from a JSONL order stream")
+    parser.add_argument("orders", help="input JSONL file, or - for stdin")
+    parser.add_argument("invoices", help="output JSONL file, or - for stdout")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.orders == "-" else open(args.orders, "r", encoding="utf-8")
+    out = sys.stdout if args.invoices == "-" else open(args.invoices, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        count = run_pipeline(source, out, args.workers, args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count:,} invoices in {elapsed:.2f}s", file=sys.stderr)
+    return count
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,140 @@
+# Columnar invoice arithmetic.
+#
+# calculate_total walks a list of item dicts one at a time. For batch
+# invoicing the line items can instead be passed as parallel price and
+# quantity columns (NumPy arrays, array.array, or any sequence), with
+# ``offsets`` giving the index of each order's first item, as in
+# numpy.add.reduceat. Totals for every order are then computed in a few
+# vectorized passes when NumPy is installed.
+#
+# Both paths add each order's line totals left to right, exactly like
+# calculate_total does, so for float inputs they return identical values;
+# NumPy's own sum() would use pairwise summation and could differ in the
+# last bits. To keep that ordering while vectorizing, short orders are
+# summed column by column across all orders at once, and long orders each
+# get a sequential cumulative sum.
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path is always available
+    np = None
+
+# Orders with more items than this are summed one at a time with cumsum
+# instead of in the column-by-column sweep.
+LONG_ORDER = 256
+
+
+def _want_numpy(use_numpy):
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+    return use_numpy
+
+
+def _bounds(offsets, count):
+    bounds = list(offsets) + [count]
+    for start, stop in zip(bounds, bounds[1:]):
+        if not 0 <= start <= stop <= count:
+            raise ValueError("offsets must be non-decreasing indexes into the item columns")
+    return bounds
+
+
+# ---- pure Python ------------------------------------------------------------
+def _order_totals_python(prices, quantities, offsets):
+    if len(prices) != len(quantities):
+        raise ValueError("prices and quantities must have the same length")
+    if offsets is None:
+        total = 0
+        for price, quantity in zip(prices, quantities):
+            total += price * quantity
+        return total
+    bounds = _bounds(offsets, len(prices))
+    totals = []
+    for start, stop in zip(bounds, bounds[1:]):
+        total = 0
+        for i in range(start, stop):
+            total += prices[i] * quantities[i]
+        totals.append(total)
+    return totals
+
+
+def _apply_discounts_python(totals, discounts):
+    if len(totals) != len(discounts):
+        raise ValueError("totals and discounts must have the same length")
+    return [total - total * discount / 100 for total, discount in zip(totals, discounts)]
+
+
+# ---- NumPy ------------------------------------------------------------------
+def _order_totals_numpy(prices, quantities, offsets):
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    if prices.shape != quantities.shape:
+        raise ValueError("prices and quantities must have the same length")
+    line_totals = prices * quantities
+    if offsets is None:
+        return float(np.cumsum(line_totals)[-1]) if len(line_totals) else 0.0
+
+    count = len(line_totals)
+    starts = np.asarray(offsets, dtype=np.intp)
+    stops = np.append(starts[1:], count)
+    if len(starts) and (starts[0] < 0 or np.any(stops < starts)):
+        raise ValueError("offsets must be non-decreasing indexes into the item columns")
+    lengths = stops - starts
+    totals = np.zeros(len(starts))
+
+    for order in np.flatnonzero(lengths > LONG_ORDER):
+        totals[order] = np.cumsum(line_totals[starts[order]:stops[order]])[-1]
+
+    # Sweep item positions 0, 1, 2, ... adding that item of every order
+    # still long enough to have one; orders are sorted longest first so
+    # the active ones are always a prefix.
+    short = np.flatnonzero((lengths <= LONG_ORDER) & (lengths > 0))
+    if len(short):
+        short = short[np.argsort(-lengths[short], kind="stable")]
+        short_starts = starts[short]
+        neg_lengths = -lengths[short]
+        sums = np.zeros(len(short))
+        for position in range(int(-neg_lengths[0])):
+            active = np.searchsorted(neg_lengths, -position, side="left")
+            sums[:active] += line_totals[short_starts[:active] + position]
+        totals[short] = sums
+    return totals
+
+
+def _apply_discounts_numpy(totals, discounts):
+    totals = np.asarray(totals, dtype=np.float64)
+    discounts = np.asarray(discounts, dtype=np.float64)
+    if totals.shape != discounts.shape:
+        raise ValueError("totals and discounts must have the same length")
+    return totals - totals * discounts / 100
+
+
+# ---- public API -------------------------------------------------------------
+def order_totals(prices, quantities, offsets=None, use_numpy=None):
+    """Return the total of one order, or of every order if ``offsets`` is given.
+
+    With ``offsets`` the result is a NumPy array on the NumPy path and a
+    list on the pure-Python path. ``use_numpy`` forces a path; by default
+    NumPy is used when it is installed.
+    """
+    if _want_numpy(use_numpy):
+        return _order_totals_numpy(prices, quantities, offsets)
+    return _order_totals_python(prices, quantities, offsets)
+
+
+def apply_discounts(totals, discounts, use_numpy=None):
+    """apply_discount for many orders at once (discounts are percentages)."""
+    if _want_numpy(use_numpy):
+        return _apply_discounts_numpy(totals, discounts)
+    return _apply_discounts_python(totals, discounts)
+
+
+def columns_from_orders(orders):
+    """Flatten a list of item-dict lists into (prices, quantities, offsets)."""
+    prices, quantities, offsets = [], [], []
+    for items in orders:
+        offsets.append(len(prices))
+        for item in items:
+            prices.append(item["price"])
+            quantities.append(item["quantity"])
+    return prices, quantities, offsets
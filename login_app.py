@@ -1,21 +1,71 @@
 import hashlib
-import json
 import os
-import random
-import time
+import sys
+
+import audit_log
+import bulk_import
+import cli
+import config_cache
+import metrics
+import rate_limit
+import storage
+import user_record
+from auth_core import AuthCore
+from session_store import SessionStore
+from user_store import UserStore
 
 # Global user database (bad practice)
-USERS = [
+USERS = UserStore([
     {"username": "admin", "password": "1234"},
     {"username": "guest", "password": "guest"}
-]
+])
 
-SESSIONS = {}
+SESSIONS = SessionStore()
+
+# Set to a password_hashing.PasswordHasher to store salted KDF hashes;
+# existing plaintext passwords are then rehashed on their next login.
+PASSWORD_HASHER = None
+
+# Failed-login throttling per username and source (see rate_limit.py)
+LOGIN_GUARD = rate_limit.LoginGuard()
 
 # Logging function (bad practice: logs passwords)
+@metrics.timed()
 def log(message):
-    with open("login.log", "a") as f:
-        f.write(f"{time.ctime()} - {message}\n")
+    audit_log.get_logger("login.log").write(message)
+
+# Return the user store, re-indexing if USERS was rebound to a plain list.
+# The list is copied: once adopted, append to USERS, not to the old list.
+def _users():
+    global USERS
+    if isinstance(USERS, list):
+        USERS = UserStore(USERS)
+    return USERS
+
+# Replace USERS with a configured storage backend (see storage.py), e.g.
+# use_storage({"backend": "log", "path": "users.log"})
+def use_storage(config):
+    global USERS
+    USERS = storage.from_config(config)
+    return USERS
+
+# Re-store the in-memory users in a compact layout (see user_record.py):
+# "slots" for UserRecord objects, "columnar" for a UserTable
+def use_record_layout(layout):
+    global USERS
+    USERS = user_record.store_for(layout, _users())
+    return USERS
+
+# Log wording for the shared auth core (see auth_core.py)
+_MESSAGES = {
+    "add": "Added user {username} with password {password}",
+    "reset": "Password reset for {username}",
+}
+
+# Auth core over the current globals (rebuilt per call so patches apply)
+def _core():
+    return AuthCore(_users(), SESSIONS, log, PASSWORD_HASHER,
+                    token_range=(1000, 9999), messages=_MESSAGES)
 
 # Simple hashing (weak: MD5)
 def hash_password(password):
@@ -23,72 +73,57 @@ def hash_password(password):
 
 # Add new user
 def add_user(username, password):
-    USERS.append({
-        "username": username,
-        "password": password  # stored in plain text intentionally
-    })
-    log(f"Added user {username} with password {password}")
+    _core().add_user(username, password)
     print("User added!")
 
+# Add many users with one log write per batch
+def bulk_add_users(records, batch_size=bulk_import.DEFAULT_BATCH_SIZE):
+    return bulk_import.bulk_add_users(records, _users(), batch_size, log_file="login.log",
+                                      hasher=PASSWORD_HASHER)
+
 # Login function
+@metrics.timed()
 def login(username, password):
+    if not LOGIN_GUARD.check(username):
+        print("Too many failed attempts, try again later")
+        return False
+
     # Hardcoded credentials check (bad security)
     if username == "superadmin" and password == "super123":
         print("Login successful (superadmin)")
         return True
 
-    # Check USERS list
-    for user in USERS:
-        if user["username"] == username and user["password"] == password:
-            token = str(random.randint(1000, 9999))
-            SESSIONS[token] = {"username": username, "time": time.time()}
-            print(f"Login successful. Session token: {token}")
-            return True
+    # Check USERS index
+    token = _core().login(username, password)
+    if token is not None:
+        LOGIN_GUARD.succeeded(username)
+        print(f"Login successful. Session token: {token}")
+        return True
+    LOGIN_GUARD.failed(username)
     print("Login failed")
     return False
 
 # Function with small bug
 def reset_password(username, new_password):
-    for user in USERS:
-        if user["username"] == username:
-            user["password"] = new_password
-            log(f"Password reset for {username}")
-            return True
-    return False
+    return _core().reset_password(username, new_password)
 
-# Simulate reading config (unsafe)
+# Read config through the shared cache (read-only view, reparsed on change)
+@metrics.timed()
 def read_config(filename):
-    f = open(filename, "r")
-    data = json.load(f)
-    return data  # file not closed intentionally
+    return config_cache.load_config(filename)
 
-# Main CLI
-def main():
-    print("1. Add User")
-    print("2. Login")
-    print("3. Reset Password")
-    choice = input("Choose an option: ")
-
-    if choice == "1":
-        username = input("Username: ")
-        password = input("Password: ")
-        add_user(username, password)
-
-    elif choice == "2":
-        username = input("Username: ")
-        password = input("Password: ")
-        login(username, password)
+# Menu command table (built per run so patched functions are picked up)
+def _dispatcher():
+    return cli.CommandDispatcher([
+        cli.Command("1", "Add User", add_user, ("Username: ", "Password: ")),
+        cli.Command("2", "Login", login, ("Username: ", "Password: ")),
+        cli.Command("3", "Reset Password", reset_password, ("Username: ", "New Password: ")),
+    ], invalid_message="Invalid choice")
 
-    elif choice == "3":
-        username = input("Username: ")
-        new_password = input("New Password: ")
-        reset_password(username, new_password)
-
-    else:
-        print("Invalid choice")
-
-    main()  # recursive call (stack overflow risk if used long time)
+# Main CLI (iterative loop, see cli.py)
+def main():
+    _dispatcher().run()
 
 
 if __name__ == "__main__":
-    main()
+    cli.run_from_args(_dispatcher(), sys.argv[1:])
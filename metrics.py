@@ -0,0 +1,170 @@
+# Call counts and latency histograms for the auth hot paths.
+#
+# Decorate a function with @metrics.timed() (or wrap a block in
+# ``with metrics.timer("name"):``) to record how often it runs and how long
+# it takes. Recording is off by default: a disabled wrapper costs one
+# global check before calling straight through. Turn it on with enable(),
+# or by starting the process with AUTH_METRICS=1.
+#
+# snapshot() returns the numbers as plain dicts; prometheus_text() renders
+# them in the Prometheus text exposition format, and dump() writes that to
+# a local file (atomically, see config_writer) for a node exporter
+# textfile collector or for scraping by hand.
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from config_writer import atomic_write
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = "auth_call_seconds"
+DEFAULT_PATH = "metrics.prom"
+
+_enabled = os.environ.get("AUTH_METRICS") == "1"
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class Histogram:
+    """Count, sum, error count and bucketed latencies for one call site."""
+
+    def __init__(self, name, buckets=BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.sum += seconds
+            if error:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts, count, total, errors = list(self.counts), self.count, self.sum, self.errors
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            cumulative[bound] = running
+        return {"count": count, "sum": total, "errors": errors, "buckets": cumulative}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def histogram(name):
+    metric = _registry.get(name)
+    if metric is None:
+        with _registry_lock:
+            metric = _registry.setdefault(name, Histogram(name))
+    return metric
+
+
+def reset():
+    with _registry_lock:
+        _registry.clear()
+
+
+def timed(name=None):
+    """Decorator recording calls of the wrapped function under ``name``.
+
+    ``name`` defaults to ``module.function``.
+    """
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                histogram(label).observe(time.perf_counter() - start, error)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def timer(name):
+    """Record the time spent in the ``with`` block under ``name``."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    error = True
+    try:
+        yield
+        error = False
+    finally:
+        histogram(name).observe(time.perf_counter() - start, error)
+
+
+def snapshot():
+    """Return {name: {"count", "sum", "errors", "buckets"}} for every metric."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+def prometheus_text(data=None):
+    """Render a snapshot in the Prometheus text exposition format."""
+    data = snapshot() if data is None else data
+    lines = [
+        f"# HELP {METRIC_NAME} Latency of instrumented auth calls.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for name in sorted(data):
+        stats = data[name]
+        func = _label(name)
+        for bound, count in stats["buckets"].items():
+            lines.append(f'{METRIC_NAME}_bucket{{func="{func}",le="{_bound(bound)}"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{func="{func}"}} {stats["sum"]!r}')
+        lines.append(f'{METRIC_NAME}_count{{func="{func}"}} {stats["count"]}')
+    lines.append("# HELP auth_call_errors_total Instrumented auth calls that raised.")
+    lines.append("# TYPE auth_call_errors_total counter")
+    for name in sorted(data):
+        lines.append(f'auth_call_errors_total{{func="{_label(name)}"}} {data[name]["errors"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump(path=DEFAULT_PATH):
+    """Write prometheus_text() to ``path`` atomically."""
+    atomic_write(path, lambda f: f.write(prometheus_text()))
+    return path
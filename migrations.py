@@ -0,0 +1,181 @@
+# Versioned schema migrations for users.db.
+#
+# init_db used to create ``users`` with no index or constraint on username,
+# so lookups were full scans and duplicate usernames piled up. The schema
+# is now versioned: ``schema_version`` records each applied migration and
+# migrate() runs the missing ones in order, upgrading old databases in
+# place.
+#
+#   1  users table (the original schema)
+#   2  duplicate usernames removed (the oldest row, which logins used to
+#      match, is kept) and a UNIQUE index on username; the removed rows
+#      are moved to ``users_duplicates`` with the time they were removed,
+#      so the cleanup can be reviewed and undone
+#   3  password_hash column; KDF hashes move there from ``password``, which
+#      is left for legacy plaintext rows
+#
+# Data-moving steps run in batches of ``batch_size`` rows, each its own
+# short transaction, so the app keeps serving while a large table is
+# upgraded. Every migration is idempotent, so one interrupted between its
+# last step and being recorded is safely re-run, and several processes
+# may migrate the same file at once: each version is recorded once, by
+# whichever finishes it first.
+#
+#     python migrations.py users.db [--target N] [--batch-size N]
+import argparse
+import sqlite3
+import time
+
+from db_pool import ConnectionPool
+from password_hashing import is_encoded
+
+DEFAULT_BATCH_SIZE = 1000
+
+CREATE_VERSION_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_version "
+    "(version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at REAL NOT NULL)"
+)
+
+# Rows whose username already appears on an older (lower id) row
+_DUPLICATE_IDS = (
+    "SELECT u.id FROM users u WHERE EXISTS "
+    "(SELECT 1 FROM users o WHERE o.username = u.username AND o.id < u.id)"
+)
+
+
+def _create_users(pool, batch_size):
+    pool.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT, password TEXT)")
+
+
+def _move_duplicates(conn, limit=-1):
+    # Copy then delete the same ids (noted in a temp table), so a row is
+    # never deleted without its copy. Returns the number moved.
+    conn.execute("DROP TABLE IF EXISTS temp.moving")
+    conn.execute(f"CREATE TEMP TABLE moving AS {_DUPLICATE_IDS} LIMIT ?", (limit,))
+    conn.execute(
+        "INSERT INTO users_duplicates (id, username, password, removed_at) "
+        "SELECT id, username, password, ? FROM users WHERE id IN (SELECT id FROM temp.moving)",
+        (time.time(),),
+    )
+    moved = conn.execute("DELETE FROM users WHERE id IN (SELECT id FROM temp.moving)").rowcount
+    conn.execute("DROP TABLE temp.moving")
+    return moved
+
+
+def _unique_username(pool, batch_size):
+    # A plain index first, so finding duplicates is not quadratic
+    pool.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users (username, id)")
+    # No primary key: ids of removed rows can be reused by new users
+    pool.execute(
+        "CREATE TABLE IF NOT EXISTS users_duplicates "
+        "(id INTEGER, username TEXT, password TEXT, removed_at REAL NOT NULL)"
+    )
+    while True:
+        with pool.transaction() as conn:
+            if _move_duplicates(conn, batch_size) < batch_size:
+                break
+    # Duplicates inserted since the last batch are moved in the same
+    # transaction that builds the unique index.
+    with pool.transaction() as conn:
+        _move_duplicates(conn)
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_users_username ON users (username)")
+        conn.execute("DROP INDEX IF EXISTS idx_users_username")
+
+
+def _columns(pool, table):
+    return [row[1] for row in pool.fetchall(f"PRAGMA table_info({table})")]
+
+
+def _password_hash_column(pool, batch_size):
+    if "password_hash" not in _columns(pool, "users"):
+        try:
+            pool.execute("ALTER TABLE users ADD COLUMN password_hash TEXT")
+        except sqlite3.OperationalError:
+            if "password_hash" not in _columns(pool, "users"):
+                raise
+            # another migrate() added it first
+    last_id = 0
+    while True:
+        rows = pool.fetchall(
+            "SELECT id, password FROM users WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        hashed = [(row[0],) for row in rows if row[1] is not None and is_encoded(row[1])]
+        if hashed:
+            with pool.transaction() as conn:
+                conn.executemany(
+                    "UPDATE users SET password_hash = password, password = NULL WHERE id = ?", hashed
+                )
+
+
+class Migration:
+    def __init__(self, version, name, apply):
+        self.version = version
+        self.name = name
+        self.apply = apply
+
+    def __repr__(self):
+        return f"Migration({self.version}, {self.name!r})"
+
+
+MIGRATIONS = [
+    Migration(1, "create users table", _create_users),
+    Migration(2, "unique username index", _unique_username),
+    Migration(3, "password_hash column", _password_hash_column),
+]
+LATEST = MIGRATIONS[-1].version
+
+
+def current_version(pool):
+    pool.execute(CREATE_VERSION_TABLE)
+    return pool.fetchone("SELECT COALESCE(MAX(version), 0) FROM schema_version")[0]
+
+
+def migrate(pool, target=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Apply every migration above the current version, up to ``target``.
+
+    Returns the versions this call recorded, oldest first; ones another
+    process recorded first are left out.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    target = LATEST if target is None else target
+    version = current_version(pool)
+    applied = []
+    for migration in MIGRATIONS:
+        if not version < migration.version <= target:
+            continue
+        if current_version(pool) >= migration.version:
+            continue  # recorded by a concurrent migrate()
+        migration.apply(pool, batch_size)
+        recorded = pool.execute(
+            "INSERT OR IGNORE INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+            (migration.version, migration.name, time.time()),
+        )
+        if recorded:
+            applied.append(migration.version)
+    return applied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upgrade the users.db schema")
+    parser.add_argument("database", nargs="?", default="users.db")
+    parser.add_argument("--target", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    pool = ConnectionPool(args.database)
+    try:
+        before = current_version(pool)
+        applied = migrate(pool, args.target, args.batch_size)
+    finally:
+        pool.close()
+    if applied:
+        print(f"Migrated {args.database} from version {before} to {applied[-1]}")
+    else:
+        print(f"{args.database} is already at version {before}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# Salted, slow password hashing with in-place migration.
+#
+# Stored passwords are encoded as
+#     pbkdf2_sha256$<iterations>$<salt>$<hash>
+#     scrypt$<n>,<r>,<p>$<salt>$<hash>
+# (salt and hash base64). Anything else is treated as a legacy plaintext
+# password.
+#
+# A KDF is deliberately CPU-bound, so PasswordHasher can run it in a process
+# pool: hash_async/verify_async never block an event loop, and with
+# ``workers`` set the synchronous hash/verify wait on the pool instead of
+# holding the calling thread's GIL. calibrate() picks cost parameters that
+# take about a given wall-clock budget on this machine.
+#
+# check_and_migrate() is the rehash-on-login step: it verifies a password
+# against whatever is stored and, if that was plaintext or a hash with
+# outdated parameters, returns a fresh hash for the caller to store.
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+PBKDF2 = "pbkdf2_sha256"
+SCRYPT = "scrypt"
+ALGORITHMS = (PBKDF2, SCRYPT)
+
+DEFAULT_PBKDF2_ITERATIONS = 600_000
+DEFAULT_SCRYPT_N = 2 ** 15
+DEFAULT_SCRYPT_R = 8
+DEFAULT_SCRYPT_P = 1
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _unb64(text):
+    return base64.b64decode(text.encode("ascii"), validate=True)
+
+
+# ---- KDF primitives (module level so worker processes can run them) --------
+def _derive(algorithm, params, password, salt):
+    secret = password.encode("utf-8")
+    if algorithm == PBKDF2:
+        return hashlib.pbkdf2_hmac("sha256", secret, salt, params[0], HASH_SIZE)
+    n, r, p = params
+    return hashlib.scrypt(secret, salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p + (1 << 20), dklen=HASH_SIZE)
+
+
+def _encode(algorithm, params, salt, digest):
+    return f"{algorithm}${','.join(map(str, params))}${_b64(salt)}${_b64(digest)}"
+
+
+def decode(encoded):
+    """Split an encoded hash into (algorithm, params, salt, digest), or None."""
+    if not isinstance(encoded, str) or encoded.count("$") != 3:
+        return None
+    algorithm, params, salt, digest = encoded.split("$")
+    if algorithm not in ALGORITHMS:
+        return None
+    try:
+        params = tuple(int(value) for value in params.split(","))
+        salt, digest = _unb64(salt), _unb64(digest)
+    except ValueError:
+        return None
+    if len(params) != (1 if algorithm == PBKDF2 else 3):
+        return None
+    return algorithm, params, salt, digest
+
+
+def is_encoded(stored):
+    return decode(stored) is not None
+
+
+def _hash(algorithm, params, password):
+    salt = os.urandom(SALT_SIZE)
+    return _encode(algorithm, params, salt, _derive(algorithm, params, password, salt))
+
+
+def _verify(password, encoded):
+    parts = decode(encoded)
+    if parts is None:
+        return False
+    algorithm, params, salt, digest = parts
+    return hmac.compare_digest(_derive(algorithm, params, password, salt), digest)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords with one KDF and fixed cost parameters."""
+
+    def __init__(self, algorithm=SCRYPT, iterations=DEFAULT_PBKDF2_ITERATIONS,
+                 n=DEFAULT_SCRYPT_N, r=DEFAULT_SCRYPT_R, p=DEFAULT_SCRYPT_P, workers=None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {ALGORITHMS}, not {algorithm!r}")
+        self.algorithm = algorithm
+        self.params = (iterations,) if algorithm == PBKDF2 else (n, r, p)
+        self.workers = workers
+        self._pool = None
+
+    def __repr__(self):
+        return f"PasswordHasher({self.algorithm!r}, params={self.params})"
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers or os.cpu_count())
+        return self._pool
+
+    # ---- synchronous ----------------------------------------------------
+    def hash(self, password):
+        if self.workers:
+            return self._executor().submit(_hash, self.algorithm, self.params, password).result()
+        return _hash(self.algorithm, self.params, password)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords, spread over the pool when ``workers`` is set."""
+        passwords = list(passwords)
+        if self.workers:
+            chunksize = max(1, len(passwords) // (4 * self.workers))
+            return list(self._executor().map(
+                _hash, repeat(self.algorithm), repeat(self.params), passwords, chunksize=chunksize
+            ))
+        return [_hash(self.algorithm, self.params, password) for password in passwords]
+
+    def verify(self, password, encoded):
+        if self.workers:
+            return self._executor().submit(_verify, password, encoded).result()
+        return _verify(password, encoded)
+
+    def needs_rehash(self, stored):
+        parts = decode(stored)
+        return parts is None or parts[0] != self.algorithm or parts[1] != self.params
+
+    # ---- asyncio --------------------------------------------------------
+    async def hash_async(self, password):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), _hash, self.algorithm, self.params, password)
+
+    async def verify_async(self, password, encoded):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), _verify, password, encoded)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# ---- migration --------------------------------------------------------------
+def check_and_migrate(stored, password, hasher):
+    """Return (ok, new_stored); new_stored is None unless an upgrade is due."""
+    if not is_encoded(stored):
+        if stored is None or not hmac.compare_digest(str(stored).encode(), password.encode()):
+            return False, None
+        return True, hasher.hash(password)
+    if not hasher.verify(password, stored):
+        return False, None
+    return True, hasher.hash(password) if hasher.needs_rehash(stored) else None
+
+
+async def check_and_migrate_async(stored, password, hasher):
+    if not is_encoded(stored):
+        if stored is None or not hmac.compare_digest(str(stored).encode(), password.encode()):
+            return False, None
+        return True, await hasher.hash_async(password)
+    if not await hasher.verify_async(password, stored):
+        return False, None
+    return True, (await hasher.hash_async(password)) if hasher.needs_rehash(stored) else None
+
+
+def check_record(record, password, hasher):
+    """Check ``record["password"]``, upgrading it in place when a hasher is set.
+
+    Without a hasher this is the legacy plaintext comparison.
+    """
+    if hasher is None:
+        return record["password"] == password
+    ok, upgraded = check_and_migrate(record["password"], password, hasher)
+    if upgraded is not None:
+        record["password"] = upgraded
+    return ok
+
+
+def store_password(password, hasher):
+    """The value to store for a new password: a hash, or plaintext without a hasher."""
+    return password if hasher is None else hasher.hash(password)
+
+
+# ---- calibration ------------------------------------------------------------
+def _time_hash(algorithm, params):
+    start = time.perf_counter()
+    _hash(algorithm, params, "calibration")
+    return time.perf_counter() - start
+
+
+def calibrate(target_seconds=0.25, algorithm=SCRYPT, max_scrypt_n=2 ** 20, **options):
+    """Return a PasswordHasher whose hash takes roughly ``target_seconds`` here."""
+    if algorithm == PBKDF2:
+        iterations = 10_000
+        elapsed = _time_hash(PBKDF2, (iterations,))
+        while elapsed < 0.02:  # too short to extrapolate from
+            iterations *= 4
+            elapsed = _time_hash(PBKDF2, (iterations,))
+        iterations = max(1_000, int(iterations * target_seconds / elapsed))
+        return PasswordHasher(PBKDF2, iterations=iterations, **options)
+    if algorithm != SCRYPT:
+        raise ValueError(f"algorithm must be one of {ALGORITHMS}, not {algorithm!r}")
+    # scrypt's n must be a power of two: keep doubling while under budget.
+    n = 2 ** 10
+    while n < max_scrypt_n and _time_hash(SCRYPT, (n * 2, DEFAULT_SCRYPT_R, DEFAULT_SCRYPT_P)) <= target_seconds:
+        n *= 2
+    return PasswordHasher(SCRYPT, n=n, **options)
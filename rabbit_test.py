@@ -1,34 +1,58 @@
 # Intentionally bad login example for CodeRabbit
+import sys
+
+import cli
+import data_reader
+import rate_limit
+from session_store import SessionStore
 
 # Hardcoded credentials (security issue)
 ADMIN_USER = "admin"
 ADMIN_PASS = "1234"
 
 # Global mutable state (bad practice)
-sessions = {}
+sessions = SessionStore()
+
+# Failed-login throttling per username and source (see rate_limit.py)
+LOGIN_GUARD = rate_limit.LoginGuard()
 
 def login(username, password):
+    if not LOGIN_GUARD.check(username):
+        print("Too many failed attempts, try again later")
+        return False
     if username == ADMIN_USER and password == ADMIN_PASS:
+        LOGIN_GUARD.succeeded(username)
         token = "session123"  # fixed session token (bad)
         sessions[token] = username
         print("Login successful!")
         return True
     else:
+        LOGIN_GUARD.failed(username)
         print("Login failed")
         return False
 
-# Unsafe file handling
-def read_data(file_name):
-    f = open(file_name, "r")
-    data = f.read()
-    return data  # file not closed
+# File reading: whole string by default, or streamed / memory-mapped
+# (mode="chunks", "lines" or "mmap") for large files
+def read_data(file_name, mode="text", chunk_size=data_reader.DEFAULT_CHUNK_SIZE):
+    if mode == "text":
+        return data_reader.read_text(file_name)
+    if mode == "chunks":
+        return data_reader.iter_chunks(file_name, chunk_size)
+    if mode == "lines":
+        return data_reader.iter_lines(file_name)
+    if mode == "mmap":
+        return data_reader.map_file(file_name)
+    raise ValueError(f"unknown read mode: {mode!r}")
+
+# Login prompt loop (iterative, see cli.py)
+def _dispatcher():
+    return cli.CommandDispatcher(
+        [cli.Command("login", "Login", login, ("Username: ", "Password: "))],
+        prompt=None,
+    )
 
-# Recursive function (bad)
 def main():
-    user = input("Username: ")
-    pw = input("Password: ")
-    login(user, pw)
-    main()  # recursive call, stack overflow risk
+    _dispatcher().run()
 
 if __name__ == "__main__":
-    main()
+    cli.run_from_args(_dispatcher(), sys.argv[1:])
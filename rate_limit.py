@@ -0,0 +1,198 @@
+# Login rate limiting with a fixed memory budget.
+#
+# SlidingWindowLimiter counts events per key over a sliding window,
+# approximated the usual way from two fixed windows: the previous window's
+# count, weighted by how much of it still overlaps the sliding window, plus
+# the current window's count. Every check is O(1).
+#
+# Up to ``max_keys`` keys are counted exactly in a dict. Keys that arrive
+# while the dict is full go to a count-min sketch instead: ``depth`` rows
+# of ``width`` counters, where a key's estimate is the smallest of its
+# counters. The sketch can over-count (so it errs towards throttling) but
+# never under-counts, and its size is fixed however many keys an attack
+# cycles through; it is only allocated once the dict first fills up.
+# Exact entries idle for two windows are dropped at most once per window
+# to make room again.
+#
+# LoginGuard pairs two limiters, one keyed by username and one by source
+# (client address), and is what the login functions consult: check()
+# before any lookup or hashing, failed() after a wrong password, and
+# succeeded() to clear the username's count. Servers that know the client
+# address set it for the current request with SOURCE.set(address).
+import contextvars
+import hashlib
+import time
+from array import array
+
+DEFAULT_WINDOW = 60.0
+DEFAULT_MAX_KEYS = 100_000
+DEFAULT_SKETCH_WIDTH = 1 << 16
+DEFAULT_SKETCH_DEPTH = 4
+
+# Failed logins allowed per window
+DEFAULT_PER_USER = 100
+DEFAULT_PER_SOURCE = 1_000
+
+# Client address of the login being handled, if the caller knows it
+SOURCE = contextvars.ContextVar("login_source", default=None)
+
+
+class CountMinSketch:
+    """Two-window count-min sketch with ``depth`` rows of ``width`` counters."""
+
+    def __init__(self, width=DEFAULT_SKETCH_WIDTH, depth=DEFAULT_SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.current = array("I", bytes(4 * width * depth))
+        self.previous = array("I", bytes(4 * width * depth))
+
+    def _slots(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        width = self.width
+        return [row * width + (h1 + row * h2) % width for row in range(self.depth)]
+
+    def rotate(self, windows=1):
+        if windows >= 2:
+            self.previous = array("I", bytes(4 * self.width * self.depth))
+        else:
+            self.previous = self.current
+        self.current = array("I", bytes(4 * self.width * self.depth))
+
+    def estimate(self, key, weight):
+        slots = self._slots(key)
+        previous = min(self.previous[slot] for slot in slots)
+        current = min(self.current[slot] for slot in slots)
+        return previous * weight + current
+
+    def add(self, key, count=1):
+        current = self.current
+        for slot in self._slots(key):
+            current[slot] = min(current[slot] + count, 0xFFFFFFFF)
+
+
+class SlidingWindowLimiter:
+    """At most ``limit`` events per key in any ``window`` seconds (approximately)."""
+
+    def __init__(self, limit, window=DEFAULT_WINDOW, max_keys=DEFAULT_MAX_KEYS,
+                 sketch_width=DEFAULT_SKETCH_WIDTH, sketch_depth=DEFAULT_SKETCH_DEPTH,
+                 clock=time.monotonic):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self._clock = clock
+        self._epoch = int(clock() // window)
+        self._counts = {}  # key -> [epoch, previous, current]
+        self._sketch = None  # CountMinSketch for keys beyond max_keys
+        self._swept = self._epoch
+        self.denied = 0
+
+    def _advance(self, now):
+        epoch = int(now // self.window)
+        if epoch != self._epoch:
+            if self._sketch is not None:
+                self._sketch.rotate(epoch - self._epoch)
+            self._epoch = epoch
+        return epoch
+
+    def _weight(self, now):
+        return 1.0 - (now / self.window - self._epoch)
+
+    def _exact(self, entry, epoch, weight):
+        if entry[0] != epoch:
+            entry[1] = entry[2] if entry[0] == epoch - 1 else 0
+            entry[2] = 0
+            entry[0] = epoch
+        return entry[1] * weight + entry[2]
+
+    def count(self, key):
+        """The estimated number of events for ``key`` in the last window."""
+        now = self._clock()
+        epoch = self._advance(now)
+        entry = self._counts.get(key)
+        if entry is not None:
+            return self._exact(entry, epoch, self._weight(now))
+        if self._sketch is None:
+            return 0
+        return self._sketch.estimate(key, self._weight(now))
+
+    def allowed(self, key):
+        if self.count(key) < self.limit:
+            return True
+        self.denied += 1
+        return False
+
+    def add(self, key, count=1):
+        now = self._clock()
+        epoch = self._advance(now)
+        entry = self._counts.get(key)
+        if entry is None:
+            if len(self._counts) >= self.max_keys:
+                self._sweep(epoch)
+            if len(self._counts) >= self.max_keys:
+                if self._sketch is None:
+                    self._sketch = CountMinSketch(self.sketch_width, self.sketch_depth)
+                self._sketch.add(key, count)
+                return
+            entry = self._counts[key] = [epoch, 0, 0]
+        self._exact(entry, epoch, 0.0)
+        entry[2] += count
+
+    def reset(self, key):
+        """Forget ``key``'s exact count (sketch counts cannot be removed)."""
+        self._counts.pop(key, None)
+
+    def _sweep(self, epoch):
+        # Drop entries with nothing in the current or previous window, at
+        # most once per window so a full table does not rescan on every add.
+        if self._swept == epoch:
+            return
+        self._swept = epoch
+        stale = [key for key, entry in self._counts.items() if entry[0] < epoch - 1]
+        for key in stale:
+            del self._counts[key]
+
+    def stats(self):
+        return {
+            "exact_keys": len(self._counts),
+            "max_keys": self.max_keys,
+            "sketch": self._sketch is not None,
+            "denied": self.denied,
+        }
+
+
+class LoginGuard:
+    """Failed-login limits per username and per source."""
+
+    def __init__(self, per_user=DEFAULT_PER_USER, per_source=DEFAULT_PER_SOURCE,
+                 window=DEFAULT_WINDOW, max_keys=DEFAULT_MAX_KEYS, clock=time.monotonic):
+        self.users = SlidingWindowLimiter(per_user, window, max_keys, clock=clock)
+        self.sources = SlidingWindowLimiter(per_source, window, max_keys, clock=clock)
+
+    def check(self, username, source=None):
+        """True if a login for ``username`` may be attempted now."""
+        if source is None:
+            source = SOURCE.get()
+        if source is not None and not self.sources.allowed(source):
+            return False
+        return self.users.allowed(username)
+
+    def failed(self, username, source=None):
+        if source is None:
+            source = SOURCE.get()
+        self.users.add(username)
+        if source is not None:
+            self.sources.add(source)
+
+    def succeeded(self, username):
+        self.users.reset(username)
+
+    def stats(self):
+        return {"users": self.users.stats(), "sources": self.sources.stats()}
@@ -0,0 +1,65 @@
+# Bounded read-through cache.
+#
+# Sits in front of a slow ``loader(key)`` (e.g. a users.db lookup): hits
+# are served from memory, misses call the loader and keep the result.
+# Entries are evicted least-recently-used once ``max_size`` is reached and,
+# if ``ttl`` is set, expire that many seconds after they were loaded; the
+# bookkeeping, including hit/miss counters, is a SessionStore.
+#
+# Writers call invalidate(key) after changing the underlying row. A load
+# that overlaps any invalidation is returned but not cached, so a reader
+# racing a writer can never put the old row back.
+import threading
+import time
+
+from session_store import SessionStore
+
+DEFAULT_MAX_SIZE = 10_000
+
+
+class ReadThroughCache:
+    def __init__(self, loader, max_size=DEFAULT_MAX_SIZE, ttl=None, clock=time.monotonic):
+        self.loader = loader
+        self._entries = SessionStore(
+            ttl=float("inf") if ttl is None else ttl, max_size=max_size, clock=clock
+        )
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by every invalidation
+        self.loads = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                return self._entries[key]
+            except KeyError:
+                generation = self._generation
+        value = self.loader(key)
+        with self._lock:
+            self.loads += 1
+            if self._generation == generation:
+                self._entries[key] = value
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Size, hits, misses, hit_rate, evictions, expirations, loads and invalidations."""
+        with self._lock:
+            stats = self._entries.stats()
+            stats["loads"] = self.loads
+            stats["invalidations"] = self.invalidations
+        return stats
@@ -0,0 +1,221 @@
+# Session table with per-entry TTL and an LRU size cap.
+#
+# The session dicts in the login modules only ever grew. SessionStore is a
+# drop-in dict (it subclasses OrderedDict, so ``isinstance(x, dict)`` still
+# holds) whose entries expire ``ttl`` seconds after they were last set and
+# whose least-recently-used entries are evicted once ``max_size`` is hit.
+#
+# Expiry times live in a min-heap alongside the entries. Every write pops
+# only the entries whose deadline has passed, so expiry costs amortized
+# O(log n) per session with no periodic full sweeps; stale heap entries left
+# by overwritten keys are skipped when they surface and the heap is rebuilt
+# if they start to dominate it.
+#
+# Reads never change the table itself: recency is kept in a separate
+# ordered index, and an expired entry is only hidden until the next write
+# drops it. Iteration (and keys/values/items) walks a snapshot of the live
+# entries, least recently used first, so looking sessions up inside a loop
+# over the store is safe. Every operation holds one lock, so the store can
+# be shared between threads like the plain dicts it replaces.
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 3600.0
+DEFAULT_MAX_SIZE = 100_000
+
+_MISSING = object()
+
+
+class SessionStore(OrderedDict):
+    """A dict of sessions with TTL expiry, LRU eviction and hit statistics."""
+
+    def __init__(self, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, clock=time.monotonic):
+        super().__init__()
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._expires = {}
+        self._recency = OrderedDict()  # key -> None, least recently used first
+        self._lock = threading.RLock()
+        self._heap = []
+        self._seq = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._purged = 0  # expired entries already dropped
+
+    # ---- dict protocol --------------------------------------------------
+    def __setitem__(self, key, value, ttl=None):
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            OrderedDict.__setitem__(self, key, value)
+            self._recency[key] = None
+            self._recency.move_to_end(key)
+            expires = now + (self.ttl if ttl is None else ttl)
+            self._expires[key] = expires
+            heapq.heappush(self._heap, (expires, next(self._seq), key))
+            if self.max_size is not None:
+                while OrderedDict.__len__(self) > self.max_size:
+                    self._discard(next(iter(self._recency)))
+                    self.evictions += 1
+            if len(self._heap) > 2 * len(self._expires) + 64:
+                self._rebuild_heap()
+
+    def __getitem__(self, key):
+        with self._lock:
+            if self._expired(key, self._clock()):
+                self.misses += 1
+                raise KeyError(key)
+            try:
+                value = OrderedDict.__getitem__(self, key)
+            except KeyError:
+                self.misses += 1
+                raise
+            self._recency.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __delitem__(self, key):
+        with self._lock:
+            OrderedDict.__delitem__(self, key)
+            self._forget(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return OrderedDict.__contains__(self, key) and not self._expired(key, self._clock())
+
+    def __len__(self):
+        with self._lock:
+            return OrderedDict.__len__(self) - self._count_expired(self._clock())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        """Live keys, least recently used first (a snapshot list)."""
+        with self._lock:
+            now = self._clock()
+            return [key for key in self._recency if not self._expired(key, now)]
+
+    def values(self):
+        with self._lock:
+            return [OrderedDict.__getitem__(self, key) for key in self.keys()]
+
+    def items(self):
+        with self._lock:
+            return [(key, OrderedDict.__getitem__(self, key)) for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` with a TTL other than the store default."""
+        self.__setitem__(key, value, ttl)
+
+    def pop(self, key, default=_MISSING):
+        with self._lock:
+            self._forget(key)
+            if default is _MISSING:
+                return OrderedDict.pop(self, key)
+            return OrderedDict.pop(self, key, default)
+
+    def popitem(self, last=True):
+        with self._lock:
+            key, value = OrderedDict.popitem(self, last)
+            self._forget(key)
+            return key, value
+
+    def clear(self):
+        with self._lock:
+            OrderedDict.clear(self)
+            self._expires.clear()
+            self._recency.clear()
+            self._heap.clear()
+
+    def copy(self):
+        other = type(self)(self.ttl, self.max_size, self._clock)
+        with self._lock:
+            now = self._clock()
+            for key, value in self.items():
+                other.__setitem__(key, value, self._expires[key] - now)
+        return other
+
+    # ---- expiry ---------------------------------------------------------
+    def _forget(self, key):
+        self._expires.pop(key, None)
+        self._recency.pop(key, None)
+
+    def _discard(self, key):
+        OrderedDict.__delitem__(self, key)
+        self._forget(key)
+
+    def _expired(self, key, now):
+        expires = self._expires.get(key)
+        return expires is not None and expires <= now
+
+    def _count_expired(self, now):
+        # Walk only the heap's expired prefix, skipping stale entries
+        heap = self._heap
+        count = 0
+        stack = [0] if heap else []
+        while stack:
+            i = stack.pop()
+            expires, _, key = heap[i]
+            if expires > now:
+                continue
+            if self._expires.get(key) == expires:
+                count += 1
+            stack.extend(child for child in (2 * i + 1, 2 * i + 2) if child < len(heap))
+        return count
+
+    def _expire(self, now=None):
+        # Callers hold the lock
+        heap = self._heap
+        if not heap:
+            return 0
+        if now is None:
+            now = self._clock()
+        removed = 0
+        while heap and heap[0][0] <= now:
+            expires, _, key = heapq.heappop(heap)
+            if self._expires.get(key) == expires:
+                self._discard(key)
+                removed += 1
+        self._purged += removed
+        return removed
+
+    @property
+    def expirations(self):
+        """Entries that have expired, whether or not a write dropped them yet."""
+        with self._lock:
+            return self._purged + self._count_expired(self._clock())
+
+    def expire(self):
+        """Drop every expired session now and return how many were removed."""
+        with self._lock:
+            return self._expire()
+
+    def _rebuild_heap(self):
+        self._heap = [(expires, next(self._seq), key) for key, expires in self._expires.items()]
+        heapq.heapify(self._heap)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
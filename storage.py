@@ -0,0 +1,347 @@
+# Pluggable user storage backends.
+#
+# The apps keep users in a UserStore (memory only) or in users.db. This
+# module adds one get/put/delete interface, ``Storage``, with three
+# backends that can stand in for a UserStore anywhere AuthCore uses one:
+#
+#   memory  a dict of username -> record; nothing persists
+#   sqlite  a username-keyed table behind a ConnectionPool, optionally
+#           fronted by a Bloom filter of its usernames (username_filter)
+#   log     an append-only file of JSON lines with an in-memory index of
+#           line offsets; superseded lines are dropped by a background
+#           compaction that rewrites the live records to a fresh file
+#
+# Unlike UserStore these are keyed by username: put() replaces. Pick one
+# with from_config({"backend": "log", "path": "users.log"}) or the name of
+# a JSON file holding that mapping.
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import config_cache
+from bloom import CountingBloomFilter
+from db_pool import ConnectionPool, DEFAULT_POOL_SIZE
+from password_hashing import check_record
+
+# Log compaction starts once superseded bytes exceed both this size and
+# the live bytes.
+COMPACT_MIN_BYTES = 1 << 20
+
+
+class Storage(ABC):
+    """Base class: get/put/delete plus the UserStore methods AuthCore uses."""
+
+    @abstractmethod
+    def get(self, username):
+        """Return the record for ``username``, or None."""
+
+    @abstractmethod
+    def put(self, username, password):
+        """Store ``username``, replacing any existing record."""
+
+    @abstractmethod
+    def delete(self, username):
+        """Remove ``username``; return 1 if it existed, else 0."""
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def __iter__(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- UserStore-compatible operations ----------------------------------
+    def append(self, record):
+        self.put(record["username"], record["password"])
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def add(self, username, password):
+        self.put(username, password)
+        return {"username": username, "password": password}
+
+    def find(self, username, password, hasher=None):
+        record = self.get(username)
+        if record is None:
+            return None
+        stored = record["password"]
+        if not check_record(record, password, hasher):
+            return None
+        if record["password"] != stored:
+            self.put(username, record["password"])  # persist the rehash
+        return record
+
+    def set_password(self, username, new_password):
+        if self.get(username) is None:
+            return False
+        self.put(username, new_password)
+        return True
+
+    def delete_users(self, usernames):
+        return sum(self.delete(username) for username in usernames)
+
+
+class MemoryStorage(Storage):
+    def __init__(self):
+        self._records = {}
+
+    def get(self, username):
+        return self._records.get(username)
+
+    def put(self, username, password):
+        self._records[username] = {"username": username, "password": password}
+
+    def delete(self, username):
+        return 0 if self._records.pop(username, None) is None else 1
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE, table="accounts", username_filter=False):
+        self.table = table
+        self.pool = ConnectionPool(path, size=pool_size)
+        self.pool.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (username TEXT PRIMARY KEY, password TEXT)"
+        )
+        self.username_filter = None
+        if username_filter:
+            self.rebuild_filter()
+
+    def rebuild_filter(self):
+        """Rebuild the Bloom filter from the table (after outside writes)."""
+        with self.pool.connection() as conn:
+            usernames = (row[0] for row in conn.execute(f"SELECT username FROM {self.table}"))
+            self.username_filter = CountingBloomFilter.from_items(usernames)
+
+    def get(self, username):
+        if self.username_filter is not None and username not in self.username_filter:
+            return None  # certainly unknown; no query
+        row = self.pool.fetchone(f"SELECT password FROM {self.table} WHERE username=?", (username,))
+        return None if row is None else {"username": username, "password": row[0]}
+
+    def put(self, username, password):
+        self.pool.execute(
+            f"INSERT OR REPLACE INTO {self.table} (username, password) VALUES (?, ?)",
+            (username, password),
+        )
+        if self.username_filter is not None:
+            self.username_filter.add(username)  # a replace over-counts, which is harmless
+            if self.username_filter.full:
+                self.rebuild_filter()
+
+    def delete(self, username):
+        removed = self.pool.execute(f"DELETE FROM {self.table} WHERE username=?", (username,))
+        if removed and self.username_filter is not None:
+            self.username_filter.remove(username)
+        return removed
+
+    def delete_users(self, usernames):
+        with self.pool.transaction() as conn:
+            cursor = conn.executemany(
+                f"DELETE FROM {self.table} WHERE username=?", ((u,) for u in usernames)
+            )
+            removed = cursor.rowcount
+        if removed and self.username_filter is not None:
+            self.rebuild_filter()
+        return removed
+
+    def __len__(self):
+        return self.pool.fetchone(f"SELECT COUNT(*) FROM {self.table}")[0]
+
+    def __iter__(self):
+        rows = self.pool.fetchall(f"SELECT username, password FROM {self.table} ORDER BY username")
+        return ({"username": u, "password": p} for u, p in rows)
+
+    def close(self):
+        self.pool.close()
+
+
+class LogStorage(Storage):
+    """Append-only JSON-lines file with an in-memory offset index.
+
+    Each put appends ``["put", username, password]`` and each delete
+    appends ``["del", username]``; the index maps a username to the
+    (offset, length) of its latest put line. Reads are a single pread.
+    """
+
+    def __init__(self, path, compact_min_bytes=COMPACT_MIN_BYTES, sync=False):
+        self.path = path
+        self.compact_min_bytes = compact_min_bytes
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._compacting = threading.Lock()  # one compaction at a time
+        self._compactor = None
+        self.compactions = 0
+        self._open()
+
+    def _open(self):
+        self._index = {}
+        self._live = 0
+        size = 0
+        with open(self.path, "a+b") as f:
+            f.seek(0)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash; truncated below
+                self._apply(line, size)
+                size += len(line)
+            f.truncate(size)
+        self._size = size
+        self._file = open(self.path, "a+b", buffering=0)
+
+    def _apply(self, line, offset):
+        entry = json.loads(line)
+        previous = self._index.pop(entry[1], None)
+        if previous is not None:
+            self._live -= previous[1]
+        if entry[0] == "put":
+            self._index[entry[1]] = (offset, len(line))
+            self._live += len(line)
+
+    def _append(self, entry):
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            offset = self._size
+            self._file.write(line)
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._size += len(line)
+            self._apply(line, offset)
+        self._maybe_compact()
+
+    def get(self, username):
+        with self._lock:
+            location = self._index.get(username)
+            if location is None:
+                return None
+            line = os.pread(self._file.fileno(), location[1], location[0])
+        return {"username": username, "password": json.loads(line)[2]}
+
+    def put(self, username, password):
+        self._append(["put", username, password])
+
+    def delete(self, username):
+        if username not in self._index:
+            return 0
+        self._append(["del", username])
+        return 1
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        for username in list(self._index):
+            record = self.get(username)
+            if record is not None:
+                yield record
+
+    # ---- compaction -------------------------------------------------------
+    @property
+    def garbage_bytes(self):
+        return self._size - self._live
+
+    def _needs_compaction(self):
+        garbage = self.garbage_bytes
+        return garbage >= self.compact_min_bytes and garbage >= self._live
+
+    def _maybe_compact(self):
+        if not self._needs_compaction() or self._compacting.locked():
+            return
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self._background_compact, daemon=True)
+            self._compactor.start()
+
+    def _background_compact(self):
+        with self._compacting:
+            if self._needs_compaction():
+                self._compact()
+
+    def compact(self):
+        """Rewrite the live records to a new file and swap it in.
+
+        The bulk copy runs without the lock; writes made meanwhile are
+        replayed from the old file's tail under the lock before the swap.
+        """
+        with self._compacting:
+            self._compact()
+
+    def _compact(self):
+        with self._lock:
+            snapshot = dict(self._index)
+            copied_to = self._size
+            fd = self._file.fileno()
+        temp = self.path + ".compact"
+        index, size = {}, 0
+        with open(temp, "wb") as out:
+            for username, (offset, length) in snapshot.items():
+                out.write(os.pread(fd, length, offset))
+                index[username] = (size, length)
+                size += length
+            with self._lock:
+                tail = os.pread(fd, self._size - copied_to, copied_to)
+                out.write(tail)
+                self._index, self._live = index, size
+                for line in tail.splitlines(keepends=True):
+                    self._apply(line, size)
+                    size += len(line)
+                out.flush()
+                os.fsync(out.fileno())
+                os.replace(temp, self.path)
+                self._file.close()
+                self._file = open(self.path, "a+b", buffering=0)
+                self._size = size
+                self.compactions += 1
+
+    def wait(self):
+        """Block until a running background compaction finishes."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        self.wait()
+        self._file.close()
+
+
+BACKENDS = {
+    "memory": MemoryStorage,
+    "sqlite": SQLiteStorage,
+    "log": LogStorage,
+}
+
+
+def from_config(config):
+    """Open the backend named by ``config["backend"]``.
+
+    ``config`` is a mapping or the name of a JSON config file; the other
+    keys are passed to the backend (``path``, ``pool_size``, ...).
+    """
+    if isinstance(config, str):
+        config = config_cache.load_config(config)
+    options = dict(config)
+    name = options.pop("backend", "memory")
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown storage backend: {name!r}") from None
+    return backend(**options)
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import pytest
+import buggy_login_app
+from async_auth import AsyncAuthService, serve
+from session_store import SessionStore
+
+
+@pytest.fixture
+def temp_db(temp_db, monkeypatch):
+    """The shared temp_db with a fresh session store and one user."""
+    monkeypatch.setattr(buggy_login_app, "SESSIONS", SessionStore())
+    buggy_login_app.add_user_db("alice", "pw")
+    return temp_db
+
+
+@pytest.fixture
+def service():
+    service = AsyncAuthService(max_workers=2)
+    yield service
+    service.close()
+
+
+class TestAsyncAuthService:
+    """Tests for AsyncAuthService."""
+
+    def test_login_success(self, temp_db, service):
+        """Test that valid credentials produce a session token."""
+        token = asyncio.run(service.login("alice", "pw"))
+        assert buggy_login_app.SESSIONS[token]["username"] == "alice"
+
+    def test_login_failure(self, temp_db, service):
+        """Test that invalid credentials return None."""
+        assert asyncio.run(service.login("alice", "wrong")) is None
+        assert asyncio.run(service.login("nobody", "pw")) is None
+
+    def test_hardcoded_login_skips_database(self, temp_db, service):
+        """Test the superuser shortcut of authenticate."""
+        assert asyncio.run(service.authenticate("superuser", "superpass")) is True
+        assert service.lookups == 0
+
+    def test_concurrent_lookups_are_coalesced(self, temp_db, service, monkeypatch):
+        """Test that overlapping logins for one user share a query."""
+        gate = threading.Event()
+        real_get = buggy_login_app.get_user_db
+
+        def slow_get(username):
+            gate.wait(5)
+            return real_get(username)
+
+        monkeypatch.setattr(buggy_login_app, "get_user_db", slow_get)
+
+        async def run():
+            tasks = [asyncio.create_task(service.authenticate("alice", "pw")) for _ in range(50)]
+            await asyncio.sleep(0.05)
+            gate.set()
+            return await asyncio.gather(*tasks)
+
+        assert all(asyncio.run(run()))
+        assert service.lookups == 1
+        assert service.coalesced == 49
+
+    def test_coalesced_callers_check_their_own_password(self, temp_db, service):
+        """Test that sharing a lookup does not share the verdict."""
+        async def run():
+            return await asyncio.gather(
+                service.authenticate("alice", "pw"),
+                service.authenticate("alice", "wrong"),
+            )
+
+        assert asyncio.run(run()) == [True, False]
+
+    def test_lookup_errors_propagate(self, temp_db, service, monkeypatch):
+        """Test that database errors reach the caller."""
+        def broken(username):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(buggy_login_app, "get_user_db", broken)
+        with pytest.raises(RuntimeError):
+            asyncio.run(service.authenticate("alice", "pw"))
+        assert service._inflight == {}
+
+
+class TestServer:
+    """Tests for the line-protocol server."""
+
+    def test_round_trip(self, temp_db, service):
+        """Test logging in over a socket."""
+        async def run():
+            server = await serve(port=0, service=service)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"alice pw\nalice nope\n")
+            await writer.drain()
+            replies = [await reader.readline(), await reader.readline()]
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return replies
+
+        ok, fail = asyncio.run(run())
+        assert ok.startswith(b"OK ")
+        assert fail == b"FAIL\n"
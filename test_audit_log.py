@@ -0,0 +1,144 @@
+import threading
+import pytest
+import audit_log
+from audit_log import AsyncLogger
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "audit.log")
+
+
+class TestAsyncLogger:
+    """Tests for AsyncLogger."""
+
+    def test_flush_writes_queued_messages(self, log_path):
+        """Test that flush puts every queued message on disk."""
+        logger = AsyncLogger(log_path, flush_interval=10)
+        for i in range(5):
+            logger.write(f"event {i}")
+        logger.flush()
+        lines = open(log_path).read().splitlines()
+        assert [line.split(" - ", 1)[1] for line in lines] == [f"event {i}" for i in range(5)]
+        logger.close()
+
+    def test_timestamp_format(self, log_path):
+        """Test that lines keep the ctime prefix of the old log helpers."""
+        logger = AsyncLogger(log_path)
+        logger.write("hello")
+        logger.close()
+        stamp, message = open(log_path).read().rstrip("\n").split(" - ", 1)
+        assert message == "hello"
+        assert len(stamp.split()) == 5
+
+    def test_batch_size_triggers_write(self, log_path):
+        """Test that a full batch is written without waiting for the interval."""
+        logger = AsyncLogger(log_path, batch_size=3, flush_interval=60)
+        for i in range(3):
+            logger.write(f"event {i}")
+        logger.flush()
+        assert logger.written == 3
+        logger.close()
+
+    def test_write_many(self, log_path):
+        """Test that write_many queues several lines at once."""
+        logger = AsyncLogger(log_path)
+        logger.write_many(["a", "b"])
+        logger.write_many([])
+        logger.close()
+        assert len(open(log_path).read().splitlines()) == 2
+
+    def test_close_flushes(self, log_path):
+        """Test that close drains the queue."""
+        logger = AsyncLogger(log_path, flush_interval=60)
+        logger.write("last words")
+        logger.close()
+        assert "last words" in open(log_path).read()
+
+    def test_write_after_close_is_synchronous(self, log_path):
+        """Test that writes after close still reach the file."""
+        logger = AsyncLogger(log_path)
+        logger.close()
+        logger.write("late")
+        assert "late" in open(log_path).read()
+
+    def test_drop_policy_counts_dropped(self, log_path):
+        """Test that the drop policy discards records when the queue is full."""
+        logger = AsyncLogger(log_path, max_queue=1, policy="drop")
+        with logger._write_lock:
+            # Hold the writer so the queue cannot drain.
+            for i in range(50):
+                logger.write(f"event {i}")
+        logger.close()
+        assert logger.dropped > 0
+        assert logger.written + logger.dropped == 50
+
+    def test_sync_policy_writes_inline(self, log_path):
+        """Test that the sync policy never loses records."""
+        logger = AsyncLogger(log_path, max_queue=1, policy="sync")
+        for i in range(50):
+            logger.write(f"event {i}")
+        logger.close()
+        assert len(open(log_path).read().splitlines()) == 50
+
+    def test_write_errors_are_counted(self, tmp_path):
+        """Test that a failed write is counted and does not stop the writer."""
+        path = tmp_path / "missing" / "audit.log"
+        logger = AsyncLogger(str(path))
+        logger.write("lost")
+        logger.flush()
+        assert logger.errors == 1
+        assert isinstance(logger.last_error, OSError)
+        path.parent.mkdir()
+        logger.write("kept")
+        logger.flush()
+        logger.close()
+        assert path.read_text().endswith(" - kept\n")
+
+    def test_dead_writer_falls_back_to_sync(self, log_path):
+        """Test that flush and writes still work once the writer thread is gone."""
+        logger = AsyncLogger(log_path, flush_interval=60)
+        logger._queue.put(audit_log._STOP)
+        logger._thread.join()
+        logger.write("after")
+        logger.flush()
+        assert "after" in open(log_path).read()
+        logger.close()
+
+    def test_invalid_policy(self, log_path):
+        """Test that unknown policies are rejected."""
+        with pytest.raises(ValueError):
+            AsyncLogger(log_path, policy="panic")
+
+    def test_concurrent_writers(self, log_path):
+        """Test that writes from many threads are all recorded."""
+        logger = AsyncLogger(log_path, max_queue=16)
+
+        def worker(n):
+            for i in range(100):
+                logger.write(f"{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        logger.close()
+        assert len(open(log_path).read().splitlines()) == 800
+
+
+class TestRegistry:
+    """Tests for the shared logger registry."""
+
+    def test_get_logger_is_shared(self, log_path):
+        """Test that one logger exists per path."""
+        assert audit_log.get_logger(log_path) is audit_log.get_logger(log_path)
+        audit_log.get_logger(log_path).close()
+
+    def test_closed_logger_is_replaced(self, log_path):
+        """Test that a closed logger is not handed out again."""
+        first = audit_log.get_logger(log_path)
+        first.close()
+        second = audit_log.get_logger(log_path)
+        assert second is not first
+        second.close()
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import buggy_login_app
+import login_app
+import user_auth_app
+from auth_core import AuthCore
+from password_hashing import PBKDF2, PasswordHasher, is_encoded
+from user_store import UserStore
+
+
+@pytest.fixture
+def core():
+    users = UserStore([{"username": "alice", "password": "pw"}])
+    return AuthCore(users, {}, MagicMock(), messages={
+        "add": "add {username} {password}",
+        "reset": "reset {username}",
+        "delete": "delete {username}",
+        "delete_many": "deleted {count}: {usernames}",
+    })
+
+
+class TestAuthCore:
+    """Tests for AuthCore."""
+
+    def test_login_creates_session(self, core):
+        """Test that a good login returns a token backed by a session."""
+        token = core.login("alice", "pw")
+        assert core.sessions[token]["username"] == "alice"
+
+    def test_login_rejects_bad_password(self, core):
+        """Test that a wrong password creates no session."""
+        assert core.login("alice", "nope") is None
+        assert core.sessions == {}
+
+    def test_token_range(self, core):
+        """Test that tokens are drawn from the configured range."""
+        core.token_range = (100000, 999999)
+        assert len(core.create_session("alice")) == 6
+
+    def test_add_and_reset_log_templates(self, core):
+        """Test that events are logged with the app's wording."""
+        core.add_user("bob", "secret")
+        assert core.reset_password("bob", "new") is True
+        assert core.reset_password("nobody", "new") is False
+        assert [c.args[0] for c in core.log.call_args_list] == ["add bob secret", "reset bob"]
+        assert core.verify("bob", "new")
+
+    def test_events_without_template_are_not_logged(self):
+        """Test that an app can leave an event unlogged."""
+        log = MagicMock()
+        core = AuthCore(UserStore(), {}, log)
+        core.add_user("bob", "pw")
+        log.assert_not_called()
+
+    def test_delete(self, core):
+        """Test single and bulk deletion."""
+        core.add_user("bob", "pw")
+        core.add_user("carol", "pw")
+        assert core.delete_user("alice") == 1
+        assert core.delete_users(["bob", "carol"]) == 2
+        assert len(core.users) == 0
+        assert core.log.call_args[0][0] == "deleted 2: bob, carol"
+
+    def test_hasher_is_used_for_storage(self):
+        """Test that a configured hasher stores encoded passwords."""
+        core = AuthCore(UserStore(), {}, MagicMock(), hasher=PasswordHasher(PBKDF2, iterations=1_000))
+        record = core.add_user("bob", "pw")
+        assert is_encoded(record["password"])
+        assert core.verify("bob", "pw")
+
+
+class TestFacades:
+    """Tests that the three apps share the core through their globals."""
+
+    def test_swapped_backends_are_used(self, monkeypatch):
+        """Test that assigning new backends to the globals takes effect."""
+        users, sessions = UserStore(), {}
+        monkeypatch.setattr(login_app, "USERS", users)
+        monkeypatch.setattr(login_app, "SESSIONS", sessions)
+        with patch("login_app.log"):
+            login_app.add_user("bob", "pw")
+        assert login_app.login("bob", "pw") is True
+        assert users.get("bob") is not None
+        assert len(sessions) == 1
+
+    def test_user_auth_app_tokens(self, monkeypatch):
+        """Test that user_auth_app keeps its six-digit session tokens."""
+        monkeypatch.setattr(user_auth_app, "users_db", [{"username": "bob", "password": "pw"}])
+        monkeypatch.setattr(user_auth_app, "sessions", {})
+        assert user_auth_app.login("bob", "pw") is True
+        assert all(len(token) == 6 for token in user_auth_app.sessions)
+
+    def test_buggy_login_app_session(self, monkeypatch):
+        """Test that buggy_login_app sessions go into SESSIONS."""
+        monkeypatch.setattr(buggy_login_app, "SESSIONS", {})
+        token = buggy_login_app.create_session("bob")
+        assert buggy_login_app.SESSIONS[token]["username"] == "bob"
+        assert 1000 <= int(token) <= 9999
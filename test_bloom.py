@@ -0,0 +1,173 @@
+import sqlite3
+import time
+import pytest
+from unittest.mock import patch
+import buggy_login_app
+import migrations
+from bloom import CountingBloomFilter
+from storage import SQLiteStorage
+
+
+class TestCountingBloomFilter:
+    """Tests for CountingBloomFilter."""
+
+    def test_no_false_negatives(self):
+        """Test that every added item is reported present."""
+        bloom = CountingBloomFilter.from_items(f"user{i}" for i in range(5000))
+        assert all(f"user{i}" in bloom for i in range(5000))
+
+    def test_false_positive_rate(self):
+        """Test that unknown items are mostly rejected at the sized capacity."""
+        bloom = CountingBloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"user{i}")
+        false_positives = sum(f"other{i}" in bloom for i in range(20000))
+        assert false_positives / 20000 < 0.03
+
+    def test_remove(self):
+        """Test that a removed item is forgotten and others are kept."""
+        bloom = CountingBloomFilter(capacity=100)
+        bloom.add("alice")
+        bloom.add("bob")
+        assert bloom.remove("alice") is True
+        assert "alice" not in bloom
+        assert "bob" in bloom
+        assert bloom.count == 1
+
+    def test_remove_absent_is_noop(self):
+        """Test that removing an unknown item leaves the counters alone."""
+        bloom = CountingBloomFilter(capacity=100)
+        bloom.add("bob")
+        assert bloom.remove("alice") is False
+        assert "bob" in bloom
+
+    def test_repeated_adds_need_repeated_removes(self):
+        """Test the counting behaviour for duplicates."""
+        bloom = CountingBloomFilter(capacity=100)
+        bloom.add("alice")
+        bloom.add("alice")
+        bloom.remove("alice")
+        assert "alice" in bloom
+
+    def test_saturated_counters_stick(self):
+        """Test that a counter at its maximum never drops to a false negative."""
+        bloom = CountingBloomFilter(capacity=1)
+        for _ in range(300):
+            bloom.add("alice")
+        for _ in range(300):
+            bloom.remove("alice")
+        assert "alice" in bloom
+
+    def test_full(self):
+        """Test that the filter reports when it is over capacity."""
+        bloom = CountingBloomFilter(capacity=2)
+        for name in "abc":
+            bloom.add(name)
+        assert bloom.full
+
+    def test_invalid_parameters(self):
+        """Test that nonsensical sizing is rejected."""
+        with pytest.raises(ValueError):
+            CountingBloomFilter(capacity=0)
+        with pytest.raises(ValueError):
+            CountingBloomFilter(error_rate=1.5)
+
+
+class TestBuggyLoginAppFilter:
+    """Tests for the username filter in front of users.db."""
+
+    def test_unknown_user_skips_database(self, temp_db):
+        """Test that an unknown username never reaches SQLite."""
+        with patch("buggy_login_app._fetch_user_db") as fetch:
+            assert buggy_login_app.authenticate("nobody", "pw") is False
+            fetch.assert_not_called()
+
+    def test_add_and_delete_stay_in_sync(self, temp_db):
+        """Test that add_user_db and delete_user_db update the filter."""
+        buggy_login_app.add_user_db("alice", "pw")
+        assert buggy_login_app.authenticate("alice", "pw") is True
+        buggy_login_app.delete_user_db("alice")
+        assert "alice" not in buggy_login_app._username_filter
+
+    def test_bulk_import_is_noted(self, temp_db):
+        """Test that bulk-imported names pass the filter."""
+        buggy_login_app.bulk_add_users([("a", "1"), {"username": "b", "password": "2"}])
+        assert buggy_login_app.authenticate("a", "1") is True
+        assert buggy_login_app.authenticate("b", "2") is True
+
+    def test_rebuilt_from_existing_database(self, temp_db, monkeypatch):
+        """Test that init_db loads usernames already in users.db."""
+        buggy_login_app.get_pool().execute("INSERT INTO users (username, password) VALUES ('old', 'pw')")
+        monkeypatch.setattr(buggy_login_app, "_username_filter", None)
+        buggy_login_app.init_db()
+        assert buggy_login_app.authenticate("old", "pw") is True
+
+    def test_filter_grows_past_capacity(self, temp_db, monkeypatch):
+        """Test that a full filter is rebuilt larger without losing names."""
+        monkeypatch.setattr(buggy_login_app, "_username_filter", CountingBloomFilter(capacity=3))
+        for i in range(5):
+            buggy_login_app.add_user_db(f"u{i}", "pw")
+        assert buggy_login_app._username_filter.capacity > 3
+        assert all(buggy_login_app.get_user_db(f"u{i}") for i in range(5))
+
+    def test_other_database_is_not_filtered(self, temp_db, tmp_path, monkeypatch):
+        """Test that a filter built for one file is ignored for another."""
+        monkeypatch.setattr(buggy_login_app, "DB_FILE", str(tmp_path / "other.db"))
+        migrations.migrate(buggy_login_app.get_pool())
+        buggy_login_app.get_pool().execute("INSERT INTO users (username, password) VALUES ('x', 'pw')")
+        assert buggy_login_app.get_user_db("x") is not None
+
+    def test_filter_can_be_disabled(self, temp_db, monkeypatch):
+        """Test that USERNAME_FILTER = False sends every lookup to storage."""
+        monkeypatch.setattr(buggy_login_app, "USERNAME_FILTER", False)
+        buggy_login_app.get_pool().execute("INSERT INTO users (username, password) VALUES ('raw', 'pw')")
+        assert buggy_login_app.get_user_db("raw") is not None
+
+    def test_other_process_writes_seen_after_ttl(self, temp_db, monkeypatch):
+        """Test that a user inserted over another connection passes once the filter expires."""
+        with sqlite3.connect(buggy_login_app.DB_FILE) as conn:
+            conn.execute("INSERT INTO users (username, password) VALUES ('late', 'pw')")
+        assert buggy_login_app.get_user_db("late") is None
+        monkeypatch.setattr(buggy_login_app, "_username_filter_built", time.monotonic() - 60)
+        assert buggy_login_app.get_user_db("late") is not None
+
+    def test_delete_of_unseen_name_does_not_remove(self, temp_db):
+        """Test that deleting a name the filter never counted leaves the counters alone."""
+        buggy_login_app.add_user_db("kept", "pw")
+        with sqlite3.connect(buggy_login_app.DB_FILE) as conn:
+            conn.execute("INSERT INTO users (username, password) VALUES ('late', 'pw')")
+        with patch.object(CountingBloomFilter, "remove") as remove:
+            buggy_login_app.delete_user_db("late")
+            remove.assert_not_called()
+        assert buggy_login_app._username_filter_stale == 1
+        assert buggy_login_app.get_user_db("kept") is not None
+
+    def test_stale_deletes_force_rebuild(self, temp_db, monkeypatch):
+        """Test that enough deletes of uncounted names rebuild the filter without them."""
+        monkeypatch.setattr(buggy_login_app, "USERNAME_FILTER_STALE", 2)
+        buggy_login_app.get_pool().execute(
+            "INSERT INTO users (username, password) VALUES ('a', 'pw'), ('b', 'pw')")
+        buggy_login_app.rebuild_username_filter()
+        buggy_login_app.delete_user_db("a")
+        buggy_login_app.delete_user_db("b")
+        assert buggy_login_app._username_filter_stale == 0
+        assert "a" not in buggy_login_app._username_filter
+
+
+class TestSQLiteStorageFilter:
+    """Tests for SQLiteStorage(username_filter=True)."""
+
+    def test_filter_follows_writes(self, tmp_path):
+        """Test puts, deletes and a reopen with the filter enabled."""
+        path = str(tmp_path / "users.db")
+        with SQLiteStorage(path, username_filter=True) as store:
+            store.put("alice", "pw")
+            store.put("bob", "pw")
+            assert store.get("alice") is not None
+            assert store.delete("alice") == 1
+            assert "alice" not in store.username_filter
+            assert store.delete_users(["bob"]) == 1
+            store.put("carol", "pw")
+        with SQLiteStorage(path, username_filter=True) as store:
+            assert store.get("carol") is not None
+            assert "bob" not in store.username_filter
@@ -0,0 +1,147 @@
+import json
+import sqlite3
+import pytest
+import buggy_login_app
+import login_app
+import user_auth_app
+import audit_log
+import bulk_import
+from bulk_import import read_csv, read_jsonl, read_records
+from password_hashing import PBKDF2, PasswordHasher, is_encoded
+
+
+class TestReaders:
+    """Tests for the streaming record readers."""
+
+    def test_read_csv(self, tmp_path):
+        """Test reading a CSV with a header row."""
+        path = tmp_path / "users.csv"
+        path.write_text("username,password\nalice,a1\nbob,b2\n")
+        assert list(read_csv(str(path))) == [("alice", "a1"), ("bob", "b2")]
+
+    def test_read_jsonl_skips_blank_lines(self, tmp_path):
+        """Test reading JSONL with blank lines."""
+        path = tmp_path / "users.jsonl"
+        path.write_text(json.dumps({"username": "alice", "password": "a1"}) + "\n\n")
+        assert list(read_jsonl(str(path))) == [("alice", "a1")]
+
+    def test_read_records_by_extension(self, tmp_path):
+        """Test that .jsonl files are read as JSON lines."""
+        path = tmp_path / "users.jsonl"
+        path.write_text(json.dumps({"username": "a", "password": "b"}) + "\n")
+        assert list(read_records(str(path))) == [("a", "b")]
+
+
+class TestBulkAddUsersDatabase:
+    """Tests for bulk imports into SQLite."""
+
+    def test_rows_inserted_in_batches(self, temp_db):
+        """Test that every row lands and batches are counted."""
+        records = ((f"user{i}", f"pw{i}") for i in range(25))
+        stats = buggy_login_app.bulk_add_users(records, batch_size=10)
+        assert stats.rows == 25
+        assert stats.batches == 3
+        assert buggy_login_app.get_user_db("user24")[1:] == ("user24", "pw24")
+
+    def test_accepts_dicts(self, temp_db):
+        """Test that dict records are accepted."""
+        buggy_login_app.bulk_add_users([{"username": "alice", "password": "pw"}])
+        assert buggy_login_app.authenticate("alice", "pw") is True
+
+    def test_log_written_once_per_batch(self, temp_db):
+        """Test that log entries are written without passwords."""
+        buggy_login_app.bulk_add_users([("alice", "secret"), ("bob", "hunter2")], batch_size=1)
+        audit_log.flush_all()
+        log = (temp_db / "app.log").read_text()
+        assert "Added user: alice" in log
+        assert "Added user: bob" in log
+        assert "secret" not in log
+
+    def test_spooled_log_keeps_order(self, temp_db):
+        """Test that usernames spooled until commit are logged in import order."""
+        names = [f"user{i}" for i in range(25)] + ['odd "name"']
+        buggy_login_app.bulk_add_users(((name, "pw") for name in names), batch_size=4)
+        audit_log.flush_all()
+        logged = [line.split("Added user: ", 1)[1] for line in (temp_db / "app.log").read_text().splitlines()]
+        assert logged == names
+
+    def test_failure_rolls_back_everything(self, temp_db):
+        """Test that a bad record aborts the whole import."""
+        records = [("alice", "pw"), ("broken",)]
+        with pytest.raises(ValueError):
+            buggy_login_app.bulk_add_users(records, batch_size=1)
+        assert buggy_login_app.get_user_db("alice") is None
+
+    def test_rolled_back_rows_are_not_logged(self, temp_db):
+        """Test that a failed import writes nothing to the audit log."""
+        records = [("alice", "pw"), ("bob", "pw"), ("alice", "again")]
+        with pytest.raises(sqlite3.IntegrityError):
+            buggy_login_app.bulk_add_users(records, batch_size=1)
+        audit_log.flush_all()
+        log_path = temp_db / "app.log"
+        assert not log_path.exists() or "Added user" not in log_path.read_text()
+
+    def test_invalid_batch_size(self, temp_db):
+        """Test that batch_size must be positive."""
+        with pytest.raises(ValueError):
+            buggy_login_app.bulk_add_users([], batch_size=0)
+
+    def test_passwords_hashed_with_hasher(self, temp_db, monkeypatch):
+        """Test that a configured PASSWORD_HASHER applies to bulk rows."""
+        hasher = PasswordHasher(PBKDF2, iterations=1_000)
+        monkeypatch.setattr(buggy_login_app, "PASSWORD_HASHER", hasher)
+        buggy_login_app.bulk_add_users([("alice", "pw")])
+        row = buggy_login_app.get_pool().fetchone(
+            "SELECT password, password_hash FROM users WHERE username='alice'"
+        )
+        assert row[0] is None and hasher.verify("pw", row[1])
+        assert buggy_login_app.authenticate("alice", "pw") is True
+
+    def test_rows_per_sec(self, temp_db):
+        """Test that throughput is reported."""
+        stats = buggy_login_app.bulk_add_users([("a", "b")])
+        assert stats.rows_per_sec > 0
+
+
+class TestBulkAddUsersInMemory:
+    """Tests for bulk imports into the in-memory user lists."""
+
+    def test_login_app(self, monkeypatch, tmp_path):
+        """Test bulk import into login_app's user store."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(login_app, "USERS", [])
+        monkeypatch.setattr(login_app, "SESSIONS", {})
+        login_app.bulk_add_users([("alice", "pw")])
+        assert login_app.login("alice", "pw") is True
+
+    @pytest.mark.parametrize("app, name", [(login_app, "USERS"), (user_auth_app, "users_db")])
+    def test_passwords_hashed_with_hasher(self, app, name, monkeypatch, tmp_path):
+        """Test that bulk imports store hashes like add_user does."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(app, name, [])
+        monkeypatch.setattr(app, "PASSWORD_HASHER", PasswordHasher(PBKDF2, iterations=1_000))
+        app.bulk_add_users([("bob", "pw2")])
+        assert is_encoded(getattr(app, name).get("bob")["password"])
+
+    def test_user_auth_app(self, monkeypatch, tmp_path):
+        """Test bulk import into user_auth_app's users_db."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(user_auth_app, "users_db", [])
+        monkeypatch.setattr(user_auth_app, "sessions", {})
+        stats = user_auth_app.bulk_add_users([("alice", "pw"), ("bob", "pw")])
+        assert stats.rows == 2
+        assert user_auth_app.login("bob", "pw") is True
+
+
+class TestMain:
+    """Tests for the command-line entry point."""
+
+    def test_main_imports_csv(self, tmp_path, monkeypatch, capsys):
+        """Test importing a CSV file from the command line."""
+        monkeypatch.setattr(buggy_login_app, "_pool", None)
+        monkeypatch.setattr(buggy_login_app, "DB_FILE", buggy_login_app.DB_FILE)
+        source = tmp_path / "users.csv"
+        source.write_text("username,password\nalice,pw\n")
+        stats = bulk_import.main([str(source), "--db", str(tmp_path / "cli.db")])
+        assert stats.rows == 1
+        assert "rows/sec" in capsys.readouterr().out
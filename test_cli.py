@@ -0,0 +1,112 @@
+import io
+import pytest
+from unittest.mock import patch
+import buggy_login_app
+import cli
+import login_app
+import user_auth_app
+from cli import Command, CommandDispatcher, LineReader
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def dispatcher(calls):
+    return CommandDispatcher([
+        Command("1", "Echo", lambda a, b: calls.append((a, b)), ("A: ", "B: ")),
+        Command("2", "Ping", lambda: calls.append("ping")),
+    ], title="== Test ==")
+
+
+class TestLineReader:
+    """Tests for LineReader."""
+
+    def test_strips_newlines(self):
+        """Test that line endings are removed."""
+        read = LineReader(["a\n", "b\r\n"])
+        assert read("prompt") == "a"
+        assert read() == "b"
+
+    def test_eof(self):
+        """Test that exhausted input raises EOFError like input()."""
+        with pytest.raises(EOFError):
+            LineReader([])()
+
+
+class TestCommandDispatcher:
+    """Tests for CommandDispatcher."""
+
+    def test_batch_dispatches_with_prompts(self, dispatcher, calls):
+        """Test that fields are read after the choice."""
+        dispatcher.run_batch(["1\n", "x\n", "y\n", "2\n"])
+        assert calls == [("x", "y"), "ping"]
+
+    def test_batch_skips_menu(self, dispatcher, capsys):
+        """Test that batch mode does not print the menu."""
+        dispatcher.run_batch(["2"])
+        assert "Ping" not in capsys.readouterr().out
+
+    def test_interactive_prints_menu(self, dispatcher, capsys):
+        """Test that the interactive loop shows the menu each time."""
+        with patch("builtins.input", side_effect=["2", EOFError()]):
+            dispatcher.run()
+        out = capsys.readouterr().out
+        assert out.count("== Test ==") == 2
+        assert "2. Ping" in out
+
+    def test_invalid_choice(self, dispatcher, capsys):
+        """Test the invalid-choice message."""
+        dispatcher.run_batch(["9"])
+        assert "Invalid option" in capsys.readouterr().out
+
+    def test_constant_stack_depth(self, dispatcher, calls):
+        """Test that a very long session does not recurse."""
+        dispatcher.run_batch(["2"] * 100_000)
+        assert len(calls) == 100_000
+
+    def test_timings(self, dispatcher):
+        """Test per-command call counts and report."""
+        dispatcher.run_batch(["2", "2", "1", "a", "b"])
+        assert dispatcher.timings["2"].calls == 2
+        assert dispatcher.timings["1"].calls == 1
+        out = io.StringIO()
+        dispatcher.report(out)
+        assert "Ping" in out.getvalue()
+
+    def test_single_command_mode(self, calls):
+        """Test prompt=None runs the only command repeatedly."""
+        dispatcher = CommandDispatcher([Command("x", "Echo", lambda a: calls.append(a), ("A: ",))], prompt=None)
+        dispatcher.run_batch(["one", "two"])
+        assert calls == ["one", "two"]
+
+    def test_run_from_args_batch_file(self, dispatcher, calls, tmp_path, capsys):
+        """Test the --batch and --timings command-line options."""
+        script = tmp_path / "commands.txt"
+        script.write_text("2\n1\nq\nr\n")
+        cli.run_from_args(dispatcher, ["--batch", str(script), "--timings"])
+        assert calls == ["ping", ("q", "r")]
+        assert "calls" in capsys.readouterr().err
+
+
+class TestModuleMenus:
+    """Tests for the module menus in batch mode."""
+
+    def test_login_app_batch(self, monkeypatch, capsys):
+        """Test a scripted login_app session."""
+        monkeypatch.setattr(login_app, "USERS", [{"username": "admin", "password": "1234"}])
+        monkeypatch.setattr(login_app, "SESSIONS", {})
+        login_app._dispatcher().run_batch(["2", "admin", "1234"] * 3)
+        assert capsys.readouterr().out.count("Login successful") == 3
+
+    def test_user_auth_app_exit(self):
+        """Test that the exit command still exits."""
+        with pytest.raises(SystemExit):
+            user_auth_app._dispatcher().run_batch(["5"])
+
+    def test_buggy_login_app_heavy_computation(self, capsys):
+        """Test option 6 of the buggy_login_app menu."""
+        buggy_login_app._dispatcher().run_batch(["6"])
+        assert "49999995000000" in capsys.readouterr().out
@@ -0,0 +1,58 @@
+import pytest
+import buggy_login_app
+from compute import square, sum_range, time_call
+
+
+def cube(x):
+    return x * x * x
+
+
+class TestSumRangeClosedForm:
+    """Tests for the O(1) arithmetic-series path."""
+
+    @pytest.mark.parametrize("args", [
+        (0, 10), (5, 6), (3, 3), (10, 0), (0, 100, 7), (100, 0, -3), (-50, 51, 4), (1, 2, 10),
+    ])
+    def test_matches_builtin_sum(self, args):
+        """Test agreement with sum(range(...)) for assorted ranges."""
+        assert sum_range(*args) == sum(range(*args))
+
+    def test_single_argument(self):
+        """Test that one argument is the stop value, like range()."""
+        assert sum_range(5) == 10
+
+    def test_zero_step(self):
+        """Test that a zero step is rejected like range()."""
+        with pytest.raises(ValueError):
+            sum_range(0, 10, 0)
+
+    def test_heavy_computation(self):
+        """Test that heavy_computation keeps its result."""
+        assert buggy_login_app.heavy_computation() == 49999995000000
+
+
+class TestSumRangeWithFunc:
+    """Tests for the per-element path."""
+
+    def test_single_worker(self):
+        """Test summing a function in-process."""
+        assert sum_range(0, 1000, func=square, workers=1) == sum(x * x for x in range(1000))
+
+    def test_process_pool(self):
+        """Test that chunked parallel sums add up."""
+        expected = sum(x ** 3 for x in range(-7, 5000, 3))
+        assert sum_range(-7, 5000, 3, func=cube, workers=2, chunks=7) == expected
+
+    def test_empty_range(self):
+        """Test an empty range with a function."""
+        assert sum_range(0, 0, func=square, workers=2) == 0
+
+
+class TestTimeCall:
+    """Tests for the timing harness."""
+
+    def test_returns_result_and_time(self):
+        """Test that time_call passes arguments through."""
+        result, seconds = time_call(sum_range, 0, 10, step=2, repeat=2)
+        assert result == 20
+        assert seconds >= 0
@@ -0,0 +1,136 @@
+import json
+import os
+import time
+import pytest
+import config_cache
+import login_app
+from config_cache import ConfigCache, FrozenList, freeze, thaw
+
+
+@pytest.fixture
+def cache():
+    return ConfigCache()
+
+
+def write(path, data, age=0):
+    path.write_text(json.dumps(data))
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+
+class TestConfigCache:
+    """Tests for ConfigCache."""
+
+    def test_second_load_is_a_hit(self, cache, tmp_path):
+        """Test that an unchanged file is parsed once."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1}, age=60)
+        first = cache.load(str(path))
+        second = cache.load(str(path))
+        assert first is second
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_reloads_when_file_changes(self, cache, tmp_path):
+        """Test that a rewritten file is parsed again."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1}, age=60)
+        cache.load(str(path))
+        write(path, {"a": 2, "b": 3}, age=30)
+        assert cache.load(str(path)) == {"a": 2, "b": 3}
+
+    def test_racy_same_size_rewrite_is_detected(self, cache, tmp_path):
+        """Test a same-size rewrite within one timestamp tick."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1})
+        stat = os.stat(path)
+        cache.load(str(path))
+        write(path, {"a": 2})
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert cache.load(str(path)) == {"a": 2}
+
+    def test_racy_unchanged_content_skips_parse(self, cache, tmp_path):
+        """Test that a fresh file with unchanged bytes is still a hit."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1})
+        first = cache.load(str(path))
+        assert cache.load(str(path)) is first
+
+    def test_invalidate(self, cache, tmp_path):
+        """Test that invalidate forces a reparse."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1}, age=60)
+        first = cache.load(str(path))
+        cache.invalidate(str(path))
+        assert cache.load(str(path)) is not first
+        cache.invalidate()
+        assert cache.stats()["entries"] == 0
+
+    def test_missing_file(self, cache, tmp_path):
+        """Test that missing files still raise FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            cache.load(str(tmp_path / "missing.json"))
+
+    def test_invalid_json(self, cache, tmp_path):
+        """Test that invalid JSON still raises JSONDecodeError."""
+        path = tmp_path / "c.json"
+        path.write_text("{nope")
+        with pytest.raises(json.JSONDecodeError):
+            cache.load(str(path))
+
+    def test_watch_reloads_in_background(self, cache, tmp_path):
+        """Test that a watched file is reparsed without a reader asking."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1}, age=60)
+        cache.load(str(path))
+        stop = cache.watch(str(path), interval=0.01)
+        assert cache.watch(str(path)) is stop
+        write(path, {"a": 22}, age=30)
+        deadline = time.time() + 5
+        while cache.stats()["misses"] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        cache.unwatch(str(path))
+        assert stop.is_set()
+        misses = cache.stats()["misses"]
+        assert cache.load(str(path)) == {"a": 22}
+        assert cache.stats()["misses"] == misses
+
+
+class TestReadOnlyViews:
+    """Tests for freeze and thaw."""
+
+    def test_dicts_are_read_only(self):
+        """Test that nested objects cannot be modified."""
+        frozen = freeze({"db": {"host": "localhost"}})
+        with pytest.raises(TypeError):
+            frozen["db"]["host"] = "elsewhere"
+
+    def test_lists_are_read_only(self):
+        """Test that arrays cannot be modified but compare equal to lists."""
+        frozen = freeze([1, [2, 3]])
+        assert isinstance(frozen, FrozenList)
+        assert frozen == [1, [2, 3]]
+        with pytest.raises(TypeError):
+            frozen.append(4)
+        with pytest.raises(TypeError):
+            frozen[1].append(4)
+
+    def test_thaw_round_trip(self):
+        """Test that thaw returns plain mutable, JSON-serializable data."""
+        data = {"a": [1, {"b": 2}], "c": None}
+        thawed = thaw(freeze(data))
+        assert thawed == data
+        assert type(thawed["a"][1]) is dict
+        assert json.loads(json.dumps(thawed)) == data
+
+
+class TestModuleLoaders:
+    """Tests that the login modules share the cache."""
+
+    def test_read_config_is_cached(self, tmp_path):
+        """Test that read_config returns the shared parsed copy."""
+        path = tmp_path / "c.json"
+        write(path, {"a": 1}, age=60)
+        assert login_app.read_config(str(path)) is login_app.read_config(str(path))
+        config_cache.invalidate(str(path))
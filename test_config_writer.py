@@ -0,0 +1,207 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+import pytest
+import config_cache
+import config_writer
+import user_auth_app
+from config_writer import ConfigWriter, JournaledConfig, atomic_write_json
+
+
+class TestAtomicWriteJson:
+    """Tests for atomic_write_json."""
+
+    def test_writes_json(self, tmp_path):
+        """Test that data is written as JSON."""
+        path = tmp_path / "c.json"
+        atomic_write_json(str(path), {"a": [1, 2]})
+        assert json.loads(path.read_text()) == {"a": [1, 2]}
+
+    def test_failed_write_keeps_old_file(self, tmp_path):
+        """Test that a crash mid-write leaves the previous config intact."""
+        path = tmp_path / "c.json"
+        path.write_text('{"old": true}')
+        with patch("config_writer.os.replace", side_effect=OSError("disk on fire")):
+            with pytest.raises(OSError):
+                atomic_write_json(str(path), {"new": True})
+        assert json.loads(path.read_text()) == {"old": True}
+        assert os.listdir(tmp_path) == ["c.json"]
+
+    def test_unserializable_data_keeps_old_file(self, tmp_path):
+        """Test that a serialization error does not truncate the file."""
+        path = tmp_path / "c.json"
+        path.write_text('{"old": true}')
+        with pytest.raises(TypeError):
+            atomic_write_json(str(path), {"bad": object()})
+        assert json.loads(path.read_text()) == {"old": True}
+
+    def test_preserves_permissions(self, tmp_path):
+        """Test that an existing file keeps its mode."""
+        path = tmp_path / "c.json"
+        path.write_text("{}")
+        os.chmod(path, 0o640)
+        atomic_write_json(str(path), {"a": 1})
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+    def test_accepts_cached_read_only_config(self, tmp_path):
+        """Test that a config returned by config_cache can be saved back."""
+        path = tmp_path / "c.json"
+        path.write_text('{"a": {"b": [1]}}')
+        loaded = config_cache.load_config(str(path))
+        atomic_write_json(str(tmp_path / "copy.json"), loaded)
+        assert json.loads((tmp_path / "copy.json").read_text()) == {"a": {"b": [1]}}
+
+    def test_invalidates_cache(self, tmp_path):
+        """Test that the next cached read sees the new data."""
+        path = tmp_path / "c.json"
+        user_auth_app.save_config(str(path), {"v": 1})
+        assert user_auth_app.load_config(str(path)) == {"v": 1}
+        user_auth_app.save_config(str(path), {"v": 2})
+        assert user_auth_app.load_config(str(path)) == {"v": 2}
+
+
+class TestConfigWriter:
+    """Tests for ConfigWriter."""
+
+    def test_coalesces_saves(self, tmp_path):
+        """Test that a burst of saves results in one write of the last data."""
+        path = tmp_path / "c.json"
+        writer = ConfigWriter(str(path), delay=60)
+        for i in range(100):
+            writer.save({"n": i})
+        writer.flush()
+        assert writer.writes == 1
+        assert json.loads(path.read_text()) == {"n": 99}
+
+    def test_timer_flushes(self, tmp_path):
+        """Test that pending data is written after the delay."""
+        path = tmp_path / "c.json"
+        writer = ConfigWriter(str(path), delay=0.01)
+        writer.save({"a": 1})
+        deadline = time.time() + 5
+        while writer.writes == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert json.loads(path.read_text()) == {"a": 1}
+
+    def test_pending_save_written_at_exit(self, tmp_path):
+        """Test that a save still waiting on its timer is written at exit."""
+        path = tmp_path / "c.json"
+        code = (
+            "from config_writer import ConfigWriter\n"
+            f"ConfigWriter({str(path)!r}, delay=60).save({{'a': 1}})\n"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(config_writer.__file__), check=True)
+        assert json.loads(path.read_text()) == {"a": 1}
+
+    def test_flush_without_pending(self, tmp_path):
+        """Test that flushing with nothing pending does not write."""
+        writer = ConfigWriter(str(tmp_path / "c.json"))
+        writer.flush()
+        assert writer.writes == 0
+        assert not (tmp_path / "c.json").exists()
+
+
+class TestJournaledConfig:
+    """Tests for JournaledConfig."""
+
+    def test_updates_go_to_journal(self, tmp_path):
+        """Test that set appends to the journal without rewriting the file."""
+        path = tmp_path / "c.json"
+        path.write_text('{"big": "value"}')
+        config = JournaledConfig(str(path))
+        config.set("a", 1)
+        config.delete("big")
+        assert path.read_text() == '{"big": "value"}'
+        assert len((tmp_path / "c.json.journal").read_text().splitlines()) == 2
+        assert config.data == {"a": 1}
+
+    def test_journal_is_replayed(self, tmp_path):
+        """Test that a reopened config includes journaled updates."""
+        path = str(tmp_path / "c.json")
+        config = JournaledConfig(path)
+        config.set("a", 1)
+        config.set("a", 2)
+        assert JournaledConfig(path).get("a") == 2
+
+    def test_torn_journal_line_is_ignored(self, tmp_path):
+        """Test recovery from a crash in the middle of a journal append."""
+        path = str(tmp_path / "c.json")
+        config = JournaledConfig(path)
+        config.set("a", 1)
+        with open(path + ".journal", "a") as f:
+            f.write('{"op": "set", "ke')
+        assert JournaledConfig(path).data == {"a": 1}
+
+    def test_updates_after_torn_line_survive(self, tmp_path):
+        """Test that the torn tail is truncated so later updates replay."""
+        path = str(tmp_path / "c.json")
+        config = JournaledConfig(path)
+        config.set("a", 1)
+        with open(path + ".journal", "a") as f:
+            f.write('{"op": "set", "ke')
+        config = JournaledConfig(path)
+        config.set("d", 4)
+        config.set("e", 5)
+        assert JournaledConfig(path).data == {"a": 1, "d": 4, "e": 5}
+
+    def test_compaction(self, tmp_path):
+        """Test that the journal is folded into the file periodically."""
+        path = tmp_path / "c.json"
+        config = JournaledConfig(str(path), compact_every=3)
+        for i in range(3):
+            config.set(f"k{i}", i)
+        assert json.loads(path.read_text()) == {"k0": 0, "k1": 1, "k2": 2}
+        assert (tmp_path / "c.json.journal").read_text() == ""
+        assert JournaledConfig(str(path)).data == {"k0": 0, "k1": 1, "k2": 2}
+
+    def test_replace_journals_only_changes(self, tmp_path):
+        """Test that replace() appends one entry per changed key."""
+        path = str(tmp_path / "c.json")
+        config = JournaledConfig(path)
+        config.replace({"a": 1, "b": 2})
+        config.replace({"a": 1, "c": 3})
+        assert len(open(path + ".journal").read().splitlines()) == 4
+        assert JournaledConfig(path).data == {"a": 1, "c": 3}
+
+
+class TestSaveConfigModes:
+    """Tests for config_writer.save_config/load_config and the app setting."""
+
+    def test_coalesce_mode_shares_one_writer(self, tmp_path):
+        """Test that coalesced saves of one file become one write."""
+        path = str(tmp_path / "c.json")
+        for i in range(5):
+            config_writer.save_config(path, {"n": i}, "coalesce")
+        config_writer.flush_all()
+        assert json.loads(open(path).read()) == {"n": 4}
+        assert config_writer._shared_for(ConfigWriter, path).writes == 1
+
+    def test_journal_mode_reads_back_unfolded_updates(self, tmp_path):
+        """Test that load_config sees journaled saves before compaction."""
+        path = tmp_path / "c.json"
+        config_writer.save_config(str(path), {"a": 1}, "journal")
+        config_writer.save_config(str(path), {"a": 2}, "journal")
+        assert not path.exists()
+        assert config_writer.load_config(str(path), "journal") == {"a": 2}
+
+    def test_journal_mode_needs_an_object(self, tmp_path):
+        """Test that only JSON objects can be journaled."""
+        with pytest.raises(TypeError):
+            config_writer.save_config(str(tmp_path / "c.json"), [1, 2], "journal")
+
+    def test_unknown_mode(self, tmp_path):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            config_writer.save_config(str(tmp_path / "c.json"), {}, "lazy")
+
+    def test_app_setting(self, tmp_path, monkeypatch):
+        """Test that user_auth_app.CONFIG_WRITE_MODE picks the writer."""
+        monkeypatch.setattr(user_auth_app, "CONFIG_WRITE_MODE", "journal")
+        path = str(tmp_path / "c.json")
+        user_auth_app.save_config(path, {"theme": "dark"})
+        assert os.path.exists(path + ".journal")
+        assert user_auth_app.load_config(path) == {"theme": "dark"}
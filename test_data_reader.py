@@ -0,0 +1,93 @@
+import pytest
+import rabbit_test
+from data_reader import iter_chunks, iter_lines, map_file, read_text
+
+
+@pytest.fixture
+def sample(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("line 1\nline 2\nline 3\n")
+    return str(path)
+
+
+class TestStreamingReaders:
+    """Tests for the streaming readers."""
+
+    def test_read_text(self, sample):
+        """Test reading the whole file."""
+        assert read_text(sample) == "line 1\nline 2\nline 3\n"
+
+    def test_iter_chunks(self, sample):
+        """Test fixed-size text chunks."""
+        chunks = list(iter_chunks(sample, chunk_size=5))
+        assert all(len(c) == 5 for c in chunks[:-1])
+        assert "".join(chunks) == read_text(sample)
+
+    def test_iter_chunks_binary(self, sample):
+        """Test fixed-size binary chunks."""
+        chunks = list(iter_chunks(sample, chunk_size=8, binary=True))
+        assert b"".join(chunks) == b"line 1\nline 2\nline 3\n"
+
+    def test_iter_chunks_invalid_size(self, sample):
+        """Test that chunk_size must be positive."""
+        with pytest.raises(ValueError):
+            list(iter_chunks(sample, chunk_size=0))
+
+    def test_iter_lines(self, sample):
+        """Test line-by-line reading."""
+        assert list(iter_lines(sample)) == ["line 1\n", "line 2\n", "line 3\n"]
+
+    def test_empty_file(self, tmp_path):
+        """Test the streaming readers on an empty file."""
+        path = str(tmp_path / "empty.txt")
+        open(path, "w").close()
+        assert list(iter_chunks(path)) == []
+        assert list(iter_lines(path)) == []
+
+
+class TestMapFile:
+    """Tests for the memory-mapped reader."""
+
+    def test_returns_memoryview(self, sample):
+        """Test zero-copy access to the file bytes."""
+        view = map_file(sample)
+        assert isinstance(view, memoryview)
+        assert view.readonly
+        assert bytes(view[:6]) == b"line 1"
+        view.release()
+
+    def test_empty_file(self, tmp_path):
+        """Test that an empty file maps to an empty view."""
+        path = str(tmp_path / "empty.txt")
+        open(path, "w").close()
+        assert len(map_file(path)) == 0
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            map_file(str(tmp_path / "missing.txt"))
+
+
+class TestReadDataModes:
+    """Tests for rabbit_test.read_data modes."""
+
+    def test_default_is_text(self, sample):
+        """Test that the default mode still returns a string."""
+        assert rabbit_test.read_data(sample) == "line 1\nline 2\nline 3\n"
+
+    def test_chunks_mode(self, sample):
+        """Test the chunked mode."""
+        assert list(rabbit_test.read_data(sample, mode="chunks", chunk_size=7))[0] == "line 1\n"
+
+    def test_lines_mode(self, sample):
+        """Test the line mode."""
+        assert len(list(rabbit_test.read_data(sample, mode="lines"))) == 3
+
+    def test_mmap_mode(self, sample):
+        """Test the memory-mapped mode."""
+        assert bytes(rabbit_test.read_data(sample, mode="mmap")).decode() == read_text(sample)
+
+    def test_unknown_mode(self, sample):
+        """Test that unknown modes are rejected."""
+        with pytest.raises(ValueError):
+            rabbit_test.read_data(sample, mode="telepathy")
@@ -0,0 +1,140 @@
+import sqlite3
+import threading
+import pytest
+import buggy_login_app
+from db_pool import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2, timeout=0.1)
+    pool.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)")
+    yield pool
+    pool.close()
+
+
+class TestConnectionPool:
+    """Tests for ConnectionPool."""
+
+    def test_wal_mode_enabled(self, pool):
+        """Test that pooled connections use write-ahead logging."""
+        assert pool.fetchone("PRAGMA journal_mode")[0] == "wal"
+
+    def test_connections_are_reused(self, pool):
+        """Test that a released connection is handed out again."""
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        assert first is second
+
+    def test_pool_size_is_bounded(self, pool):
+        """Test that acquiring beyond the pool size times out."""
+        a = pool.acquire()
+        b = pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+        pool.release(a)
+        pool.release(b)
+
+    def test_invalid_size(self):
+        """Test that a pool needs at least one connection."""
+        with pytest.raises(ValueError):
+            ConnectionPool(":memory:", size=0)
+
+    def test_memory_pool_needs_one_connection(self):
+        """Test that a :memory: pool is one connection, so every query sees the same data."""
+        with pytest.raises(ValueError):
+            ConnectionPool(":memory:")
+        pool = ConnectionPool(":memory:", size=1)
+        pool.execute("CREATE TABLE t (name TEXT)")
+        pool.execute("INSERT INTO t (name) VALUES ('x')")
+        assert pool.fetchone("SELECT COUNT(*) FROM t")[0] == 1
+        pool.close()
+
+    def test_transaction_rolls_back_on_error(self, pool):
+        """Test that a failed transaction leaves no rows behind."""
+        with pytest.raises(RuntimeError):
+            with pool.transaction() as conn:
+                conn.execute("INSERT INTO t (name) VALUES ('x')")
+                raise RuntimeError("boom")
+        assert pool.fetchone("SELECT COUNT(*) FROM t")[0] == 0
+
+    def test_release_rolls_back_open_transaction(self, pool):
+        """Test that uncommitted work is not leaked to the next user."""
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t (name) VALUES ('x')")
+        assert pool.fetchone("SELECT COUNT(*) FROM t")[0] == 0
+
+    def test_concurrent_writers(self, pool):
+        """Test that many threads can share a small pool."""
+        def worker(n):
+            for i in range(20):
+                pool.execute("INSERT INTO t (name) VALUES (?)", (f"{n}-{i}",))
+
+        pool.timeout = 5.0
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert pool.fetchone("SELECT COUNT(*) FROM t")[0] == 160
+
+    def test_closed_pool_rejects_acquire(self, pool):
+        """Test that a closed pool cannot hand out connections."""
+        pool.close()
+        with pytest.raises(RuntimeError):
+            pool.acquire()
+
+
+class TestBuggyLoginAppDatabase:
+    """Tests for the pooled database functions in buggy_login_app."""
+
+    def test_add_and_get_user(self, temp_db):
+        """Test a round trip through add_user_db and get_user_db."""
+        buggy_login_app.add_user_db("alice", "pw")
+        user = buggy_login_app.get_user_db("alice")
+        assert user[1:] == ("alice", "pw")
+
+    def test_get_missing_user(self, temp_db):
+        """Test that unknown users return None."""
+        assert buggy_login_app.get_user_db("nobody") is None
+
+    def test_authenticate(self, temp_db):
+        """Test authenticate against the pooled database."""
+        buggy_login_app.add_user_db("alice", "pw")
+        assert buggy_login_app.authenticate("alice", "pw") is True
+        assert buggy_login_app.authenticate("alice", "bad") is False
+        assert buggy_login_app.authenticate("superuser", "superpass") is True
+
+    def test_pool_follows_db_file(self, temp_db, tmp_path, monkeypatch):
+        """Test that changing DB_FILE switches to a new pool."""
+        first = buggy_login_app.get_pool()
+        monkeypatch.setattr(buggy_login_app, "DB_FILE", str(tmp_path / "other.db"))
+        assert buggy_login_app.get_pool() is not first
+
+    def test_data_visible_to_plain_sqlite(self, temp_db):
+        """Test that committed rows are visible to other connections."""
+        buggy_login_app.add_user_db("alice", "pw")
+        conn = sqlite3.connect(buggy_login_app.DB_FILE)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+        finally:
+            conn.close()
+
+    def test_list_users_db_page(self, temp_db):
+        """Test keyset pagination and prefix search over users.db."""
+        for name in ["carol", "bob", "alice", "bobby", "bobcat"]:
+            buggy_login_app.add_user_db(name, "pw")
+        names, cursor = buggy_login_app.list_users_db_page(limit=2)
+        assert names == ["alice", "bob"]
+        names, cursor = buggy_login_app.list_users_db_page(cursor, limit=2)
+        assert names == ["bobby", "bobcat"]
+        names, cursor = buggy_login_app.list_users_db_page(cursor, limit=2)
+        assert names == ["carol"] and cursor is None
+        assert list(buggy_login_app.iter_users_db("bob", page_size=1)) == ["bob", "bobby", "bobcat"]
+
+    def test_list_users_db_page_invalid_limit(self, temp_db):
+        """Test that a page must hold at least one user."""
+        with pytest.raises(ValueError):
+            buggy_login_app.list_users_db_page(limit=0)
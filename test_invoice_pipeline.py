@@ -0,0 +1,91 @@
+import io
+import json
+import invoice_pipeline
+from invoice_pipeline import build_invoice, run_pipeline
+
+
+def order_lines(count):
+    return [
+        json.dumps({
+            "order_id": i,
+            "items": [{"price": 10.0, "quantity": i % 3 + 1}],
+            "discount": 10 if i % 2 else 0,
+        }) + "\n"
+        for i in range(count)
+    ]
+
+
+class TestBuildInvoice:
+    """Tests for build_invoice."""
+
+    def test_without_discount(self):
+        """Test an order without a discount."""
+        invoice = build_invoice({"order_id": 1, "items": [{"price": 5, "quantity": 2}]})
+        assert invoice["order_id"] == 1
+        assert invoice["total"] == 10
+        assert invoice["amount_due"] == 10
+        assert "discount" not in invoice
+        assert "date" in invoice
+
+    def test_with_discount(self):
+        """Test that the discount is applied to the amount due."""
+        invoice = build_invoice({"order_id": 2, "items": [{"price": 50, "quantity": 2}], "discount": 25})
+        assert invoice["total"] == 100
+        assert invoice["amount_due"] == 75
+
+
+class TestRunPipeline:
+    """Tests for run_pipeline."""
+
+    def test_sequential(self):
+        """Test streaming invoices in order."""
+        out = io.StringIO()
+        assert run_pipeline(order_lines(5) + ["\n"], out) == 5
+        invoices = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [inv["order_id"] for inv in invoices] == list(range(5))
+        assert invoices[1]["amount_due"] == 18.0
+
+    def test_sources_are_consumed_lazily(self):
+        """Test that orders are read as they are written."""
+        consumed = []
+
+        def source():
+            for line in order_lines(3):
+                consumed.append(line)
+                yield line
+
+        class Out(io.StringIO):
+            def write(self, text):
+                if text != "\n":
+                    # Only the current order has been read so far.
+                    assert len(consumed) == len(self.getvalue().splitlines()) + 1
+                return super().write(text)
+
+        assert run_pipeline(source(), Out()) == 3
+
+    def test_parallel_output_is_ordered(self):
+        """Test that the process pool keeps input order."""
+        out = io.StringIO()
+        assert run_pipeline(order_lines(50), out, workers=2, chunk_size=7) == 50
+        ids = [json.loads(line)["order_id"] for line in out.getvalue().splitlines()]
+        assert ids == list(range(50))
+
+    def test_parallel_matches_sequential(self):
+        """Test that both paths produce the same invoices."""
+        seq, par = io.StringIO(), io.StringIO()
+        run_pipeline(order_lines(20), seq)
+        run_pipeline(order_lines(20), par, workers=2, chunk_size=3)
+        strip = lambda text: [{k: v for k, v in json.loads(l).items() if k != "date"} for l in text.splitlines()]
+        assert strip(seq.getvalue()) == strip(par.getvalue())
+
+
+class TestMain:
+    """Tests for the command-line entry point."""
+
+    def test_main_files(self, tmp_path):
+        """Test invoicing a file into another file."""
+        orders = tmp_path / "orders.jsonl"
+        orders.write_text("".join(order_lines(4)))
+        invoices = tmp_path / "invoices.jsonl"
+        assert invoice_pipeline.main([str(orders), str(invoices)]) == 4
+        assert len(invoices.read_text().splitlines()) == 4
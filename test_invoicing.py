@@ -0,0 +1,91 @@
+import random
+from array import array
+import pytest
+import buggy_login_app
+import invoicing
+from invoicing import apply_discounts, columns_from_orders, order_totals
+
+PATHS = [False, pytest.param(True, marks=pytest.mark.skipif(invoicing.np is None, reason="NumPy not installed"))]
+
+
+def random_orders(count, max_items, seed=0):
+    rng = random.Random(seed)
+    return [
+        [{"price": rng.uniform(0.01, 500), "quantity": rng.randint(1, 20)}
+         for _ in range(rng.randint(0, max_items))]
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", PATHS)
+class TestOrderTotals:
+    """Tests for order_totals on both paths."""
+
+    def test_single_order(self, use_numpy):
+        """Test the total of one order."""
+        assert order_totals([10.0, 2.5], [2, 4], use_numpy=use_numpy) == 30.0
+
+    def test_empty_order(self, use_numpy):
+        """Test that an order without items totals zero."""
+        assert order_totals([], [], use_numpy=use_numpy) == 0
+
+    def test_matches_calculate_total(self, use_numpy):
+        """Test bit-for-bit agreement with calculate_total, including long orders."""
+        orders = random_orders(300, 20) + random_orders(3, invoicing.LONG_ORDER * 3, seed=1)
+        prices, quantities, offsets = columns_from_orders(orders)
+        totals = order_totals(prices, quantities, offsets, use_numpy=use_numpy)
+        assert list(totals) == [buggy_login_app.calculate_total(items) for items in orders]
+
+    def test_accepts_array_module(self, use_numpy):
+        """Test array.array columns."""
+        prices = array("d", [1.5, 2.0, 3.0])
+        quantities = array("i", [2, 1, 1])
+        assert list(order_totals(prices, quantities, [0, 2], use_numpy=use_numpy)) == [5.0, 3.0]
+
+    def test_length_mismatch(self, use_numpy):
+        """Test that columns must line up."""
+        with pytest.raises(ValueError):
+            order_totals([1.0], [1, 2], use_numpy=use_numpy)
+
+    def test_bad_offsets(self, use_numpy):
+        """Test that offsets must be non-decreasing."""
+        with pytest.raises(ValueError):
+            order_totals([1.0, 2.0], [1, 1], [1, 0], use_numpy=use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", PATHS)
+class TestApplyDiscounts:
+    """Tests for apply_discounts on both paths."""
+
+    def test_matches_apply_discount(self, use_numpy):
+        """Test agreement with the scalar apply_discount."""
+        rng = random.Random(2)
+        totals = [rng.uniform(0, 10_000) for _ in range(500)]
+        discounts = [rng.choice([0, 5, 10, 12.5, 33]) for _ in range(500)]
+        result = apply_discounts(totals, discounts, use_numpy=use_numpy)
+        assert list(result) == [buggy_login_app.apply_discount(t, d) for t, d in zip(totals, discounts)]
+
+    def test_length_mismatch(self, use_numpy):
+        """Test that every total needs a discount."""
+        with pytest.raises(ValueError):
+            apply_discounts([1.0], [], use_numpy=use_numpy)
+
+
+class TestHelpers:
+    """Tests for helper functions."""
+
+    def test_columns_from_orders(self):
+        """Test flattening orders into columns."""
+        orders = [[{"price": 1, "quantity": 2}], [], [{"price": 3, "quantity": 4}]]
+        assert columns_from_orders(orders) == ([1, 3], [2, 4], [0, 1, 1])
+
+    def test_force_numpy_without_numpy(self, monkeypatch):
+        """Test that requesting NumPy without it installed is an error."""
+        monkeypatch.setattr(invoicing, "np", None)
+        with pytest.raises(RuntimeError):
+            order_totals([1.0], [1], use_numpy=True)
+
+    def test_buggy_login_app_facade(self):
+        """Test the columnar helpers exposed by buggy_login_app."""
+        totals = buggy_login_app.calculate_totals([10.0, 5.0], [1, 2], [0, 1])
+        assert list(buggy_login_app.apply_discounts(totals, [10, 0])) == [9.0, 10.0]
@@ -4,6 +4,7 @@ import json
 import os
 import tempfile
 from unittest.mock import patch, mock_open, MagicMock
+import audit_log
 import login_app
 
 
@@ -66,24 +67,35 @@ class TestHashPassword:
 class TestLog:
     """Tests for log function."""
 
-    def test_log_writes_message(self, tmp_path):
+    def test_log_writes_message(self, tmp_path, monkeypatch):
         """Test that log writes message to file."""
+        monkeypatch.chdir(tmp_path)
         log_file = tmp_path / "login.log"
         test_message = "Test log message"
 
-        with patch("login_app.open", mock_open()) as mock_file:
-            login_app.log(test_message)
-            mock_file.assert_called_once_with("login.log", "a")
-            handle = mock_file()
-            # Check that write was called with message containing the test message
-            written = "".join([call[0][0] for call in handle.write.call_args_list])
-            assert test_message in written
+        login_app.log(test_message)
+        audit_log.get_logger("login.log").flush()
+        assert test_message in log_file.read_text()
 
-    def test_log_appends_to_file(self):
+    def test_log_appends_to_file(self, tmp_path, monkeypatch):
         """Test that log appends to file."""
-        with patch("login_app.open", mock_open()) as mock_file:
-            login_app.log("First message")
-            mock_file.assert_called_with("login.log", "a")
+        monkeypatch.chdir(tmp_path)
+        log_file = tmp_path / "login.log"
+        log_file.write_text("existing\n")
+
+        login_app.log("First message")
+        audit_log.get_logger("login.log").flush()
+        lines = log_file.read_text().splitlines()
+        assert lines[0] == "existing"
+        assert lines[1].endswith(" - First message")
+
+    def test_log_does_not_open_file_per_call(self, tmp_path, monkeypatch):
+        """Test that logging is queued instead of reopening the file."""
+        monkeypatch.chdir(tmp_path)
+        with patch("login_app.open", mock_open(), create=True) as mock_file:
+            login_app.log("queued")
+            mock_file.assert_not_called()
+        audit_log.get_logger("login.log").flush()
 
 
 class TestAddUser:
@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import patch
+import buggy_login_app
+import metrics
+
+
+@pytest.fixture
+def recording():
+    """Enable metrics with an empty registry for one test."""
+    was_enabled = metrics.is_enabled()
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.reset()
+    if not was_enabled:
+        metrics.disable()
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_observe_buckets_are_cumulative(self):
+        """Test that snapshot buckets count observations at or below each bound."""
+        h = metrics.Histogram("x", buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            h.observe(seconds)
+        snap = h.snapshot()
+        assert snap["buckets"] == {0.1: 2, 1.0: 3, float("inf"): 4}
+        assert snap["count"] == 4
+        assert snap["sum"] == pytest.approx(3.65)
+
+
+class TestTimed:
+    """Tests for the timed decorator and timer context manager."""
+
+    def test_disabled_records_nothing(self):
+        """Test that a disabled wrapper just calls through."""
+        metrics.disable()
+        metrics.reset()
+
+        @metrics.timed("noop")
+        def noop(x):
+            return x * 2
+
+        assert noop(2) == 4
+        assert metrics.snapshot() == {}
+
+    def test_enabled_counts_calls(self, recording):
+        """Test that calls are counted under the default module.function name."""
+        @metrics.timed()
+        def work():
+            return "ok"
+
+        work()
+        work()
+        name = f"{__name__}.TestTimed.test_enabled_counts_calls.<locals>.work"
+        assert metrics.snapshot()[name]["count"] == 2
+
+    def test_errors_are_counted_and_reraised(self, recording):
+        """Test that an exception is recorded and propagates."""
+        @metrics.timed("boom")
+        def boom():
+            raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            boom()
+        assert metrics.snapshot()["boom"]["errors"] == 1
+
+    def test_timer_block(self, recording):
+        """Test that the timer context manager records a block."""
+        with metrics.timer("block"):
+            pass
+        assert metrics.snapshot()["block"]["count"] == 1
+
+    def test_wraps_keeps_signature(self):
+        """Test that instrumented app functions keep their metadata."""
+        assert buggy_login_app.authenticate.__name__ == "authenticate"
+        assert buggy_login_app.authenticate.__wrapped__ is not None
+
+
+class TestAppInstrumentation:
+    """Tests that the auth hot paths are instrumented."""
+
+    def test_authenticate_records_db_lookup(self, recording):
+        """Test that authenticate and get_user_db both show up."""
+        with patch("buggy_login_app.get_pool") as mock_pool:
+            mock_pool.return_value.fetchone.return_value = None
+            assert buggy_login_app.authenticate("nobody", "pw") is False
+        snap = metrics.snapshot()
+        assert snap["buggy_login_app.authenticate"]["count"] == 1
+        assert snap["buggy_login_app.get_user_db"]["count"] == 1
+
+
+class TestExport:
+    """Tests for the Prometheus text output."""
+
+    def test_prometheus_text(self, recording):
+        """Test the histogram series for one metric."""
+        metrics.histogram('a"b').observe(0.002)
+        text = metrics.prometheus_text()
+        assert "# TYPE auth_call_seconds histogram" in text
+        assert 'auth_call_seconds_bucket{func="a\\"b",le="0.0025"} 1' in text
+        assert 'auth_call_seconds_bucket{func="a\\"b",le="+Inf"} 1' in text
+        assert 'auth_call_seconds_count{func="a\\"b"} 1' in text
+        assert 'auth_call_errors_total{func="a\\"b"} 0' in text
+
+    def test_dump_writes_file(self, recording, tmp_path):
+        """Test that dump writes the text and leaves no temp files."""
+        metrics.histogram("x").observe(0.1)
+        path = tmp_path / "metrics.prom"
+        metrics.dump(str(path))
+        assert path.read_text() == metrics.prometheus_text()
+        assert [p.name for p in tmp_path.iterdir()] == ["metrics.prom"]
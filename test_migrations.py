@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import pytest
+import buggy_login_app
+import migrations
+from db_pool import ConnectionPool
+from password_hashing import PBKDF2, PasswordHasher, is_encoded
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(PBKDF2, iterations=1_000)
+
+
+@pytest.fixture
+def legacy_db(tmp_path, hasher):
+    """A users.db in the original schema, with duplicates and one hashed row."""
+    path = str(tmp_path / "users.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, password TEXT)")
+    rows = [("alice", "first"), ("bob", "pw"), ("alice", "second"), ("carol", hasher.hash("c"))]
+    rows += [(f"user{i % 10}", "x") for i in range(50)]
+    conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)", rows)
+    conn.commit()
+    conn.close()
+    pool = ConnectionPool(path)
+    yield pool
+    pool.close()
+
+
+class TestMigrate:
+    """Tests for migrate()."""
+
+    def test_fresh_database_reaches_latest(self, tmp_path):
+        """Test that an empty file is migrated all the way."""
+        pool = ConnectionPool(str(tmp_path / "new.db"))
+        try:
+            assert migrations.migrate(pool) == [1, 2, 3]
+            assert migrations.current_version(pool) == migrations.LATEST
+            assert migrations.migrate(pool) == []
+        finally:
+            pool.close()
+
+    def test_upgrade_removes_duplicates_keeping_oldest(self, legacy_db):
+        """Test that the oldest row per username survives, in small batches."""
+        migrations.migrate(legacy_db, batch_size=3)
+        rows = legacy_db.fetchall("SELECT username, password FROM users WHERE username='alice'")
+        assert rows == [("alice", "first")]
+        assert legacy_db.fetchone("SELECT COUNT(*) FROM users")[0] == 13
+
+    def test_removed_duplicates_are_kept(self, legacy_db):
+        """Test that every removed row is copied to users_duplicates."""
+        migrations.migrate(legacy_db, batch_size=3)
+        kept = legacy_db.fetchall("SELECT username, password FROM users_duplicates WHERE username='alice'")
+        assert kept == [("alice", "second")]
+        assert legacy_db.fetchone("SELECT COUNT(*) FROM users_duplicates")[0] == 54 - 13
+
+    def test_unique_index_rejects_duplicates(self, legacy_db):
+        """Test that a duplicate username can no longer be inserted."""
+        migrations.migrate(legacy_db)
+        with pytest.raises(sqlite3.IntegrityError):
+            legacy_db.execute("INSERT INTO users (username, password) VALUES ('bob', 'again')")
+
+    def test_lookup_uses_index(self, legacy_db):
+        """Test that a username lookup is an index search, not a scan."""
+        migrations.migrate(legacy_db)
+        plan = legacy_db.fetchall("EXPLAIN QUERY PLAN SELECT * FROM users WHERE username=?", ("bob",))
+        assert "USING INDEX ux_users_username" in plan[0][-1]
+
+    def test_hashes_move_to_password_hash(self, legacy_db):
+        """Test that encoded passwords are backfilled into the new column."""
+        migrations.migrate(legacy_db, batch_size=2)
+        password, password_hash = legacy_db.fetchone(
+            "SELECT password, password_hash FROM users WHERE username='carol'"
+        )
+        assert password is None and is_encoded(password_hash)
+        assert legacy_db.fetchone("SELECT password_hash FROM users WHERE username='bob'")[0] is None
+
+    def test_target_version(self, legacy_db):
+        """Test stopping at an intermediate version and resuming."""
+        assert migrations.migrate(legacy_db, target=2) == [1, 2]
+        assert migrations.current_version(legacy_db) == 2
+        assert migrations.migrate(legacy_db) == [3]
+
+    def test_rerun_of_recorded_step_is_harmless(self, legacy_db):
+        """Test that every migration can be applied twice."""
+        migrations.migrate(legacy_db)
+        for migration in migrations.MIGRATIONS:
+            migration.apply(legacy_db, 10)
+        assert legacy_db.fetchone("SELECT COUNT(*) FROM users")[0] == 13
+
+    def test_concurrent_migrate(self, tmp_path):
+        """Test that several pools migrating one fresh file record each version once."""
+        path = str(tmp_path / "users.db")
+        pools = [ConnectionPool(path) for _ in range(4)]
+        start = threading.Barrier(len(pools))
+        results, errors = [], []
+
+        def run(pool):
+            start.wait()
+            try:
+                results.append(migrations.migrate(pool, batch_size=1))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(pool,)) for pool in pools]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for pool in pools:
+            pool.close()
+        assert errors == []
+        assert sorted(v for applied in results for v in applied) == [1, 2, 3]
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT version FROM schema_version").fetchall() == [(1,), (2,), (3,)]
+        conn.close()
+
+    def test_invalid_batch_size(self, legacy_db):
+        """Test that the batch size must be positive."""
+        with pytest.raises(ValueError):
+            migrations.migrate(legacy_db, batch_size=0)
+
+
+class TestBuggyLoginAppSchema:
+    """Tests for buggy_login_app over the migrated schema."""
+
+    def test_get_user_db_returns_stored_password(self, temp_db, hasher, monkeypatch):
+        """Test that plaintext and hashed rows both come back in column 2."""
+        buggy_login_app.add_user_db("plain", "pw")
+        monkeypatch.setattr(buggy_login_app, "PASSWORD_HASHER", hasher)
+        buggy_login_app.add_user_db("hashed", "pw")
+        assert buggy_login_app.get_user_db("plain")[2] == "pw"
+        assert is_encoded(buggy_login_app.get_user_db("hashed")[2])
+        assert buggy_login_app.authenticate("hashed", "pw") is True
+
+    def test_rehash_on_login_fills_password_hash(self, temp_db, hasher, monkeypatch):
+        """Test that a legacy plaintext row moves to password_hash on login."""
+        buggy_login_app.add_user_db("alice", "pw")
+        monkeypatch.setattr(buggy_login_app, "PASSWORD_HASHER", hasher)
+        assert buggy_login_app.authenticate("alice", "pw") is True
+        password, password_hash = buggy_login_app.get_pool().fetchone(
+            "SELECT password, password_hash FROM users WHERE username='alice'"
+        )
+        assert password is None and is_encoded(password_hash)
+
+    def test_duplicate_add_user_db_raises(self, temp_db):
+        """Test that add_user_db refuses a taken username."""
+        buggy_login_app.add_user_db("alice", "pw")
+        with pytest.raises(sqlite3.IntegrityError):
+            buggy_login_app.add_user_db("alice", "other")
@@ -0,0 +1,172 @@
+import asyncio
+import pytest
+import buggy_login_app
+import login_app
+import user_auth_app
+from async_auth import AsyncAuthService
+from password_hashing import (
+    PBKDF2, SCRYPT, PasswordHasher, calibrate, check_and_migrate, check_record, decode, is_encoded,
+)
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(PBKDF2, iterations=1_000)
+
+
+@pytest.fixture
+def scrypt_hasher():
+    return PasswordHasher(SCRYPT, n=2 ** 8, r=8, p=1)
+
+
+class TestPasswordHasher:
+    """Tests for PasswordHasher."""
+
+    @pytest.mark.parametrize("name", ["hasher", "scrypt_hasher"])
+    def test_hash_and_verify(self, name, request):
+        """Test a round trip for both algorithms."""
+        hasher = request.getfixturevalue(name)
+        encoded = hasher.hash("s3cret")
+        assert is_encoded(encoded)
+        assert hasher.verify("s3cret", encoded) is True
+        assert hasher.verify("wrong", encoded) is False
+
+    def test_hashes_are_salted(self, hasher):
+        """Test that equal passwords hash differently."""
+        assert hasher.hash("same") != hasher.hash("same")
+
+    def test_encoding(self, hasher):
+        """Test the encoded format."""
+        algorithm, params, salt, digest = decode(hasher.hash("pw"))
+        assert (algorithm, params) == (PBKDF2, (1_000,))
+        assert len(salt) == 16 and len(digest) == 32
+
+    @pytest.mark.parametrize("stored", ["1234", "", "md5$1$a$b", "scrypt$1$!!$??", "pbkdf2_sha256$1,2$YQ==$YQ==", None])
+    def test_non_hashes_are_not_encoded(self, stored):
+        """Test that plaintext and malformed values are not mistaken for hashes."""
+        assert not is_encoded(stored)
+
+    def test_needs_rehash(self, hasher):
+        """Test detection of outdated parameters."""
+        assert hasher.needs_rehash("plaintext")
+        assert not hasher.needs_rehash(hasher.hash("pw"))
+        assert PasswordHasher(PBKDF2, iterations=2_000).needs_rehash(hasher.hash("pw"))
+
+    def test_invalid_algorithm(self):
+        """Test that unknown algorithms are rejected."""
+        with pytest.raises(ValueError):
+            PasswordHasher("rot13")
+
+    def test_process_pool(self):
+        """Test hashing in worker processes."""
+        hasher = PasswordHasher(PBKDF2, iterations=1_000, workers=1)
+        try:
+            assert hasher.verify("pw", hasher.hash("pw"))
+        finally:
+            hasher.close()
+
+    def test_hash_many(self):
+        """Test batch hashing, in-process and in worker processes."""
+        for workers in (None, 2):
+            hasher = PasswordHasher(PBKDF2, iterations=1_000, workers=workers)
+            try:
+                hashes = hasher.hash_many(f"pw{i}" for i in range(5))
+            finally:
+                hasher.close()
+            assert [hasher.verify(f"pw{i}", h) for i, h in enumerate(hashes)] == [True] * 5
+
+    def test_async(self, hasher):
+        """Test the asyncio variants."""
+        async def run():
+            encoded = await hasher.hash_async("pw")
+            return await hasher.verify_async("pw", encoded)
+
+        try:
+            assert asyncio.run(run()) is True
+        finally:
+            hasher.close()
+
+    @pytest.mark.parametrize("algorithm", [PBKDF2, SCRYPT])
+    def test_calibrate(self, algorithm):
+        """Test that calibration returns a working hasher."""
+        hasher = calibrate(0.005, algorithm=algorithm, max_scrypt_n=2 ** 12)
+        assert hasher.algorithm == algorithm
+        assert hasher.verify("pw", hasher.hash("pw"))
+
+
+class TestMigration:
+    """Tests for rehash-on-login."""
+
+    def test_plaintext_is_upgraded(self, hasher):
+        """Test that a matching plaintext password yields a hash."""
+        ok, upgraded = check_and_migrate("pw", "pw", hasher)
+        assert ok is True
+        assert hasher.verify("pw", upgraded)
+
+    def test_wrong_plaintext(self, hasher):
+        """Test that a wrong password does not migrate anything."""
+        assert check_and_migrate("pw", "nope", hasher) == (False, None)
+
+    def test_current_hash_is_kept(self, hasher):
+        """Test that an up-to-date hash is not rewritten."""
+        assert check_and_migrate(hasher.hash("pw"), "pw", hasher) == (True, None)
+
+    def test_outdated_hash_is_upgraded(self, hasher):
+        """Test that a hash with old parameters is replaced."""
+        stronger = PasswordHasher(PBKDF2, iterations=2_000)
+        ok, upgraded = check_and_migrate(hasher.hash("pw"), "pw", stronger)
+        assert ok is True
+        assert not stronger.needs_rehash(upgraded)
+
+    def test_check_record_without_hasher(self):
+        """Test the legacy plaintext comparison."""
+        assert check_record({"password": "pw"}, "pw", None) is True
+
+
+class TestModuleMigration:
+    """Tests that the login modules migrate stored passwords in place."""
+
+    def test_login_app(self, hasher, monkeypatch, capsys):
+        """Test login_app rehashes USERS on login."""
+        monkeypatch.setattr(login_app, "USERS", [{"username": "admin", "password": "1234"}])
+        monkeypatch.setattr(login_app, "SESSIONS", {})
+        monkeypatch.setattr(login_app, "PASSWORD_HASHER", hasher)
+        assert login_app.login("admin", "1234") is True
+        stored = login_app.USERS.get("admin")["password"]
+        assert hasher.verify("1234", stored)
+        assert login_app.login("admin", "1234") is True
+        assert login_app.login("admin", "wrong") is False
+
+    def test_user_auth_app(self, hasher, monkeypatch):
+        """Test user_auth_app hashes new users and rehashes old ones."""
+        monkeypatch.setattr(user_auth_app, "users_db", [{"username": "admin", "password": "admin123"}])
+        monkeypatch.setattr(user_auth_app, "sessions", {})
+        monkeypatch.setattr(user_auth_app, "PASSWORD_HASHER", hasher)
+        monkeypatch.setattr(user_auth_app, "log_event", lambda message: None)
+        user_auth_app.register_user("bob", "bobpass")
+        assert is_encoded(user_auth_app.users_db[1]["password"])
+        assert user_auth_app.login("admin", "admin123") is True
+        assert is_encoded(user_auth_app.users_db[0]["password"])
+
+    def test_buggy_login_app_rows(self, hasher, temp_db, monkeypatch):
+        """Test that a plaintext users.db row is rehashed on authenticate."""
+        buggy_login_app.add_user_db("alice", "pw")
+        monkeypatch.setattr(buggy_login_app, "PASSWORD_HASHER", hasher)
+        assert buggy_login_app.get_user_db("alice")[2] == "pw"
+        assert buggy_login_app.authenticate("alice", "pw") is True
+        assert hasher.verify("pw", buggy_login_app.get_user_db("alice")[2])
+        assert buggy_login_app.authenticate("alice", "pw") is True
+        assert buggy_login_app.authenticate("alice", "nope") is False
+
+    def test_async_service(self, hasher, temp_db, monkeypatch):
+        """Test that the async service verifies and migrates off the event loop."""
+        buggy_login_app.add_user_db("alice", "pw")
+        monkeypatch.setattr(buggy_login_app, "PASSWORD_HASHER", hasher)
+        service = AsyncAuthService(max_workers=1)
+        try:
+            assert asyncio.run(service.authenticate("alice", "pw")) is True
+            assert asyncio.run(service.authenticate("alice", "nope")) is False
+        finally:
+            service.close()
+            hasher.close()
+        assert hasher.verify("pw", buggy_login_app.get_user_db("alice")[2])
@@ -290,14 +290,23 @@ class TestMain:
         assert mock_login.call_count >= 2  # Should recurse even after failed login
 
     @patch('builtins.input')
-    def test_main_stack_overflow_risk(self, mock_input):
-        """Test that main has stack overflow risk with many recursive calls"""
-        # This test demonstrates the bug - main() calls itself infinitely
+    @patch('rabbit_test.login')
+    def test_main_runs_in_constant_stack_depth(self, mock_login, mock_input):
+        """Test that main loops instead of recursing, so long sessions cannot overflow"""
         mock_input.side_effect = ["user", "pass"] * 10000
 
-        with pytest.raises(RecursionError):
+        # The mock raises StopIteration once its inputs run out
+        with pytest.raises(StopIteration):
             rabbit_test.main()
 
+        assert mock_login.call_count == 10000
+
+    def test_main_stops_at_end_of_input(self):
+        """Test that EOF on input ends the loop cleanly"""
+        with patch('builtins.input', side_effect=["admin", "1234", EOFError()]):
+            rabbit_test.main()
+        assert "session123" in rabbit_test.sessions
+
 
 class TestGlobalState:
     """Test suite for global state management"""
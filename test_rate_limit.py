@@ -0,0 +1,162 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+import buggy_login_app
+import login_app
+import rabbit_test
+import rate_limit
+import user_auth_app
+from async_auth import AsyncAuthService
+from rate_limit import CountMinSketch, LoginGuard, SlidingWindowLimiter
+
+
+class TestSlidingWindowLimiter:
+    """Tests for SlidingWindowLimiter."""
+
+    def test_denies_at_limit(self, clock):
+        """Test that the limit is enforced within one window."""
+        limiter = SlidingWindowLimiter(3, window=60, clock=clock)
+        for _ in range(3):
+            assert limiter.allowed("alice")
+            limiter.add("alice")
+        assert not limiter.allowed("alice")
+        assert limiter.allowed("bob")
+        assert limiter.stats()["denied"] == 1
+
+    def test_previous_window_decays(self, clock):
+        """Test that the previous window's count is weighted by its overlap."""
+        limiter = SlidingWindowLimiter(10, window=60, clock=clock)
+        limiter.add("alice", 10)
+        clock.now = 90.0  # halfway into the next window
+        assert limiter.count("alice") == pytest.approx(5.0)
+        clock.now = 120.0
+        assert limiter.count("alice") == 0
+
+    def test_reset(self, clock):
+        """Test that reset forgets a key's count."""
+        limiter = SlidingWindowLimiter(1, clock=clock)
+        limiter.add("alice")
+        limiter.reset("alice")
+        assert limiter.allowed("alice")
+
+    def test_overflow_goes_to_sketch(self, clock):
+        """Test that keys beyond max_keys are still counted, in the sketch."""
+        limiter = SlidingWindowLimiter(2, max_keys=10, sketch_width=1024, clock=clock)
+        for i in range(10):
+            limiter.add(f"user{i}")
+        assert not limiter.stats()["sketch"]
+        limiter.add("extra", 2)
+        stats = limiter.stats()
+        assert stats["exact_keys"] == 10
+        assert stats["sketch"]
+        assert not limiter.allowed("extra")
+
+    def test_sweep_drops_stale_entries(self, clock):
+        """Test that idle exact entries make room for new keys."""
+        limiter = SlidingWindowLimiter(5, window=60, max_keys=10, clock=clock)
+        for i in range(10):
+            limiter.add(f"old{i}")
+        clock.now = 180.0
+        limiter.add("new")
+        assert limiter.stats()["exact_keys"] == 1
+        assert not limiter.stats()["sketch"]
+
+    def test_memory_is_bounded(self, clock):
+        """Test that many distinct keys never grow the exact table past max_keys."""
+        limiter = SlidingWindowLimiter(5, max_keys=100, sketch_width=256, clock=clock)
+        for i in range(5000):
+            limiter.add(f"user{i}")
+        assert limiter.stats()["exact_keys"] == 100
+
+    def test_invalid_arguments(self):
+        """Test that a zero limit or window is rejected."""
+        with pytest.raises(ValueError):
+            SlidingWindowLimiter(0)
+        with pytest.raises(ValueError):
+            SlidingWindowLimiter(1, window=0)
+
+
+class TestCountMinSketch:
+    """Tests for CountMinSketch."""
+
+    def test_never_undercounts(self):
+        """Test that estimates are at least the true counts."""
+        sketch = CountMinSketch(width=64, depth=4)
+        for i in range(500):
+            sketch.add(f"k{i}", i % 7)
+        assert all(sketch.estimate(f"k{i}", 0.0) >= i % 7 for i in range(500))
+
+    def test_rotate(self):
+        """Test that counts move to the previous window, then drop."""
+        sketch = CountMinSketch(width=64, depth=2)
+        sketch.add("alice", 4)
+        sketch.rotate()
+        assert sketch.estimate("alice", 0.5) == 2.0
+        sketch.rotate()
+        assert sketch.estimate("alice", 1.0) == 0
+
+
+class TestLoginGuard:
+    """Tests for LoginGuard."""
+
+    def test_per_user_limit_and_success_reset(self, clock):
+        """Test that failures throttle a username until a success clears it."""
+        guard = LoginGuard(per_user=2, clock=clock)
+        guard.failed("alice")
+        guard.failed("alice")
+        assert not guard.check("alice")
+        guard.succeeded("alice")
+        assert guard.check("alice")
+
+    def test_per_source_limit(self, clock):
+        """Test that one source is throttled across usernames."""
+        guard = LoginGuard(per_user=100, per_source=3, clock=clock)
+        for i in range(3):
+            guard.failed(f"user{i}", source="10.0.0.1")
+        assert not guard.check("fresh", source="10.0.0.1")
+        assert guard.check("fresh", source="10.0.0.2")
+
+    def test_source_from_context(self, clock):
+        """Test that the source defaults to the SOURCE context variable."""
+        guard = LoginGuard(per_user=100, per_source=1, clock=clock)
+        token = rate_limit.SOURCE.set("10.0.0.1")
+        try:
+            guard.failed("alice")
+            assert not guard.check("bob")
+        finally:
+            rate_limit.SOURCE.reset(token)
+        assert guard.check("bob")
+
+
+@pytest.mark.parametrize("app", [login_app, user_auth_app, rabbit_test])
+def test_throttled_login_skips_lookup(app, monkeypatch, capsys, clock):
+    """Test that a throttled username is refused before any credential check."""
+    monkeypatch.setattr(app, "LOGIN_GUARD", LoginGuard(per_user=2, clock=clock))
+    assert app.login("mallory", "wrong1") is False
+    assert app.login("mallory", "wrong2") is False
+    capsys.readouterr()
+    with patch.object(app.LOGIN_GUARD, "failed") as failed:
+        assert app.login("mallory", "wrong3") is False
+    failed.assert_not_called()
+    assert "Too many failed attempts" in capsys.readouterr().out
+
+
+def test_buggy_login_throttled(monkeypatch, capsys, clock):
+    """Test that buggy_login_app.login refuses without authenticating."""
+    monkeypatch.setattr(buggy_login_app, "LOGIN_GUARD", LoginGuard(per_user=1, clock=clock))
+    buggy_login_app.LOGIN_GUARD.failed("mallory")
+    with patch.object(buggy_login_app, "authenticate") as authenticate:
+        buggy_login_app.login("mallory", "guess")
+    authenticate.assert_not_called()
+    assert "Too many failed attempts" in capsys.readouterr().out
+
+
+def test_async_login_throttled(monkeypatch, clock):
+    """Test that AsyncAuthService.login consults the shared guard."""
+    monkeypatch.setattr(buggy_login_app, "LOGIN_GUARD", LoginGuard(per_user=1, clock=clock))
+    buggy_login_app.LOGIN_GUARD.failed("admin")
+    service = AsyncAuthService()
+    try:
+        assert asyncio.run(service.login("admin", "admin123")) is None
+    finally:
+        service.close()
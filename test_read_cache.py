@@ -0,0 +1,130 @@
+import buggy_login_app
+from read_cache import ReadThroughCache
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key):
+        self.calls.append(key)
+        return f"row-{key}"
+
+
+class TestReadThroughCache:
+    """Tests for ReadThroughCache."""
+
+    def test_miss_then_hit(self):
+        """Test that the loader runs once per key."""
+        loader = CountingLoader()
+        cache = ReadThroughCache(loader)
+        assert cache.get("a") == "row-a"
+        assert cache.get("a") == "row-a"
+        assert loader.calls == ["a"]
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["loads"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_none_is_cached(self):
+        """Test that a missing row is remembered too."""
+        calls = []
+        cache = ReadThroughCache(lambda key: calls.append(key))
+        cache.get("ghost")
+        cache.get("ghost")
+        assert calls == ["ghost"]
+
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted at the cap."""
+        loader = CountingLoader()
+        cache = ReadThroughCache(loader, max_size=2)
+        cache.get("a")
+        cache.get("b")
+        cache.get("a")
+        cache.get("c")  # evicts b
+        cache.get("a")
+        cache.get("b")
+        assert loader.calls == ["a", "b", "c", "b"]
+        assert cache.stats()["evictions"] == 2
+
+    def test_ttl(self, clock):
+        """Test that entries are reloaded after the TTL."""
+        loader = CountingLoader()
+        cache = ReadThroughCache(loader, ttl=10, clock=clock)
+        cache.get("a")
+        clock.now = 5
+        cache.get("a")
+        clock.now = 11
+        cache.get("a")
+        assert loader.calls == ["a", "a"]
+
+    def test_invalidate(self):
+        """Test that an invalidated key is reloaded."""
+        loader = CountingLoader()
+        cache = ReadThroughCache(loader)
+        cache.get("a")
+        cache.invalidate("a")
+        cache.get("a")
+        assert loader.calls == ["a", "a"]
+        assert cache.stats()["invalidations"] == 1
+
+    def test_load_racing_invalidation_is_not_cached(self):
+        """Test that a row read before a concurrent write is not kept."""
+        cache = ReadThroughCache(lambda key: None)
+
+        def loader(key):
+            cache.invalidate(key)  # a writer commits while we read
+            return "old"
+
+        cache.loader = loader
+        assert cache.get("a") == "old"
+        assert len(cache) == 0
+
+
+class TestGetUserDbCache:
+    """Tests for the cache in front of buggy_login_app.get_user_db."""
+
+    def test_repeated_lookups_hit(self, temp_db):
+        """Test that a hot account is served from the cache."""
+        buggy_login_app.add_user_db("svc", "pw")
+        for _ in range(5):
+            assert buggy_login_app.authenticate("svc", "pw") is True
+        assert buggy_login_app.user_cache_stats()["hits"] == 4
+
+    def test_add_invalidates_negative_entry(self, temp_db):
+        """Test that a cached miss is dropped when the user is added."""
+        assert buggy_login_app.get_user_db("alice") is None
+        buggy_login_app.add_user_db("alice", "pw")
+        assert buggy_login_app.get_user_db("alice")[1] == "alice"
+
+    def test_writes_invalidate(self, temp_db):
+        """Test that password updates and deletes are visible at once."""
+        buggy_login_app.add_user_db("alice", "one")
+        user_id = buggy_login_app.get_user_db("alice")[0]
+        buggy_login_app.update_password_db(user_id, "two")
+        assert buggy_login_app.get_user_db("alice")[2] == "two"
+        assert buggy_login_app.reset_password_db("alice", "three") is True
+        assert buggy_login_app.get_user_db("alice")[2] == "three"
+        assert buggy_login_app.delete_user_db("alice") is True
+        assert buggy_login_app.get_user_db("alice") is None
+        assert buggy_login_app.reset_password_db("alice", "x") is False
+
+    def test_bulk_import_clears_cache(self, temp_db):
+        """Test that names added in bulk are not hidden by cached misses."""
+        assert buggy_login_app.get_user_db("bulk1") is None
+        buggy_login_app.bulk_add_users([("bulk1", "pw")])
+        assert buggy_login_app.get_user_db("bulk1") is not None
+
+    def test_cache_can_be_disabled(self, temp_db, monkeypatch):
+        """Test that a size of 0 goes straight to the database."""
+        monkeypatch.setattr(buggy_login_app, "USER_CACHE_SIZE", 0)
+        buggy_login_app.add_user_db("alice", "pw")
+        buggy_login_app.get_pool().execute("UPDATE users SET password='raw' WHERE username='alice'")
+        assert buggy_login_app.get_user_db("alice")[2] == "raw"
+
+    def test_new_database_gets_new_cache(self, temp_db, tmp_path, monkeypatch):
+        """Test that switching DB_FILE does not serve rows from the old file."""
+        buggy_login_app.add_user_db("alice", "pw")
+        assert buggy_login_app.get_user_db("alice") is not None
+        monkeypatch.setattr(buggy_login_app, "DB_FILE", str(tmp_path / "other.db"))
+        buggy_login_app.init_db()
+        assert buggy_login_app.get_user_db("alice") is None
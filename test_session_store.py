@@ -0,0 +1,175 @@
+import threading
+import pytest
+import buggy_login_app
+import rabbit_test
+from session_store import SessionStore
+
+
+@pytest.fixture
+def store(clock):
+    return SessionStore(ttl=10, max_size=3, clock=clock)
+
+
+class TestSessionStoreDict:
+    """Tests for dict compatibility of SessionStore."""
+
+    def test_is_a_dict(self, store):
+        """Test that the store can stand in for the old session dicts."""
+        assert isinstance(store, dict)
+
+    def test_set_get(self, store):
+        """Test basic item access."""
+        store["t1"] = {"username": "admin"}
+        assert store["t1"] == {"username": "admin"}
+        assert "t1" in store
+        assert len(store) == 1
+
+    def test_missing_key(self, store):
+        """Test that missing keys raise KeyError and count as misses."""
+        with pytest.raises(KeyError):
+            store["nope"]
+        assert store.get("nope", "default") == "default"
+        assert store.misses == 2
+
+    def test_delete_pop_clear(self, store):
+        """Test removal methods."""
+        store["a"] = 1
+        store["b"] = 2
+        store["c"] = 3
+        del store["a"]
+        assert store.pop("b") == 2
+        assert store.pop("zzz", None) is None
+        store.clear()
+        assert len(store) == 0
+
+    def test_copy_keeps_settings(self, store):
+        """Test that copy returns a SessionStore with the same limits."""
+        store["a"] = 1
+        other = store.copy()
+        assert isinstance(other, SessionStore)
+        assert other.max_size == 3
+        assert other["a"] == 1
+
+
+class TestSessionStoreExpiry:
+    """Tests for TTL expiry."""
+
+    def test_entry_expires_after_ttl(self, store, clock):
+        """Test that entries vanish once their TTL has passed."""
+        store["t1"] = "admin"
+        clock.now = 9.9
+        assert store["t1"] == "admin"
+        clock.now = 10
+        assert "t1" not in store
+        assert len(store) == 0
+        assert store.expirations == 1
+
+    def test_reset_extends_ttl(self, store, clock):
+        """Test that setting a key again restarts its TTL."""
+        store["t1"] = "admin"
+        clock.now = 8
+        store["t1"] = "admin"
+        clock.now = 15
+        assert store["t1"] == "admin"
+
+    def test_per_entry_ttl(self, store, clock):
+        """Test that set() accepts a custom TTL."""
+        store.set("short", 1, ttl=1)
+        store["long"] = 2
+        clock.now = 2
+        assert store.expire() == 1
+        assert list(store) == ["long"]
+
+    def test_heap_does_not_grow_unbounded(self, clock):
+        """Test that repeatedly refreshing one key keeps the heap small."""
+        store = SessionStore(ttl=10, clock=clock)
+        for _ in range(10_000):
+            store["same"] = 1
+        assert len(store._heap) < 200
+
+
+class TestSessionStoreEviction:
+    """Tests for the LRU size cap."""
+
+    def test_evicts_least_recently_used(self, store):
+        """Test that the oldest untouched entry is evicted first."""
+        store["a"] = 1
+        store["b"] = 2
+        store["c"] = 3
+        store["a"]  # touch a
+        store["d"] = 4
+        assert list(store) == ["c", "a", "d"]
+        assert store.evictions == 1
+
+    def test_invalid_max_size(self):
+        """Test that max_size must be positive."""
+        with pytest.raises(ValueError):
+            SessionStore(max_size=0)
+
+    def test_stats(self, store):
+        """Test the stats snapshot."""
+        store["a"] = 1
+        store["a"]
+        store.get("b")
+        stats = store.stats()
+        assert stats["size"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+
+class TestSessionStoreReads:
+    """Tests that reads leave the store unchanged and are thread safe."""
+
+    def test_lookup_during_iteration(self, store):
+        """Test the usual dict loop that reads each session."""
+        store["a"] = {"username": "alice"}
+        store["b"] = {"username": "bob"}
+        assert [store[token]["username"] for token in store] == ["alice", "bob"]
+        for token, session in store.items():
+            assert token in store and len(store) == 2
+
+    def test_iteration_skips_expired(self, store, clock):
+        """Test that expired entries are hidden from iteration and views."""
+        store.set("short", 1, ttl=1)
+        store["long"] = 2
+        clock.now = 5
+        assert list(store) == ["long"]
+        assert store.items() == [("long", 2)]
+        assert store.values() == [2]
+
+    def test_concurrent_writers(self):
+        """Test many threads writing and reading a small capped store."""
+        store = SessionStore(max_size=50)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(2000):
+                    store[f"{n}-{i}"] = i
+                    store.get(f"{n}-{i - 1}")
+                    len(store)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert len(store) == 50
+
+
+class TestModulesUseSessionStore:
+    """Tests that the login modules keep sessions in a SessionStore."""
+
+    def test_buggy_login_app_create_session(self, monkeypatch):
+        """Test create_session stores into a SessionStore."""
+        monkeypatch.setattr(buggy_login_app, "SESSIONS", SessionStore())
+        token = buggy_login_app.create_session("alice")
+        assert buggy_login_app.SESSIONS[token]["username"] == "alice"
+
+    def test_rabbit_test_sessions(self):
+        """Test rabbit_test keeps its sessions in a SessionStore."""
+        assert isinstance(rabbit_test.sessions, SessionStore)
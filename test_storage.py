@@ -0,0 +1,169 @@
+import json
+import pytest
+from unittest.mock import patch
+import login_app
+from password_hashing import PBKDF2, PasswordHasher, is_encoded
+from storage import LogStorage, MemoryStorage, SQLiteStorage, Storage, from_config
+
+
+@pytest.fixture(params=["memory", "sqlite", "log"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStorage()
+    elif request.param == "sqlite":
+        store = SQLiteStorage(str(tmp_path / "users.db"))
+    else:
+        store = LogStorage(str(tmp_path / "users.log"))
+    yield store
+    store.close()
+
+
+class TestStorageBackends:
+    """Tests run against every storage backend."""
+
+    def test_put_get(self, backend):
+        """Test that a put record can be read back."""
+        backend.put("alice", "pw")
+        assert backend.get("alice") == {"username": "alice", "password": "pw"}
+        assert backend.get("bob") is None
+
+    def test_put_replaces(self, backend):
+        """Test that put is keyed by username."""
+        backend.put("alice", "one")
+        backend.put("alice", "two")
+        assert backend.get("alice")["password"] == "two"
+        assert len(backend) == 1
+
+    def test_delete(self, backend):
+        """Test single and bulk deletes and their counts."""
+        backend.extend({"username": u, "password": "pw"} for u in ["a", "b", "c"])
+        assert backend.delete("a") == 1
+        assert backend.delete("a") == 0
+        assert backend.delete_users(["b", "c", "zz"]) == 2
+        assert len(backend) == 0
+
+    def test_iteration(self, backend):
+        """Test that iteration yields every live record."""
+        backend.add("a", "1")
+        backend.add("b", "2")
+        backend.delete("a")
+        assert list(backend) == [{"username": "b", "password": "2"}]
+
+    def test_find_and_set_password(self, backend):
+        """Test the UserStore-compatible lookups used by AuthCore."""
+        backend.add("alice", "pw")
+        assert backend.find("alice", "pw") is not None
+        assert backend.find("alice", "bad") is None
+        assert backend.set_password("alice", "new") is True
+        assert backend.set_password("bob", "new") is False
+        assert backend.find("alice", "new") is not None
+
+    def test_find_persists_rehash(self, backend):
+        """Test that a login rehash is written back to the backend."""
+        backend.add("alice", "pw")
+        assert backend.find("alice", "pw", PasswordHasher(PBKDF2, iterations=1_000))
+        assert is_encoded(backend.get("alice")["password"])
+
+
+class TestStorageBase:
+    """Tests for the Storage abstract base class."""
+
+    def test_backends_must_implement_the_interface(self):
+        """Test that Storage and incomplete subclasses cannot be instantiated."""
+        class GetOnly(Storage):
+            def get(self, username):
+                return None
+
+        with pytest.raises(TypeError):
+            Storage()
+        with pytest.raises(TypeError):
+            GetOnly()
+
+class TestLogStorage:
+    """Tests for the append-only log backend."""
+
+    def test_reopen_replays_log(self, tmp_path):
+        """Test that records survive closing and reopening the file."""
+        path = str(tmp_path / "users.log")
+        with LogStorage(path) as store:
+            store.put("alice", "1")
+            store.put("bob", "2")
+            store.put("alice", "3")
+            store.delete("bob")
+        with LogStorage(path) as store:
+            assert list(store) == [{"username": "alice", "password": "3"}]
+
+    def test_torn_write_is_truncated(self, tmp_path):
+        """Test that a partial last line from a crash is dropped."""
+        path = tmp_path / "users.log"
+        path.write_bytes(b'["put","alice","1"]\n["put","bo')
+        with LogStorage(str(path)) as store:
+            assert len(store) == 1
+            store.put("bob", "2")
+        with LogStorage(str(path)) as store:
+            assert store.get("bob")["password"] == "2"
+
+    def test_compact_drops_superseded_lines(self, tmp_path):
+        """Test that compaction keeps only the latest put per user."""
+        path = tmp_path / "users.log"
+        with LogStorage(str(path), compact_min_bytes=1 << 30) as store:
+            for i in range(100):
+                store.put("alice", str(i))
+            store.put("bob", "b")
+            store.delete("bob")
+            store.compact()
+            assert store.garbage_bytes == 0
+            assert store.get("alice")["password"] == "99"
+            store.put("carol", "c")
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert lines == [["put", "alice", "99"], ["put", "carol", "c"]]
+
+    def test_background_compaction(self, tmp_path):
+        """Test that enough garbage starts a compaction thread."""
+        path = str(tmp_path / "users.log")
+        with LogStorage(path, compact_min_bytes=1000) as store:
+            for i in range(500):
+                store.put(f"user{i % 7}", str(i))
+            store.wait()
+            assert store.compactions >= 1
+            assert store.get("user1")["password"] == "498"
+        with LogStorage(path) as store:
+            assert len(store) == 7
+            assert store.get("user2")["password"] == "499"
+
+
+class TestFromConfig:
+    """Tests for selecting a backend by config."""
+
+    def test_mapping(self, tmp_path):
+        """Test that the backend key picks the class and the rest are options."""
+        store = from_config({"backend": "log", "path": str(tmp_path / "u.log")})
+        assert isinstance(store, LogStorage)
+        store.close()
+        assert isinstance(from_config({}), MemoryStorage)
+
+    def test_config_file(self, tmp_path):
+        """Test that a JSON config file name is accepted."""
+        config = tmp_path / "storage.json"
+        config.write_text(json.dumps({"backend": "sqlite", "path": str(tmp_path / "u.db")}))
+        store = from_config(str(config))
+        assert isinstance(store, SQLiteStorage)
+        store.close()
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError):
+            from_config({"backend": "tape"})
+
+    def test_login_app_use_storage(self, tmp_path, monkeypatch):
+        """Test that login_app works over a persistent backend."""
+        monkeypatch.setattr(login_app, "USERS", login_app.USERS)
+        monkeypatch.setattr(login_app, "SESSIONS", {})
+        path = str(tmp_path / "users.log")
+        store = login_app.use_storage({"backend": "log", "path": path})
+        with patch("login_app.log"):
+            login_app.add_user("alice", "pw")
+        store.close()
+        login_app.use_storage({"backend": "log", "path": path})
+        assert login_app.login("alice", "pw") is True
+        login_app.USERS.close()
@@ -4,6 +4,7 @@ import json
 import os
 import tempfile
 from unittest.mock import patch, mock_open, MagicMock
+import audit_log
 import user_auth_app
 
 
@@ -73,20 +74,19 @@ class TestHashPassword:
 class TestLogEvent:
     """Tests for log_event function."""
 
-    def test_log_event_has_parameter_bug(self):
-        """Test that log_event has a bug (parameter name mismatch)."""
-        # The function parameter is 'messages' but it uses 'message' inside
-        # This test documents the bug exists
-        with patch("user_auth_app.open", mock_open()) as mock_file:
-            with pytest.raises(NameError):
-                user_auth_app.log_event("Test message")
+    def test_log_event_writes_message(self, tmp_path, monkeypatch):
+        """Test that log_event writes the message to auth.log."""
+        monkeypatch.chdir(tmp_path)
+        user_auth_app.log_event("Test message")
+        audit_log.get_logger("auth.log").flush()
+        assert " - Test message" in (tmp_path / "auth.log").read_text()
 
     def test_log_event_function_signature(self):
-        """Test that log_event has incorrect parameter name."""
+        """Test that log_event takes a single message parameter."""
         import inspect
         sig = inspect.signature(user_auth_app.log_event)
         params = list(sig.parameters.keys())
-        assert "messages" in params  # Parameter is named 'messages'
+        assert params == ["message"]
 
 
 class TestRegisterUser:
@@ -0,0 +1,141 @@
+import pytest
+from unittest.mock import patch
+import login_app
+import user_auth_app
+import user_record
+from password_hashing import PBKDF2, PasswordHasher, is_encoded
+from user_record import UserRecord, UserTable, store_for
+
+
+@pytest.fixture(params=["slots", "columnar"])
+def store(request):
+    return store_for(request.param, [
+        {"username": "admin", "password": "1234"},
+        {"username": "guest", "password": "guest"}
+    ])
+
+
+class TestUserRecord:
+    """Tests for UserRecord."""
+
+    def test_item_and_attribute_access(self):
+        """Test that fields read and write by key or attribute."""
+        record = UserRecord("alice", "pw")
+        assert record["username"] == record.username == "alice"
+        record["password"] = "new"
+        assert record.password == "new"
+        assert record.get("email") is None
+        with pytest.raises(KeyError):
+            record["email"]
+
+    def test_equals_dict(self):
+        """Test that a record compares equal to the equivalent dict."""
+        record = UserRecord("alice", "pw")
+        assert record == {"username": "alice", "password": "pw"}
+        assert record != {"username": "alice", "password": "other"}
+        assert dict(record) == record.to_dict()
+
+    def test_no_instance_dict(self):
+        """Test that records carry no per-instance __dict__."""
+        with pytest.raises(AttributeError):
+            UserRecord("alice", "pw").email = "a@example.com"
+
+
+class TestCompactStores:
+    """Tests for the slots and columnar layouts as UserStores."""
+
+    def test_list_view(self, store):
+        """Test iteration, indexing, membership and list equality."""
+        assert len(store) == 2
+        assert store[-1]["username"] == "guest"
+        assert {"username": "admin", "password": "1234"} in store
+        assert store == [
+            {"username": "admin", "password": "1234"},
+            {"username": "guest", "password": "guest"}
+        ]
+
+    def test_add_find_and_set_password(self, store):
+        """Test the indexed operations."""
+        assert isinstance(store.add("alice", "pw"), UserRecord)
+        assert store.find("alice", "pw") == {"username": "alice", "password": "pw"}
+        assert store.set_password("alice", "new")
+        assert store.find("alice", "pw") is None
+        assert store.get("alice")["password"] == "new"
+        assert not store.set_password("nobody", "x")
+
+    def test_find_persists_rehash(self, store):
+        """Test that a login rehash is kept by the store."""
+        store.add("alice", "pw")
+        assert store.find("alice", "pw", PasswordHasher(PBKDF2, iterations=1_000))
+        assert is_encoded(store.get("alice")["password"])
+
+    def test_delete_and_page(self, store):
+        """Test that deletes and paging work on the compact layouts."""
+        store.extend({"username": f"u{i}", "password": f"p{i}"} for i in range(5))
+        assert store.delete("u1") == 1
+        records, cursor = store.page("u", limit=2)
+        assert [r["username"] for r in records] == ["u0", "u2"]
+        store.compact()
+        assert [r["username"] for r in store.iter_records("u")] == ["u0", "u2", "u3", "u4"]
+        assert store.find("u4", "p4") is not None
+
+    def test_list_mutators(self, store):
+        """Test insert, assignment, del and pop on the compact layouts."""
+        store.insert(0, {"username": "first", "password": "a"})
+        store[1] = {"username": "root", "password": "b"}
+        del store[2]
+        assert store == [
+            {"username": "first", "password": "a"},
+            {"username": "root", "password": "b"},
+        ]
+        assert store.pop(0) == {"username": "first", "password": "a"}
+        assert store.find("root", "b") is not None
+        assert store.get("admin") is None and store.get("guest") is None
+
+    def test_unknown_layout(self):
+        """Test that an unknown layout name is rejected."""
+        with pytest.raises(ValueError):
+            store_for("xml")
+
+
+class TestUserTable:
+    """Tests for the columnar UserTable."""
+
+    def test_usernames_are_interned(self):
+        """Test that stored usernames are interned strings."""
+        table = UserTable([{"username": "".join(["al", "ice"]), "password": "pw"}])
+        assert table._records.usernames[0] is user_record.sys.intern("alice")
+
+    def test_unicode_passwords(self):
+        """Test that non-ASCII passwords round-trip through the byte column."""
+        table = UserTable()
+        table.add("alice", "pässwörd🔑")
+        assert table.find("alice", "pässwörd🔑") is not None
+
+    def test_repack_drops_superseded_bytes(self, monkeypatch):
+        """Test that repeated password changes do not grow the data forever."""
+        monkeypatch.setattr(user_record, "REPACK_MIN_BYTES", 64)
+        table = UserTable([{"username": "alice", "password": "pw"}, {"username": "bob", "password": "x"}])
+        for i in range(100):
+            table.set_password("alice", f"password-{i}")
+        assert len(table._records.data) < 64 * 3
+        assert table.get("alice")["password"] == "password-99"
+        assert table.get("bob")["password"] == "x"
+
+
+@pytest.mark.parametrize("app, name", [(login_app, "USERS"), (user_auth_app, "users_db")])
+@pytest.mark.parametrize("layout", ["slots", "columnar"])
+def test_apps_use_record_layout(app, name, layout, monkeypatch):
+    """Test that the apps' public functions work over a compact layout."""
+    monkeypatch.setattr(app, name, getattr(app, name))
+    monkeypatch.setattr(app, "PASSWORD_HASHER", None)
+    before = list(getattr(app, name))
+    store = app.use_record_layout(layout)
+    assert getattr(app, name) is store
+    assert store == before
+    register = app.add_user if app is login_app else app.register_user
+    with patch.object(app, "log" if app is login_app else "log_event"):
+        register("alice", "pw")
+        assert app.login("alice", "pw") is True
+        app.reset_password("alice", "new")
+    assert store.get("alice")["password"] == "new"
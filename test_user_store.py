@@ -0,0 +1,323 @@
+import json
+import pytest
+from unittest.mock import patch
+import buggy_login_app
+import login_app
+from user_store import UserStore
+
+
+@pytest.fixture
+def store():
+    return UserStore([
+        {"username": "admin", "password": "1234"},
+        {"username": "guest", "password": "guest"}
+    ])
+
+
+class TestUserStoreListView:
+    """Tests for the list-of-dicts compatibility of UserStore."""
+
+    def test_len_and_iteration(self, store):
+        """Test that the store iterates records in insertion order."""
+        assert len(store) == 2
+        assert [u["username"] for u in store] == ["admin", "guest"]
+
+    def test_indexing(self, store):
+        """Test positional access like a list."""
+        assert store[0] == {"username": "admin", "password": "1234"}
+        assert store[-1]["username"] == "guest"
+
+    def test_contains(self, store):
+        """Test membership uses record equality."""
+        assert {"username": "admin", "password": "1234"} in store
+        assert {"username": "admin", "password": "wrong"} not in store
+        assert "admin" not in store
+
+    def test_equals_list(self, store):
+        """Test that the store compares equal to an equivalent list."""
+        assert store == [
+            {"username": "admin", "password": "1234"},
+            {"username": "guest", "password": "guest"}
+        ]
+
+    def test_append_is_indexed(self, store):
+        """Test that appended records are found by username."""
+        store.append({"username": "new", "password": "pw"})
+        assert store.get("new") == {"username": "new", "password": "pw"}
+
+
+class TestUserStoreListMutators:
+    """Tests that the list mutators keep the username index in step."""
+
+    def test_matches_a_plain_list(self, store):
+        """Test a sequence of mutations against the same ops on a list."""
+        expected = list(store)
+        for target in (store, expected):
+            target.insert(0, {"username": "first", "password": "a"})
+            target.insert(-1, {"username": "admin", "password": "dup"})
+            target[1] = {"username": "renamed", "password": "b"}
+            del target[-1]
+            target.append({"username": "last", "password": "c"})
+            target.remove({"username": "admin", "password": "dup"})
+        assert store.pop(0) == expected.pop(0)
+        assert store == expected
+        for record in expected:
+            assert store.get(record["username"]) == record
+        assert store.get("admin") is None
+        assert store.get("guest") is None
+
+    def test_renamed_record_is_indexed(self, store):
+        """Test that item assignment re-keys the index and sorted names."""
+        store[0] = {"username": "root", "password": "1234"}
+        assert store.get("admin") is None
+        assert store.find("root", "1234") is not None
+        assert [r["username"] for r in store.iter_records()] == ["guest", "root"]
+
+    def test_remove_missing_raises(self, store):
+        """Test that remove() of an absent record raises like a list."""
+        with pytest.raises(ValueError):
+            store.remove({"username": "admin", "password": "wrong"})
+
+    def test_pop_and_clear(self, store):
+        """Test pop() from the end and clear()."""
+        assert store.pop()["username"] == "guest"
+        assert store.get("guest") is None
+        store.clear()
+        assert len(store) == 0 and store.get("admin") is None
+        store.append({"username": "admin", "password": "new"})
+        assert store.page() == ([{"username": "admin", "password": "new"}], None)
+
+    def test_slices_are_rejected(self, store):
+        """Test that slice assignment and deletion are not supported."""
+        with pytest.raises(TypeError):
+            del store[0:1]
+
+    def test_index_and_count(self, store):
+        """Test index() and count() against the same calls on a list."""
+        store.append({"username": "admin", "password": "1234"})
+        del store[0]
+        expected = list(store)
+        record = {"username": "admin", "password": "1234"}
+        assert store.index(record) == expected.index(record)
+        assert store.count(record) == expected.count(record) == 1
+        with pytest.raises(ValueError):
+            store.index(record, 0, 1)
+        with pytest.raises(ValueError):
+            store.index({"username": "nobody", "password": "x"})
+
+    def test_copy_and_concatenation(self, store):
+        """Test copy(), + and += return indexed stores like list copies."""
+        extra = [{"username": "new", "password": "pw"}]
+        copy = store.copy()
+        copy.append(extra[0])
+        assert len(store) == 2 and store.get("new") is None
+        combined = store + extra
+        assert isinstance(combined, UserStore) and combined == copy
+        assert extra + store == extra + list(store)
+        before = store
+        store += extra
+        assert store is before and store.get("new") == extra[0]
+
+    def test_json_needs_a_list(self, store):
+        """Test that list(store) serialises like the list it replaced."""
+        assert json.loads(json.dumps(list(store))) == store
+
+
+class TestUserStoreLookups:
+    """Tests for indexed UserStore operations."""
+
+    def test_get_missing(self, store):
+        """Test get returns None for unknown usernames."""
+        assert store.get("nobody") is None
+
+    def test_find_matches_password(self, store):
+        """Test find requires both username and password to match."""
+        assert store.find("admin", "1234")["username"] == "admin"
+        assert store.find("admin", "nope") is None
+
+    def test_find_with_duplicate_usernames(self, store):
+        """Test that every duplicate record is checked, like the old scan."""
+        store.add("admin", "second")
+        assert store.find("admin", "1234") is not None
+        assert store.find("admin", "second") is not None
+
+    def test_set_password_updates_first_match(self, store):
+        """Test that set_password changes the first record only."""
+        store.add("admin", "second")
+        assert store.set_password("admin", "changed") is True
+        passwords = [u["password"] for u in store if u["username"] == "admin"]
+        assert passwords == ["changed", "second"]
+
+    def test_set_password_missing(self, store):
+        """Test set_password on an unknown user."""
+        assert store.set_password("nobody", "x") is False
+
+
+class TestUserStoreDeletion:
+    """Tests for tombstone deletion and compaction."""
+
+    def test_delete_removes_all_records_for_user(self, store):
+        """Test that delete drops every record with the username."""
+        store.add("admin", "other")
+        assert store.delete("admin") == 2
+        assert store == [{"username": "guest", "password": "guest"}]
+        assert store.get("admin") is None
+        assert len(store) == 1
+
+    def test_delete_missing(self, store):
+        """Test that deleting an unknown user changes nothing."""
+        assert store.delete("nobody") == 0
+        assert len(store) == 2
+
+    def test_tombstones_hidden_from_list_view(self, store):
+        """Test that iteration, indexing and membership skip deleted users."""
+        store.delete("admin")
+        assert [u["username"] for u in store] == ["guest"]
+        assert store[0]["username"] == "guest"
+        assert {"username": "admin", "password": "1234"} not in store
+
+    def test_readd_after_delete(self, store):
+        """Test that a deleted username can be added again and paged once."""
+        store.delete("admin")
+        store.add("admin", "new")
+        assert store.find("admin", "new") is not None
+        records, _ = store.page()
+        assert [r["username"] for r in records] == ["admin", "guest"]
+
+    def test_delete_users_bulk(self):
+        """Test bulk deletion and the compaction it triggers."""
+        store = UserStore({"username": f"u{i}", "password": "pw"} for i in range(3000))
+        assert store.delete_users(f"u{i}" for i in range(0, 3000, 2)) == 1500
+        assert store._dead == 0  # half the slots were dead, so compacted
+        assert len(store) == 1500
+        assert store.get("u1")["username"] == "u1"
+        assert store.get("u2") is None
+        assert store.page(prefix="u2", limit=1)[0][0]["username"] == "u2001"
+
+    def test_lookups_survive_compaction(self, store):
+        """Test that positions are renumbered on compact."""
+        store.delete("admin")
+        store.compact()
+        assert store.find("guest", "guest") is not None
+        assert store.set_password("guest", "new") is True
+        assert store[0] == {"username": "guest", "password": "new"}
+
+
+class TestUserStorePaging:
+    """Tests for the sorted username index, paging and prefix search."""
+
+    @pytest.fixture
+    def many(self):
+        return UserStore({"username": f"user{i:03d}", "password": "pw"} for i in range(250))
+
+    def test_pages_cover_all_users_in_order(self, many):
+        """Test that following cursors visits every username once, sorted."""
+        seen, cursor = [], None
+        while True:
+            records, cursor = many.page(after=cursor, limit=40)
+            seen.extend(r["username"] for r in records)
+            if cursor is None:
+                break
+        assert seen == sorted(f"user{i:03d}" for i in range(250))
+
+    def test_last_page_has_no_cursor(self, store):
+        """Test that a page holding the remaining users ends the walk."""
+        records, cursor = store.page(limit=2)
+        assert [r["username"] for r in records] == ["admin", "guest"]
+        assert cursor is None
+
+    def test_prefix_search(self, many):
+        """Test that a prefix restricts the page to matching usernames."""
+        records, cursor = many.page(prefix="user12", limit=50)
+        assert [r["username"] for r in records] == [f"user12{i}" for i in range(10)]
+        assert cursor is None
+
+    def test_appends_after_query_are_indexed(self, store):
+        """Test that names added after a query appear on the next one."""
+        store.page()
+        store.add("aaron", "pw")
+        store.extend({"username": f"z{i:03d}", "password": "pw"} for i in range(100))
+        records, _ = store.page(limit=3)
+        assert [r["username"] for r in records] == ["aaron", "admin", "guest"]
+        assert store.page(prefix="z", limit=1000)[0][-1]["username"] == "z099"
+
+    def test_duplicates_share_a_page_slot(self, store):
+        """Test that duplicate usernames are returned together."""
+        store.add("admin", "other")
+        records, _ = store.page(limit=1)
+        assert [r["password"] for r in records] == ["1234", "other"]
+
+    def test_iter_records_streams_everything(self, many):
+        """Test that iter_records yields every matching record."""
+        assert sum(1 for _ in many.iter_records(page_size=7)) == 250
+        assert len(list(many.iter_records("user00"))) == 10
+
+    def test_invalid_limit(self, store):
+        """Test that a page must hold at least one user."""
+        with pytest.raises(ValueError):
+            store.page(limit=0)
+
+
+class TestBuggyLoginAppPaging:
+    """Tests for buggy_login_app's paged user listing."""
+
+    def test_list_users_page(self, monkeypatch):
+        """Test paging and prefix search over a rebound USERS list."""
+        monkeypatch.setattr(buggy_login_app, "USERS", [
+            {"username": "bob", "password": "x"},
+            {"username": "alice", "password": "x"},
+            {"username": "bobby", "password": "x"},
+        ])
+        records, cursor = buggy_login_app.list_users_page(limit=2)
+        assert [r["username"] for r in records] == ["alice", "bob"]
+        records, cursor = buggy_login_app.list_users_page(cursor, limit=2)
+        assert [r["username"] for r in records] == ["bobby"]
+        assert cursor is None
+        assert [r["username"] for r in buggy_login_app.search_users("bob")] == ["bob", "bobby"]
+        assert [r["username"] for r in buggy_login_app.iter_users("al")] == ["alice"]
+
+    def test_print_users_streams_one_per_line(self, monkeypatch, capsys):
+        """Test that print_users prints each user on its own line."""
+        monkeypatch.setattr(buggy_login_app, "USERS", [
+            {"username": "b", "password": "x"},
+            {"username": "a", "password": "x"},
+        ])
+        buggy_login_app.print_users()
+        assert capsys.readouterr().out.splitlines() == [
+            str({"username": "a", "password": "x"}),
+            str({"username": "b", "password": "x"}),
+        ]
+
+    def test_delete_users(self, monkeypatch):
+        """Test bulk deletion through buggy_login_app."""
+        monkeypatch.setattr(buggy_login_app, "USERS", [
+            {"username": "a", "password": "x"},
+            {"username": "b", "password": "x"},
+            {"username": "c", "password": "x"},
+        ])
+        with patch("buggy_login_app.log") as mock_log:
+            assert buggy_login_app.delete_users(["a", "c", "zz"]) == 2
+            mock_log.assert_called_once()
+        assert buggy_login_app.list_users() == [{"username": "b", "password": "x"}]
+
+    def test_reset_password_uses_index(self, monkeypatch):
+        """Test that reset_password updates the indexed record."""
+        monkeypatch.setattr(buggy_login_app, "USERS", [{"username": "bob", "password": "old"}])
+        with patch("buggy_login_app.log"):
+            assert buggy_login_app.reset_password("bob", "new") is True
+            assert buggy_login_app.reset_password("nobody", "new") is False
+        assert buggy_login_app.USERS.get("bob")["password"] == "new"
+
+
+class TestLoginAppUsesStore:
+    """Tests that login_app keeps working when USERS is rebound."""
+
+    def test_plain_list_is_adopted(self, monkeypatch):
+        """Test that a plain list assigned to USERS is re-indexed on use."""
+        monkeypatch.setattr(login_app, "USERS", [{"username": "bob", "password": "pw"}])
+        monkeypatch.setattr(login_app, "SESSIONS", {})
+        assert login_app.login("bob", "pw") is True
+        assert isinstance(login_app.USERS, UserStore)
+        with patch("login_app.log"):
+            login_app.add_user("carol", "pw2")
+        assert login_app.USERS.get("carol") is not None
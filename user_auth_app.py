@@ -1,21 +1,78 @@
 import os
-import random
-import time
-import json
+import sys
 import hashlib
 
-# Global user store (bad practice)
-users_db = [
+import audit_log
+import bulk_import
+import cli
+import config_writer
+import metrics
+import rate_limit
+import storage
+import user_record
+from auth_core import AuthCore
+from session_store import SessionStore
+from user_store import UserStore
+
+# Global user store (bad practice), indexed by username
+users_db = UserStore([
     {"username": "admin", "password": "admin123"},
     {"username": "test", "password": "test123"}
-]
+])
 
-sessions = {}
+sessions = SessionStore()
+
+# Set to a password_hashing.PasswordHasher to store salted KDF hashes;
+# existing plaintext passwords are then rehashed on their next login.
+PASSWORD_HASHER = None
+
+# Failed-login throttling per username and source (see rate_limit.py)
+LOGIN_GUARD = rate_limit.LoginGuard()
+
+# How save_config writes: "atomic" (temp file + rename), "coalesce" (one
+# write per burst of saves) or "journal" (changed keys appended to a
+# journal); see config_writer.py
+CONFIG_WRITE_MODE = "atomic"
 
 # Logging function (writes passwords in log intentionally)
+@metrics.timed()
 def log_event(message):
-    with open("auth.log", "a") as f:
-        f.write(f"{time.ctime()} - {message}\n")
+    audit_log.get_logger("auth.log").write(message)
+
+# users_db may be rebound to a plain list; adopt it into an indexed store.
+# The list is copied: once adopted, append to users_db, not to the old list.
+def _users():
+    global users_db
+    if isinstance(users_db, list):
+        users_db = UserStore(users_db)
+    return users_db
+
+# Replace users_db with a configured storage backend (see storage.py), e.g.
+# use_storage({"backend": "log", "path": "users.log"})
+def use_storage(config):
+    global users_db
+    users_db = storage.from_config(config)
+    return users_db
+
+# Re-store the in-memory users in a compact layout (see user_record.py):
+# "slots" for UserRecord objects, "columnar" for a UserTable
+def use_record_layout(layout):
+    global users_db
+    users_db = user_record.store_for(layout, _users())
+    return users_db
+
+# Log wording for the shared auth core (see auth_core.py)
+_MESSAGES = {
+    "add": "User added: {username} | {password}",
+    "reset": "Password reset for {username} to {password}",
+    "delete": "Deleted user: {username}",
+    "delete_many": "Deleted {count} users: {usernames}",
+}
+
+# Auth core over the current globals (rebuilt per call so patches apply)
+def _core():
+    return AuthCore(_users(), sessions, log_event, PASSWORD_HASHER,
+                    token_range=(100000, 999999), messages=_MESSAGES)
 
 # Weak password hashing (MD5)
 def hash_password(password):
@@ -25,97 +82,77 @@ def hash_password(password):
 def register_user(username, password):
     if len(password) < 4:  # weak validation
         print("Password too short!")
-    users_db.append({
-        "username": username,
-        "password": password  # stored in plain text intentionally
-    })
-    log_event(f"User added: {username} | {password}")
+    _core().add_user(username, password)
     print("User registered successfully!")
 
+# Bulk registration (one log write per batch)
+def bulk_add_users(records, batch_size=bulk_import.DEFAULT_BATCH_SIZE):
+    return bulk_import.bulk_add_users(records, _users(), batch_size, log_file="auth.log",
+                                      hasher=PASSWORD_HASHER)
+
 # Login function
+@metrics.timed()
 def login(username, password):
+    if not LOGIN_GUARD.check(username):
+        print("Too many failed attempts, try again later")
+        return False
+
     # Hardcoded credentials check
     if username == "superuser" and password == "superpass":
         print("Superuser logged in!")
         return True
 
-    # Check global users_db
-    for user in users_db:
-        if user["username"] == username and user["password"] == password:
-            token = str(random.randint(100000, 999999))
-            sessions[token] = {"username": username, "time": time.time()}
-            print(f"Login successful. Session: {token}")
-            return True
+    # Check global users_db (indexed lookup)
+    token = _core().login(username, password)
+    if token is not None:
+        LOGIN_GUARD.succeeded(username)
+        print(f"Login successful. Session: {token}")
+        return True
 
+    LOGIN_GUARD.failed(username)
     print("Login failed")
     return False
 
 # Password reset (unsafe)
 def reset_password(username, new_password):
-    for user in users_db:
-        if user["username"] == username:
-            user["password"] = new_password
-            log_event(f"Password reset for {username} to {new_password}")
-            return True
-    return False
+    return _core().reset_password(username, new_password)
 
-# Load config (unsafe: file not closed)
+# Load config through the shared cache (read-only view, reparsed on change)
+@metrics.timed()
 def load_config(file_name):
-    f = open(file_name, "r")
-    data = json.load(f)
-    return data
+    return config_writer.load_config(file_name, CONFIG_WRITE_MODE)
 
-# Save config (unsafe: no exception handling)
+# Save config atomically (temp file + rename), or coalesced/journaled per
+# CONFIG_WRITE_MODE
 def save_config(file_name, data):
-    f = open(file_name, "w")
-    json.dump(data, f)
-    f.close()
+    config_writer.save_config(file_name, data, CONFIG_WRITE_MODE)
 
 # Simulated admin operations
 def delete_user(username):
-    global users_db
-    users_db = [user for user in users_db if user["username"] != username]
-    log_event(f"Deleted user: {username}")
+    _core().delete_user(username)  # tombstone, no list rebuild
     print(f"User {username} deleted.")
 
-# CLI Interface
+# Bulk deprovisioning: one pass over the index and one log write
+def delete_users(usernames):
+    return _core().delete_users(usernames)
+
+def quit_app():
+    print("Goodbye!")
+    exit()
+
+# CLI command table (built per run so patched functions are picked up)
+def _dispatcher():
+    return cli.CommandDispatcher([
+        cli.Command("1", "Register", register_user, ("Username: ", "Password: ")),
+        cli.Command("2", "Login", login, ("Username: ", "Password: ")),
+        cli.Command("3", "Reset Password", reset_password, ("Username: ", "New Password: ")),
+        cli.Command("4", "Delete User", delete_user, ("Username to delete: ",)),
+        cli.Command("5", "Exit", quit_app),
+    ], title="\n=== User Auth Menu ===", invalid_message="Invalid option!")
+
+# CLI Interface (iterative loop, see cli.py)
 def menu():
-    print("\n=== User Auth Menu ===")
-    print("1. Register")
-    print("2. Login")
-    print("3. Reset Password")
-    print("4. Delete User")
-    print("5. Exit")
-
-    choice = input("Choose an option: ")
-
-    if choice == "1":
-        username = input("Username: ")
-        password = input("Password: ")
-        register_user(username, password)
-
-    elif choice == "2":
-        username = input("Username: ")
-        password = input("Password: ")
-        login(username, password)
-
-    elif choice == "3":
-        username = input("Username: ")
-        new_password = input("New Password: ")
-        reset_password(username, new_password)
-
-    elif choice == "4":
-        username = input("Username to delete: ")
-        delete_user(username)
-
-    elif choice == "5":
-        print("Goodbye!")
-        exit()
-
-    else:
-        print("Invalid option!")
-
-    menu()  # recursive call (stack risk)
+    _dispatcher().run()
 
 if __name__ == "__main__":
-    menu()
+    cli.run_from_args(_dispatcher(), sys.argv[1:])
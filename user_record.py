@@ -0,0 +1,255 @@
+# Compact in-memory user records.
+#
+# A ``{"username": ..., "password": ...}`` dict costs about 180 bytes
+# before its two strings. Two smaller layouts keep the same interface:
+#
+#   slots     CompactUserStore holds UserRecord objects: two __slots__
+#             attributes, about 50 bytes each. They support record["key"]
+#             access and compare equal to the equivalent dict, so code
+#             written against dict records keeps working.
+#   columnar  UserTable keeps no per-user object at all: usernames are
+#             interned strings in one list, and passwords are UTF-8 bytes
+#             packed into one bytearray located by array-backed offsets and
+#             lengths. Records are built on read, as detached UserRecords:
+#             change a password with set_password(), not by assigning into
+#             a record read from the table.
+#
+# Both are UserStores, so indexing, paging, deletes and AuthCore work
+# unchanged. store_for(layout, records) builds one by name.
+import sys
+from array import array
+
+from password_hashing import check_record
+from user_store import UserStore
+
+FIELDS = ("username", "password")
+
+# Repack a UserTable's password bytes once superseded bytes exceed both
+# this size and the live bytes.
+REPACK_MIN_BYTES = 1 << 16
+
+
+class UserRecord:
+    """A user record with attribute and ``record["key"]`` access."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+    @classmethod
+    def from_mapping(cls, record):
+        return cls(record["username"], record["password"])
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in FIELDS else default
+
+    def keys(self):
+        return list(FIELDS)
+
+    def values(self):
+        return [self.username, self.password]
+
+    def items(self):
+        return list(zip(FIELDS, self.values()))
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def to_dict(self):
+        return {"username": self.username, "password": self.password}
+
+    def __eq__(self, other):
+        if isinstance(other, UserRecord):
+            return self.username == other.username and self.password == other.password
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None  # mutable, like the dict it replaces
+
+    def __repr__(self):
+        return f"UserRecord(username={self.username!r}, password={self.password!r})"
+
+
+def _as_record(record):
+    return record if isinstance(record, UserRecord) else UserRecord.from_mapping(record)
+
+
+class CompactUserStore(UserStore):
+    """UserStore holding UserRecord objects; appended dicts are converted."""
+
+    def append(self, record):
+        super().append(_as_record(record))
+
+    def __setitem__(self, position, record):
+        super().__setitem__(position, _as_record(record))
+
+    def insert(self, position, record):
+        super().insert(position, _as_record(record))
+
+    def add(self, username, password):
+        record = UserRecord(username, password)
+        self.append(record)
+        return record
+
+
+class _Columns:
+    """UserTable's record list: one column per field, None for a deleted row."""
+
+    def __init__(self):
+        self.usernames = []         # interned; None marks a deleted row
+        self.offsets = array("Q")   # start of each password in data
+        self.lengths = array("I")
+        self.data = bytearray()     # UTF-8 passwords, back to back
+        self.garbage = 0            # bytes no live row points at
+
+    def _write(self, password):
+        encoded = password.encode("utf-8", "surrogatepass")
+        offset = len(self.data)
+        self.data += encoded
+        return offset, len(encoded)
+
+    def _password(self, position):
+        offset = self.offsets[position]
+        return self.data[offset:offset + self.lengths[position]].decode("utf-8", "surrogatepass")
+
+    def append(self, record):
+        offset, length = self._write(record["password"])
+        self.usernames.append(sys.intern(record["username"]))
+        self.offsets.append(offset)
+        self.lengths.append(length)
+
+    def insert(self, position, record):
+        offset, length = self._write(record["password"])
+        self.usernames.insert(position, sys.intern(record["username"]))
+        self.offsets.insert(position, offset)
+        self.lengths.insert(position, length)
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        username = self.usernames[position]
+        if username is None:
+            return None
+        return UserRecord(username, self._password(position))
+
+    def __setitem__(self, position, record):
+        # None deletes the row
+        if self.usernames[position] is not None:
+            self.garbage += self.lengths[position]
+        if record is None:
+            self.usernames[position] = None
+            return
+        self.usernames[position] = sys.intern(record["username"])
+        self.offsets[position], self.lengths[position] = self._write(record["password"])
+
+    def __iter__(self):
+        for position in range(len(self.usernames)):
+            yield self[position]
+
+    def set_password(self, position, password):
+        self.garbage += self.lengths[position]
+        self.offsets[position], self.lengths[position] = self._write(password)
+        if self.garbage >= REPACK_MIN_BYTES and self.garbage * 2 >= len(self.data):
+            self.repack()
+
+    def repack(self):
+        """Rewrite ``data`` without superseded or deleted passwords."""
+        data = bytearray()
+        for position, username in enumerate(self.usernames):
+            offset = self.offsets[position]
+            self.offsets[position] = len(data)
+            if username is not None:
+                data += self.data[offset:offset + self.lengths[position]]
+        self.data = data
+        self.garbage = 0
+
+    def compacted(self):
+        """A copy holding only the live rows."""
+        columns = _Columns()
+        for position, username in enumerate(self.usernames):
+            if username is not None:
+                offset = self.offsets[position]
+                columns.usernames.append(username)
+                columns.offsets.append(len(columns.data))
+                columns.lengths.append(self.lengths[position])
+                columns.data += self.data[offset:offset + self.lengths[position]]
+        return columns
+
+
+class UserTable(UserStore):
+    """Columnar UserStore with no per-user record objects."""
+
+    def __init__(self, records=()):
+        super().__init__()
+        self._records = _Columns()
+        self.extend(records)
+
+    def add(self, username, password):
+        record = UserRecord(username, password)
+        self.append(record)
+        return record
+
+    def find(self, username, password, hasher=None):
+        for position in self._positions(username):
+            record = self._records[position]
+            stored = record.password
+            if check_record(record, password, hasher):
+                if record.password != stored:
+                    self._records.set_password(position, record.password)  # persist the rehash
+                return record
+        return None
+
+    def set_password(self, username, new_password):
+        positions = self._positions(username)
+        if not positions:
+            return False
+        self._records.set_password(positions[0], new_password)
+        return True
+
+    def _usernames(self):
+        return iter(self._records.usernames)
+
+    def compact(self):
+        if self._dead:
+            self._records = self._records.compacted()
+            self._reindex()
+            self._dead = 0
+        super().compact()
+
+
+LAYOUTS = {
+    "dict": UserStore,
+    "slots": CompactUserStore,
+    "columnar": UserTable,
+}
+
+
+def store_for(layout, records=()):
+    """Build the UserStore for ``layout`` ("dict", "slots" or "columnar")."""
+    try:
+        store = LAYOUTS[layout]
+    except KeyError:
+        raise ValueError(f"unknown record layout: {layout!r}") from None
+    return store(records)
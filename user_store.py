@@ -0,0 +1,363 @@
+# Username-indexed user store.
+#
+# Replaces the plain ``USERS`` list so that login and password resets are a
+# dict lookup instead of a scan over every account. The store still behaves
+# like the old list of ``{"username": ..., "password": ...}`` dicts, so code
+# that iterates, indexes, appends to or takes ``len()`` of it keeps working,
+# and the list mutators (insert, remove, pop, clear, item assignment and
+# ``del``) keep the index in step, as do ``+``, ``+=``, ``index``, ``count``
+# and ``copy``. Slice assignment is not supported, and it is not a list
+# subclass: pass ``list(store)`` to json.dumps or anything else that wants
+# a real list.
+#
+# Records may be changed in place except for their username, which the
+# index is keyed on: to rename, assign a new record (``store[i] = ...``) or
+# delete and add again.
+#
+# A sorted list of usernames backs prefix search and cursor pagination. New
+# names are queued and merged into it on the next query: a few by insort,
+# a bulk load by one re-sort.
+#
+# Deleting a user leaves a tombstone (None) in the record list instead of
+# shifting everything after it; the list is compacted once tombstones make
+# up half of it, so a delete is amortised O(1).
+#
+# The index maps a username to the position of its record, or to a list of
+# positions for the rare duplicate username; a list per user would cost
+# more than the record itself in a large store.
+from bisect import bisect_left, bisect_right, insort
+
+from password_hashing import check_record
+
+# Above this many queued names the sorted index is rebuilt rather than
+# updated name by name.
+INSORT_LIMIT = 64
+
+# Compact once at least this many slots, and at least half of all slots,
+# are tombstones.
+COMPACT_MIN = 1024
+
+
+class UserStore:
+    """User records with an O(1) username index.
+
+    Duplicate usernames are allowed (the list this replaces allowed them);
+    lookups return records in insertion order.
+    """
+
+    def __init__(self, records=()):
+        self._records = []     # insertion order; None marks a deleted slot
+        self._index = {}       # username -> position, or list of positions
+        self._dead = 0
+        self._sorted = []
+        self._unsorted = []
+        self._removed = set()  # deleted names still present in _sorted
+        for record in records:
+            self.append(record)
+
+    # ---- list-compatible view -------------------------------------------
+    def append(self, record):
+        username = record["username"]
+        if self._link(username, len(self._records)):
+            self._note_name(username)
+        self._records.append(record)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self._records) - self._dead
+
+    def __iter__(self):
+        if not self._dead:
+            return iter(self._records)
+        return (record for record in self._records if record is not None)
+
+    def __getitem__(self, position):
+        if self._dead:
+            self.compact()
+        return self._records[position]
+
+    def __contains__(self, record):
+        try:
+            positions = self._positions(record["username"])
+        except (KeyError, TypeError):
+            return False
+        return any(self._records[position] == record for position in positions)
+
+    def index(self, record, start=0, stop=None):
+        """Position of the first record equal to ``record`` in [start, stop)."""
+        if self._dead:
+            self.compact()
+        start, stop, _ = slice(start, stop).indices(len(self._records))
+        try:
+            positions = self._positions(record["username"])
+        except (KeyError, TypeError):
+            positions = ()
+        for position in positions:
+            if start <= position < stop and self._records[position] == record:
+                return position
+        raise ValueError("record not in UserStore")
+
+    def count(self, record):
+        try:
+            positions = self._positions(record["username"])
+        except (KeyError, TypeError):
+            return 0
+        return sum(self._records[position] == record for position in positions)
+
+    def copy(self):
+        """A new store of the same type holding the same records."""
+        return type(self)(self)
+
+    def __add__(self, other):
+        if not isinstance(other, (UserStore, list)):
+            return NotImplemented
+        combined = self.copy()
+        combined.extend(other)
+        return combined
+
+    def __radd__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        return other + list(self)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, UserStore):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    # ---- list mutators ----------------------------------------------------
+    # Removals leave tombstones like delete(); insert and item assignment
+    # write the slot and re-index, O(n) for insert as it is for a list.
+    def _position(self, position):
+        # Physical slot for a list index, after dropping tombstones
+        if isinstance(position, slice):
+            raise TypeError("UserStore does not support slices here")
+        if self._dead:
+            self.compact()
+        return range(len(self._records))[position]
+
+    def __setitem__(self, position, record):
+        position = self._position(position)
+        self._unlink(self._records[position]["username"], position)
+        self._records[position] = record
+        if self._link(record["username"], position):
+            self._note_name(record["username"])
+
+    def __delitem__(self, position):
+        self._tombstone_at(self._position(position))
+        self._maybe_compact()
+
+    def insert(self, position, record):
+        if self._dead:
+            self.compact()
+        if position >= len(self._records):
+            self.append(record)
+            return
+        new = record["username"] not in self._index
+        self._records.insert(position, record)
+        self._reindex()
+        if new:
+            self._note_name(record["username"])
+
+    def pop(self, position=-1):
+        position = self._position(position)
+        record = self._records[position]
+        self._tombstone_at(position)
+        self._maybe_compact()
+        return record
+
+    def remove(self, record):
+        """Remove the first record equal to ``record``."""
+        for position in self._positions(record["username"]):
+            if self._records[position] == record:
+                self._tombstone_at(position)
+                self._maybe_compact()
+                return
+        raise ValueError("record not in UserStore")
+
+    def clear(self):
+        self._records = type(self._records)()
+        self._index = {}
+        self._dead = 0
+        self._sorted = []
+        self._unsorted = []
+        self._removed = set()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    # ---- indexed operations ---------------------------------------------
+    def _link(self, username, position):
+        # Index a record; True if ``username`` was not indexed before.
+        bucket = self._index.get(username)
+        if bucket is None:
+            self._index[username] = position
+            return True
+        if isinstance(bucket, list):
+            insort(bucket, position)
+        else:
+            self._index[username] = sorted((bucket, position))
+        return False
+
+    def _unlink(self, username, position):
+        # Drop one position; a name with none left goes to _removed.
+        bucket = self._index[username]
+        if isinstance(bucket, list):
+            bucket.remove(position)
+            if len(bucket) == 1:
+                self._index[username] = bucket[0]
+        else:
+            del self._index[username]
+            self._removed.add(username)
+
+    def _note_name(self, username):
+        # A newly indexed name joins the sorted index
+        if username in self._removed:
+            self._removed.discard(username)
+        else:
+            self._unsorted.append(username)
+
+    def _usernames(self):
+        return (record["username"] for record in self._records)
+
+    def _reindex(self):
+        self._index = {}
+        for position, username in enumerate(self._usernames()):
+            self._link(username, position)
+
+    def _positions(self, username):
+        bucket = self._index.get(username)
+        if bucket is None:
+            return ()
+        return bucket if isinstance(bucket, list) else (bucket,)
+
+    def add(self, username, password):
+        record = {"username": username, "password": password}
+        self.append(record)
+        return record
+
+    def get(self, username):
+        bucket = self._index.get(username)
+        if bucket is None:
+            return None
+        return self._records[bucket[0] if isinstance(bucket, list) else bucket]
+
+    def find(self, username, password, hasher=None):
+        # With a hasher, plaintext or outdated hashes are upgraded on match.
+        for position in self._positions(username):
+            record = self._records[position]
+            if check_record(record, password, hasher):
+                return record
+        return None
+
+    def set_password(self, username, new_password):
+        record = self.get(username)
+        if record is None:
+            return False
+        record["password"] = new_password
+        return True
+
+    # ---- deletion ---------------------------------------------------------
+    def _tombstone_at(self, position):
+        self._unlink(self._records[position]["username"], position)
+        self._records[position] = None
+        self._dead += 1
+    def _tombstone(self, username):
+        positions = self._positions(username)
+        if not positions:
+            return 0
+        del self._index[username]
+        for position in positions:
+            self._records[position] = None
+        self._dead += len(positions)
+        self._removed.add(username)
+        return len(positions)
+
+    def delete(self, username):
+        """Remove every record for ``username``; return how many went."""
+        removed = self._tombstone(username)
+        self._maybe_compact()
+        return removed
+
+    def delete_users(self, usernames):
+        """Remove every record for each of ``usernames``; return the count."""
+        removed = 0
+        for username in usernames:
+            removed += self._tombstone(username)
+        self._maybe_compact()
+        return removed
+
+    def _maybe_compact(self):
+        if self._dead >= COMPACT_MIN and self._dead * 2 >= len(self._records):
+            self.compact()
+
+    def compact(self):
+        """Drop tombstones and renumber the index."""
+        if self._dead:
+            self._records = [record for record in self._records if record is not None]
+            self._reindex()
+            self._dead = 0
+        if self._removed:
+            self._sorted = [name for name in self._sorted_usernames() if name not in self._removed]
+            self._removed = set()
+
+    # ---- sorted username index ------------------------------------------
+    def _sorted_usernames(self):
+        if self._unsorted:
+            if len(self._unsorted) <= INSORT_LIMIT:
+                for username in self._unsorted:
+                    insort(self._sorted, username)
+            else:
+                self._sorted = sorted(self._index)
+                self._removed = set()
+            self._unsorted = []
+        return self._sorted
+
+    def page(self, prefix="", after=None, limit=50):
+        """Return (records, next_cursor) for up to ``limit`` usernames.
+
+        Usernames are visited in sorted order, restricted to ``prefix`` and
+        starting after the ``after`` cursor. Pass the returned cursor back
+        to get the next page; it is None on the last page.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        names = self._sorted_usernames()
+        if after is None or after < prefix:
+            position = bisect_left(names, prefix)
+        else:
+            position = bisect_right(names, after)
+        records = []
+        taken = 0
+        last = None
+        for position in range(position, len(names)):
+            username = names[position]
+            if not username.startswith(prefix):
+                break
+            positions = self._positions(username)
+            if not positions:
+                continue  # deleted, awaiting compaction
+            if taken == limit:
+                return records, last
+            records.extend(self._records[p] for p in positions)
+            taken += 1
+            last = username
+        return records, None
+
+    def iter_records(self, prefix="", page_size=1000):
+        """Stream records in username order, one page at a time."""
+        cursor = None
+        while True:
+            records, cursor = self.page(prefix, cursor, page_size)
+            yield from records
+            if cursor is None:
+                return